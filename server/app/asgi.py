@@ -2,6 +2,8 @@
 ASGI config for app project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Http is served by Django with the handler of core/asgi.py, websocket connections are handed to the consumers of
+game.routing.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
@@ -9,8 +11,26 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+from core.asgi import get_asgi_application
+from django.conf import settings
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
-application = get_asgi_application()
+http_application = get_asgi_application()
+
+if settings.DEBUG:
+    # runserver served the static files of the admin during development, uvicorn does not
+    http_application = ASGIStaticFilesHandler(http_application)
+
+# the routes import models, so they are loaded after get_asgi_application set up django
+from core.websocket import websocket_router  # noqa: E402
+from game.routing import websocket_routes  # noqa: E402
+
+websocket_application = websocket_router(websocket_routes)
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        return await websocket_application(scope, receive, send)
+    return await http_application(scope, receive, send)
@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'core.apps.CoreConfig',
     'content.apps.ContentConfig',
     'game.apps.GameConfig',
@@ -46,11 +47,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.instrumentation.QueryInstrumentationMiddleware',
+    'core.routers.ReplicaPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.tokens.TokenAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -80,14 +84,77 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Connections are kept for CONN_MAX_AGE seconds and checked before their first query of a request, see
+# core/connections.py. Each process holds up to DATABASE_POOL['SIZE'] connections for the async api plus one for sync
+# views, so processes times that must stay below max_connections of the server. Compare with `manage.py bench_requests`
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.backends.postgresql',
         'HOST': os.environ.get('PG_DB_HOST'),
         'NAME': os.environ.get('PG_DB_NAME'),
         'USER': os.environ.get('PG_DB_USER'),
         'PASSWORD': os.environ.get('PG_DB_PASS'),
+        'CONN_MAX_AGE': int(os.environ.get('PG_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+DATABASE_POOL = {
+    'SIZE': int(os.environ.get('DATABASE_POOL_SIZE', 10)),   # 0 uses the default thread pool of asyncio
+}
+
+# Read replicas, see core/routers.py
+# Reads of the content models go to the aliases of REPLICAS['REPLICAS'], by default every alias besides the primary.
+# Locally PG_REPLICA_HOST can point to a second server or to the primary itself, tests mirror the replica to the primary
+
+if os.environ.get('PG_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ.get('PG_REPLICA_HOST'),
+        'TEST': {'MIRROR': 'default'},
     }
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+REPLICAS = {
+    'PRIMARY': 'default',
+    'REPLICAS': [alias for alias in DATABASES if alias != 'default'],
+    'MODELS': ['content.language', 'content.word', 'game.package', 'game.folder'],
+    'PIN_SECONDS': 5,   # clients read from the primary this long after writing, longer than the replication lag
+}
+
+
+# Password hashing, see core/hashers.py
+# New passwords are hashed by the first hasher, the others check older hashes. Passwords are rehashed on the next
+# login when the first hasher or its costs change, so costs can be tuned per deployment.
+
+PASSWORD_HASHERS = [
+    'core.hashers.Argon2PasswordHasher',
+    'core.hashers.BCryptSHA256PasswordHasher',
+    'core.hashers.PBKDF2PasswordHasher',
+]
+
+PASSWORD_HASHING = {
+    'ARGON2_TIME_COST': int(os.environ.get('ARGON2_TIME_COST', 2)),
+    'ARGON2_MEMORY_COST': int(os.environ.get('ARGON2_MEMORY_COST', 102400)),   # KiB
+    'ARGON2_PARALLELISM': int(os.environ.get('ARGON2_PARALLELISM', 8)),
+    'BCRYPT_ROUNDS': 12,
+    'PBKDF2_ITERATIONS': 320000,
+}
+
+# Hashing a password with the costs above takes a good part of a second, so tests run with app/test_settings.py:
+# python manage.py test --settings=app.test_settings
+
+# Token authentication, see core/tokens.py
+# Requests with 'Authorization: Bearer <access token>' are authenticated without reading the session or user table
+
+JWT = {
+    'SIGNING_KEY': os.environ.get('JWT_SIGNING_KEY'),   # defaults to SECRET_KEY
+    'ALGORITHM': 'HS256',
+    'ACCESS_SECONDS': 300,
+    'REFRESH_SECONDS': 14 * 24 * 3600,
+    'LEEWAY': 10,
 }
 
 
@@ -136,9 +203,119 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'core.User'
 
+# Primary keys of new rows are time ordered uuid7 instead of random uuid4, see core/uuids.py
+# Existing rows keep their ids, compare both with `manage.py benchmark_ids`
+
+TIME_ORDERED_IDS = False
+
 CORS_ALLOW_CREDENTIALS = True  # to accept cookies via ajax request
 
 CORS_ORIGIN_WHITELIST = [
     # the domain for front-end app(you can add more than 1)
     'http://localhost:4200', 'http://localhost:8000'
 ]
+
+# Async api, see core/api.py
+# Database work of async views runs in a thread pool with one connection per thread. Tests set this to True so all
+# queries run in the main thread and share the test transaction.
+
+API_THREAD_SENSITIVE = False
+
+# Rating and matchmaking
+
+ELO_K_FACTOR = 32
+
+# The in-memory queue only pairs the players of its own process. Setting MATCHMAKING_REDIS_URL moves the queues to
+# redis, where the players of all processes are paired.
+
+MATCHMAKING = {
+    'BACKEND': 'core.matchmaking.InMemoryMatchmakingQueue',
+    'OPTIONS': {
+        'base_window': 50,    # elo difference accepted right away
+        'window_growth': 10,  # elo added to the window per second of waiting
+        'max_window': 400,
+    },
+}
+
+if os.environ.get('MATCHMAKING_REDIS_URL'):
+    MATCHMAKING['BACKEND'] = 'core.matchmaking.RedisMatchmakingQueue'
+    MATCHMAKING['OPTIONS']['url'] = os.environ.get('MATCHMAKING_REDIS_URL')
+
+# Realtime duels, see game/duels.py
+# Websocket connections of different processes only meet through a shared channel layer and matchmaking queue, the
+# layer can be moved to redis with 'BACKEND': 'core.channels.RedisChannelLayer', 'OPTIONS': {'url': ...} and the queue
+# with MATCHMAKING_REDIS_URL, see above.
+
+CHANNEL_LAYER = {
+    'BACKEND': 'core.channels.InMemoryChannelLayer',
+    'OPTIONS': {'capacity': 100},   # messages buffered per subscription
+}
+
+DUELS = {
+    'QUESTIONS': 10,
+    'QUESTION_SECONDS': 15,
+    'MATCH_INTERVAL': 1,   # seconds between pairings of players whose rating windows grew
+}
+
+# Query and latency instrumentation, see core/instrumentation.py
+# Metrics are served on /metrics/ to staff users and to scrapers sending 'Authorization: Bearer <METRICS_TOKEN>'
+
+INSTRUMENTATION = {
+    'SERVER_TIMING': True,
+    'SLOW_REQUEST_SECONDS': 1.0,   # requests taking longer log their slowest query
+    'QUERY_BUDGET': None,          # queries per request before a warning is logged
+    'STRICT': False,               # fail requests over the budget instead, meant for tests
+    'METRICS_TOKEN': os.environ.get('METRICS_TOKEN'),
+}
+
+# Multiple choice questions, see game/quiz.py
+
+QUIZ = {
+    'CHOICES': 4,       # the answer and three distractors
+    'POOL_TTL': 300,    # seconds the distractor pools of a language are kept
+}
+
+# Practice event log, see game/events.py
+# `manage.py rollup_practices` feeds the practice counters from the log, `manage.py practice_partitions` keeps the
+# monthly partitions on postgres
+
+PRACTICE_EVENTS = {
+    # seconds events wait before they are rolled up, longer than any transaction appending them, events committed
+    # later are never counted
+    'ROLLUP_DELAY': 60,
+    'BATCH_SIZE': 1000,       # learnings or words per counter update of a rollup
+    'PARTITIONS_AHEAD': 3,    # months partitions are created for in advance
+}
+
+# Leaderboards, see core/leaderboard.py
+# Boards live in sorted sets. In process memory they only work with a single server process and are lost on restart,
+# the global and language boards can be refilled with rebuild_leaderboards, the weekly boards are gone. Setting
+# SORTED_SETS_REDIS_URL moves them to redis, which all processes share and which keeps them across restarts.
+
+SORTED_SETS = {
+    'BACKEND': 'core.sortedset.InMemorySortedSets',
+}
+
+if os.environ.get('SORTED_SETS_REDIS_URL'):
+    SORTED_SETS = {
+        'BACKEND': 'core.sortedset.RedisSortedSets',
+        'OPTIONS': {'url': os.environ.get('SORTED_SETS_REDIS_URL')},
+    }
+
+# Read-through caches of serialized content, see core/cache.py
+# The local memory cache only works with a single server process, as the others never invalidate its entries. Setting
+# CACHE_REDIS_URL moves the content cache to redis, which all processes share.
+
+READ_THROUGH_CACHES = {
+    'content': {
+        'BACKEND': 'core.cache.LocalMemoryCache',
+        'OPTIONS': {'max_entries': 10000},
+        'TTL': 300,
+    },
+}
+
+if os.environ.get('CACHE_REDIS_URL'):
+    READ_THROUGH_CACHES['content'].update({
+        'BACKEND': 'core.cache.RedisCache',
+        'OPTIONS': {'url': os.environ.get('CACHE_REDIS_URL')},
+    })
@@ -0,0 +1,8 @@
+"""
+Settings of the test runs: python manage.py test --settings=app.test_settings
+Passwords are hashed with MD5, the production hashers take a good part of a second per password. Tests of the hashers
+set their own.
+"""
+from app.settings import *  # noqa: F401,F403
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
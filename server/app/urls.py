@@ -13,9 +13,15 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from core import views
 from django.contrib import admin
-from django.urls import path
+from django.urls import include, path
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('auth/token/', views.token, name='token'),
+    path('auth/token/refresh/', views.refresh_token, name='token-refresh'),
+    path('content/', include('content.urls')),
+    path('game/', include('game.urls')),
+    path('metrics/', views.metrics, name='metrics'),
 ]
@@ -1,6 +1,22 @@
+from core.signals import entities_soft_deleted
 from django.apps import AppConfig
+from django.db.models.signals import m2m_changed, post_delete, post_save
 
 
 class ContentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'content'
+
+    def ready(self):
+        from core.cache import invalidate_model
+        from content import caching, counters
+        from content.models import Language, Word
+
+        for model, handler in ((Language, caching.invalidate_language), (Word, caching.invalidate_word)):
+            post_save.connect(handler, sender=model, dispatch_uid=f'invalidate_{model.__name__}_on_save')
+            post_delete.connect(handler, sender=model, dispatch_uid=f'invalidate_{model.__name__}_on_delete')
+            entities_soft_deleted.connect(invalidate_model, sender=model,
+                                          dispatch_uid=f'invalidate_{model.__name__}_on_soft_delete')
+        post_delete.connect(counters.uncount_word, sender=Word, dispatch_uid='uncount_word')
+        m2m_changed.connect(counters.subscribers_changed, sender=Language.subscribers.through,
+                            dispatch_uid='count_language_subscribers')
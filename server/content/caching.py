@@ -0,0 +1,32 @@
+"""Cached serialized languages and words, kept fresh by the signal handlers connected in ContentConfig.ready"""
+from content.models import Language, Word
+from content.serializers import LanguageSerializer, WordSerializer
+from core.cache import get_cache
+from core.routers import use_primary
+
+
+def _loader(model, serializer, pk):
+  def load():
+    # a lagging replica would put a stale value into the cache, where it outlives the pin of the writer
+    with use_primary():
+      instance = model.objects.alive().filter(pk=pk).first()
+      return dict(serializer(instance).data) if instance is not None else None
+  return load
+
+
+def get_language(pk):
+  """Returns the serialized active language or None"""
+  return get_cache().get('language', pk, _loader(Language, LanguageSerializer, pk))
+
+
+def get_word(pk):
+  """Returns the serialized active word or None"""
+  return get_cache().get('word', pk, _loader(Word, WordSerializer, pk))
+
+
+def invalidate_language(sender, instance, **kwargs):
+  get_cache().invalidate('language', instance.pk)
+
+
+def invalidate_word(sender, instance, **kwargs):
+  get_cache().invalidate('word', instance.pk)
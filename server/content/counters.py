@@ -0,0 +1,153 @@
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from content.models import Language, Word
+from core.cache import get_cache
+from core.counting import ForeignKeyCounter, RelationCounter, register
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+WORD_COUNT = register(ForeignKeyCounter(Language, 'word_count', lambda: Word.objects.alive(), 'language'))
+SUBSCRIBER_COUNT = register(RelationCounter(Language, 'subscriber_count', 'subscribers'))
+
+
+def add_words(deltas):
+  """Adds {language pk: delta} to the word counts, call it in the transaction which changed the words"""
+  WORD_COUNT.add(deltas)
+  for pk, delta in deltas.items():
+    if delta:
+      get_cache().invalidate('language', pk)
+
+
+def count_word(word, before, update_fields=None):
+  """Moves a saved word between the word counts, before is the (language pk, active) it was counted as"""
+  if update_fields is not None and not {'active', 'language', 'language_id'} & set(update_fields):
+    return
+  after = (word.language_id, word.active)
+  if before is None:
+    # loaded without language or active, where it was counted is not known
+    WORD_COUNT.recount([word.language_id])
+    get_cache().invalidate('language', word.language_id)
+  else:
+    deltas = Counter()
+    if before[1]:
+      deltas[before[0]] -= 1
+    if after[1]:
+      deltas[after[0]] += 1
+    add_words(deltas)
+  word._counted_as = after
+
+
+def uncount_word(sender, instance, **kwargs):
+  """post_delete of words, a deleted active word leaves the word count of its language"""
+  language_id, active = instance.__dict__.get('_counted_as', (instance.language_id, instance.active))
+  if active:
+    add_words({language_id: -1})
+
+
+def subscribers_changed(sender, instance, action, reverse, pk_set, **kwargs):
+  """m2m_changed of language subscribers, from the language side or from the user side (reverse)"""
+  SUBSCRIBER_COUNT.changed(sender, instance, action, reverse, pk_set, **kwargs)
+  if not action.startswith('post_'):
+    return
+  if not reverse:
+    get_cache().invalidate('language', instance.pk)
+  elif pk_set is None:
+    get_cache().invalidate('language')
+  else:
+    for pk in pk_set:
+      get_cache().invalidate('language', pk)
+
+
+class PracticeBuffer:
+  """
+  Write-behind buffer for Word practice counters.
+  Increments are coalesced per word in memory and written in batches, either every flush_interval_ms by a
+  background thread (see start) or as soon as max_pending words are waiting.
+  Increments still buffered when the process dies are lost, so call stop on shutdown.
+  """
+
+  def __init__(self, flush_interval_ms=500, max_pending=10000, using=None):
+    if flush_interval_ms <= 0:
+      raise ValueError('flush interval must be positive')
+    if max_pending <= 0:
+      raise ValueError('max pending must be positive')
+    self.flush_interval = flush_interval_ms / 1000
+    self.max_pending = max_pending
+    self.using = using
+    self._pending = {}
+    self._lock = threading.Lock()
+    self._stopped = threading.Event()
+    self._thread = None
+
+  def add(self, word_id, successful):
+    """Buffers one practice of the given word"""
+    with self._lock:
+      practices, successful_practices = self._pending.get(word_id, (0, 0))
+      self._pending[word_id] = (practices + 1, successful_practices + (1 if successful else 0))
+      full = len(self._pending) >= self.max_pending
+    if full:
+      self.flush()
+
+  def __len__(self):
+    return len(self._pending)
+
+  def flush(self):
+    """Writes all buffered increments, one update per distinct increment instead of one per word"""
+    with self._lock:
+      pending, self._pending = self._pending, {}
+    if not pending:
+      return 0
+
+    groups = defaultdict(list)
+    for word_id, increments in pending.items():
+      groups[increments].append(word_id)
+    try:
+      with transaction.atomic(using=self.using):
+        for (practices, successful_practices), word_ids in groups.items():
+          Word.objects.db_manager(self.using).filter(pk__in=word_ids).update(
+              practices=F('practices') + practices,
+              successful_practices=F('successful_practices') + successful_practices)
+    except Exception:
+      self._restore(pending)
+      raise
+
+    return len(pending)
+
+  def _restore(self, pending):
+    """puts increments of a failed flush back so the next flush retries them"""
+    with self._lock:
+      for word_id, (practices, successful_practices) in pending.items():
+        current = self._pending.get(word_id, (0, 0))
+        self._pending[word_id] = (current[0] + practices, current[1] + successful_practices)
+
+  def start(self):
+    """Starts flushing in a background thread"""
+    if self._thread is not None:
+      raise ValueError('buffer is already started')
+    self._stopped.clear()
+    self._thread = threading.Thread(target=self._run, name='practice-buffer', daemon=True)
+    self._thread.start()
+
+    return self
+
+  def stop(self):
+    """Stops the background thread and writes what is left"""
+    if self._thread is not None:
+      self._stopped.set()
+      self._thread.join()
+      self._thread = None
+    self.flush()
+
+  def _run(self):
+    while not self._stopped.wait(self.flush_interval):
+      try:
+        self.flush()
+      except Exception:
+        # the increments were restored and are retried on the next tick
+        logger.exception('flushing practice counters failed')
+      finally:
+        close_old_connections()
@@ -0,0 +1,27 @@
+from content.models import Language
+from content.synonyms import rebuild_groups
+from core.pagination import iterate
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+  """Django command to recompute the synonym groups of words from their synonym links"""
+
+  help = 'Recomputes the synonym groups of all languages or of the given ones'
+
+  def add_arguments(self, parser):
+    parser.add_argument('languages', nargs='*', help='names of the languages to rebuild, all if omitted')
+
+  def handle(self, *args, **options):
+    languages = Language.objects.all()
+    if options['languages']:
+      languages = languages.filter(name__in=options['languages'])
+      missing = set(options['languages']) - set(languages.values_list('name', flat=True))
+      if missing:
+        raise CommandError(f"unknown languages: {', '.join(sorted(missing))}")
+
+    for language in iterate(languages):
+      groups = rebuild_groups(language)
+      self.stdout.write(f'{language.name}: {groups} synonym groups')
+
+    self.stdout.write(self.style.SUCCESS('Synonym groups rebuilt!'))
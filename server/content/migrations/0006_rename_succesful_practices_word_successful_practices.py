@@ -0,0 +1,18 @@
+# Generated by Django 4.0.2 on 2026-10-18 09:12
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0005_remove_word_context_delete_wordcontext'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='word',
+            old_name='succesful_practices',
+            new_name='successful_practices',
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.0.2 on 2026-10-18 07:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0006_rename_succesful_practices_word_successful_practices'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='language',
+            name='synonym_group_seq',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='word',
+            name='synonym_group',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='word',
+            index=models.Index(fields=['language', 'synonym_group'], name='content_word_synonym_idx'),
+        ),
+    ]
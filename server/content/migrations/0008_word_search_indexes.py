@@ -0,0 +1,41 @@
+# Generated by Django 4.0.2 on 2026-10-18 10:02
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# The expressions match the SQL Django generates for the lookups in content.search, otherwise the planner would
+# not use the indexes. They only exist on PostgreSQL, the search falls back to Python elsewhere.
+INDEXES = {
+    'content_word_prefix_idx':
+        'ON content_word (language_id, UPPER(name::text) text_pattern_ops) WHERE active',
+    'content_word_name_trgm_idx':
+        'ON content_word USING gin (name gin_trgm_ops)',
+    'content_word_description_fts_idx':
+        "ON content_word USING gin (to_tsvector('simple'::regconfig, COALESCE(description, '')))",
+}
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, definition in INDEXES.items():
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} {definition}')
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0007_synonym_groups'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.0.2 on 2026-10-18 07:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0008_word_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='language',
+            index=models.Index(fields=['updated_at', 'id'], name='content_language_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='word',
+            index=models.Index(fields=['updated_at', 'id'], name='content_word_sync_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.0.2 on 2026-10-18 07:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0009_sync_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='word',
+            index=models.Index(condition=models.Q(('active', True)), fields=['language', 'name'], name='content_word_alive_idx'),
+        ),
+    ]
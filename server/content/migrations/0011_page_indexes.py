@@ -0,0 +1,21 @@
+# Generated by Django 4.0.2 on 2026-10-18 07:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0010_alive_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='language',
+            index=models.Index(fields=['created_at', 'id'], name='content_language_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='word',
+            index=models.Index(condition=models.Q(('active', True)), fields=['language', 'created_at', 'id'], name='content_word_page_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.0.2 on 2026-10-18 07:25
+
+import core.uuids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0011_page_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='language',
+            name='id',
+            field=models.UUIDField(default=core.uuids.generate_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='word',
+            name='id',
+            field=models.UUIDField(default=core.uuids.generate_id, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
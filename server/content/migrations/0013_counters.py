@@ -0,0 +1,38 @@
+# Generated by Django 4.0.2 on 2026-10-18 07:29
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count(queryset, field):
+    return Coalesce(Subquery(queryset.filter(**{field: OuterRef('pk')}).order_by().values(field)
+                             .annotate(count=Count('pk')).values('count')), 0)
+
+
+def fill_counters(apps, schema_editor):
+    Language = apps.get_model('content', 'Language')
+    Word = apps.get_model('content', 'Word')
+    Language.objects.update(word_count=count(Word.objects.filter(active=True), 'language'),
+                            subscriber_count=count(Language.subscribers.through.objects.all(), 'language'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0012_time_ordered_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='language',
+            name='subscriber_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='language',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.0.2 on 2026-10-18 08:19
+
+from django.db import migrations, models
+import django.db.models.expressions
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0013_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='word',
+            index=models.Index(django.db.models.expressions.F('language'), django.db.models.functions.text.Length('name'), django.db.models.expressions.F('name'), condition=models.Q(('active', True)), name='content_word_completion_idx'),
+        ),
+    ]
@@ -1,6 +1,10 @@
-from core.models import (BaseEntity, BaseEntityManager, User, asure_boolean,
-                         asure_string, asure_user)
-from django.db import models
+from collections import Counter
+
+from core.models import (BaseEntity, BaseEntityManager, BaseEntityQuerySet,
+                         User, asure_boolean, asure_string, asure_user)
+from django.db import models, router, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Length
 
 ###############################################################################
 #                               validators                                    #
@@ -81,7 +85,21 @@ class LanguageManager(BaseEntityManager):
     return language
 
 
-class WordManager(BaseEntityManager):
+class WordQuerySet(BaseEntityQuerySet):
+  """Word queryset"""
+
+  def soft_delete(self):
+    """Soft deletes the words and takes them off the word counts of their languages in the same transaction"""
+    from content.counters import add_words
+    with transaction.atomic(using=self.db):
+      languages = Counter(self.alive().select_for_update().values_list('language_id', flat=True))
+      count = super().soft_delete()
+      add_words({language_id: -words for language_id, words in languages.items()})
+
+    return count
+
+
+class WordManager(BaseEntityManager.from_queryset(WordQuerySet)):
   """Word manager"""
 
   def create_word(self, name=None, language=None, description=None, author=None, official=None, **kwargs):
@@ -101,6 +119,7 @@ class WordManager(BaseEntityManager):
   def create_word_with_synonyms(self, name=None, language=None, description=None, synonyms=None, author=None,
                                 official=None, category=None, **kwargs):
     """Creates and saves a new word with synonyms"""
+    from content.synonyms import merge_pairs
 
     asure_string(name, 1)
     asure_language(language)
@@ -116,9 +135,67 @@ class WordManager(BaseEntityManager):
     for synonym in synonyms:
       word.synonyms.add(synonym)
     word.save(using=self._db)
+    merge_pairs([(word, synonym) for synonym in synonyms])
 
     return word
 
+  def bulk_create_words(self, words=None, batch_size=1000):
+    """Validates and saves many unsaved words with one insert per batch"""
+
+    if not isinstance(words, list):
+      raise ValueError('words is not a list')
+    for word in words:
+      if not isinstance(word, Word):
+        raise ValueError('word is not a Word')
+      asure_string(word.name, 1)
+      asure_language(word.language)
+      asure_string(word.description)
+      asure_user(word.author, "user")
+      asure_boolean(word.official)
+
+    from content.counters import add_words
+    with transaction.atomic(using=self.db):
+      words = self.bulk_create(words, batch_size=batch_size)
+      add_words(Counter(word.language_id for word in words if word.active))
+    for word in words:
+      word._counted_as = (word.language_id, word.active)
+
+    return words
+
+  def bulk_add_synonyms(self, pairs=None, batch_size=1000):
+    """Links many (word, synonym) pairs of the same language with batched inserts into the through table"""
+    from content.synonyms import merge_pairs
+
+    if not isinstance(pairs, list):
+      raise ValueError('pairs is not a list')
+    through = self.model.synonyms.through
+    rows = []
+    for word, synonym in pairs:
+      asure_word(word)
+      asure_word(synonym)
+      if word.language_id != synonym.language_id:
+        raise ValueError('synonym is not in the language of the word')
+      if word.pk == synonym.pk:
+        continue
+      # the relation is symmetrical, so both directions have to be stored
+      rows.append(through(from_word_id=word.pk, to_word_id=synonym.pk))
+      rows.append(through(from_word_id=synonym.pk, to_word_id=word.pk))
+    through.objects.using(self._db).bulk_create(rows, batch_size=batch_size, ignore_conflicts=True)
+    merge_pairs(pairs)
+
+    return len(rows) // 2
+
+  def add_practices(self, pk=None, practices=0, successful_practices=0):
+    """Increments the practice counters of a word with a single atomic update"""
+
+    # counters are statistics and not content, so updated_at is deliberately left untouched
+    return self.filter(pk=pk).update(practices=F('practices') + practices,
+                                     successful_practices=F('successful_practices') + successful_practices)
+
+  def bulk_add_practices(self, increments=None):
+    """Increments the practice counters of many words, {pk: (practices, successful_practices)}, with a single update"""
+    return self.bulk_increment(('practices', 'successful_practices'), increments)
+
 
 ###############################################################################
 #                           Models                                            #
@@ -130,9 +207,20 @@ class Language(BaseEntity):
   author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='composed_languages')
   subscribers = models.ManyToManyField(User, related_name='subscribed_languages')
   official = models.BooleanField(default=False)
+  synonym_group_seq = models.PositiveIntegerField(default=0)   # last synonym group id handed out
+  word_count = models.PositiveIntegerField(default=0)   # active words, see content.counters
+  subscriber_count = models.PositiveIntegerField(default=0)
 
   objects = LanguageManager()
 
+  COUNTER_FIELDS = ('synonym_group_seq', 'word_count', 'subscriber_count')
+
+  class Meta:
+    indexes = [
+        models.Index(fields=['updated_at', 'id'], name='content_language_sync_idx'),
+        models.Index(fields=['created_at', 'id'], name='content_language_page_idx'),
+    ]
+
   def add_subscriber(self, user):
     """Add a subscriber to the language"""
     if not isinstance(user, User):
@@ -142,6 +230,9 @@ class Language(BaseEntity):
   def __eq__(self, other):
     return self.name == other.name and self.id == other.id and self.active == other.active
 
+  # defining __eq__ drops the inherited hash, deleting needs it to collect instances
+  __hash__ = BaseEntity.__hash__
+
   def __str__(self):
     return f"language object {self.name} active: {self.active}"
 
@@ -157,34 +248,84 @@ class Word(BaseEntity):
   type = models.CharField(max_length=511, blank=True)   # adj, noun, verb, ...
   gender = models.CharField(max_length=1, blank=True)   # only aplicable if noun
   practices = models.IntegerField(default=0)
-  succesful_practices = models.IntegerField(default=0)
+  successful_practices = models.IntegerField(default=0)
+  synonym_group = models.PositiveIntegerField(blank=True, null=True)   # see content.synonyms
 
   objects = WordManager()
 
+  # synonym groups are only written by content.synonyms, a stale instance must not undo merges of other words
+  COUNTER_FIELDS = ('practices', 'successful_practices', 'synonym_group')
+
+  class Meta:
+    indexes = [
+        models.Index(fields=['language', 'synonym_group'], name='content_word_synonym_idx'),
+        models.Index(fields=['updated_at', 'id'], name='content_word_sync_idx'),
+        models.Index(fields=['language', 'name'], name='content_word_alive_idx', condition=Q(active=True)),
+        models.Index(fields=['language', 'created_at', 'id'], name='content_word_page_idx', condition=Q(active=True)),
+        # completions in the order of WordSearch.prefix, so short prefixes stop after the limit instead of sorting
+        models.Index(F('language'), Length('name'), F('name'), name='content_word_completion_idx',
+                     condition=Q(active=True)),
+    ]
+
+  @classmethod
+  def from_db(cls, db, field_names, values):
+    word = super().from_db(db, field_names, values)
+    if 'language_id' in word.__dict__ and 'active' in word.__dict__:
+      word._counted_as = (word.language_id, word.active)
+    return word
+
+  def save(self, *args, **kwargs):
+    """Saves the word and moves it between the word counts of languages in the same transaction"""
+    from content.counters import count_word
+    before = (None, False) if self._state.adding else self.__dict__.get('_counted_as')
+    with transaction.atomic(using=kwargs.get('using') or router.db_for_write(Word, instance=self)):
+      super().save(*args, **kwargs)
+      count_word(self, before, kwargs.get('update_fields'))
+
   def add_synonym(self, word):
     """Adds a synonym to this word"""
+    from content.synonyms import merge_pairs
     if not isinstance(word, Word):
       raise ValueError('The given word must be a Word object')
     self.synonyms.add(word)
     self.save()
+    merge_pairs([(self, word)])
 
     return self
 
   def remove_synonym(self, word):
     """Removes a synonym from this word"""
+    from content.synonyms import split_group
     if not isinstance(word, Word):
       raise ValueError('The given word must be a Word object')
     self.synonyms.remove(word)
     self.save()
+    for item in (self, word):
+      item.refresh_from_db(fields=['synonym_group'])
+    split_group(self, word)
 
     return self
 
-  def add_practice(self, successful):
-    """Adds a practice to this word"""
+  def is_synonym(self, word):
+    """Returns whether the given word is this word or one of its direct or indirect synonyms"""
+    if self.pk == word.pk:
+      return True
+    return (self.synonym_group is not None and self.synonym_group == word.synonym_group and
+            self.language_id == word.language_id)
+
+  def add_practice(self, successful, buffer=None):
+    """
+    Adds a practice to this word.
+    The counters are incremented in the database instead of saving the whole row, so concurrent practices are
+    never lost. With a PracticeBuffer the increment is written later together with others.
+    """
+    successful = 1 if successful else 0
+    if buffer is not None:
+      buffer.add(self.pk, successful)
+    else:
+      Word.objects.add_practices(self.pk, 1, successful)
     self.practices += 1
-    if successful:
-      self.successful_practices += 1
-    self.save()
+    self.successful_practices += successful
 
     return self
 
@@ -206,5 +347,8 @@ class Word(BaseEntity):
             self.language == other.language and self.description == other.description and
             self.synonyms == other.synonyms)
 
+  # defining __eq__ drops the inherited hash, deleting needs it to collect instances
+  __hash__ = BaseEntity.__hash__
+
   def __str__(self):
     return f"word object {self.name} active: {self.active} language: {self.language}"
@@ -0,0 +1,122 @@
+"""
+Ranked word search per language.
+On PostgreSQL the queries are served by the trigram, pattern and full text indexes of migration 0008, other
+databases (like the SQLite test database) fall back to ranking in Python.
+"""
+import re
+
+from content.models import Word, asure_language
+from core.models import asure_string
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+from django.db import connections, router
+from django.db.models.functions import Length
+
+SEARCH_CONFIG = 'simple'   # words of all languages are searched, so no language specific stemming
+SIMILARITY_THRESHOLD = 0.3
+
+
+def trigrams(text):
+  """Returns the trigrams of a text the way pg_trgm extracts them"""
+  result = set()
+  for word in re.findall(r'\w+', text.lower()):
+    padded = f'  {word} '
+    result.update(padded[index:index + 3] for index in range(len(padded) - 2))
+  return result
+
+
+def similarity(first, second):
+  """Returns the trigram similarity of two texts, like pg_trgm's similarity function"""
+  first, second = trigrams(first), trigrams(second)
+  if not first or not second:
+    return 0.0
+  return len(first & second) / len(first | second)
+
+
+class WordSearch:
+  """Base class of the word search backends"""
+
+  def __init__(self, using=None):
+    self.using = using
+
+  def words(self, language):
+    asure_language(language)
+    return Word.objects.db_manager(self.using).alive().filter(language=language)
+
+  def prefix(self, language, prefix, limit=10):
+    """
+    Returns the words starting with prefix, shortest first, for autocompletion.
+    Short prefixes match most words of a language, content_word_completion_idx lists them in this order, so the
+    query reads the index until it found limit matches. Long prefixes match few words, which are found with
+    content_word_prefix_idx and sorted.
+    """
+    asure_string(prefix)
+    return list(self.completions(language, prefix)[:limit])
+
+  def completions(self, language, prefix):
+    """Returns the query of prefix, unlimited"""
+    return self.words(language).filter(name__istartswith=prefix).order_by(Length('name'), 'name')
+
+  def fuzzy(self, language, term, limit=10):
+    """Returns the words most similar to term, tolerating typos"""
+    raise NotImplementedError
+
+  def description(self, language, text, limit=10):
+    """Returns the words whose description matches the text best"""
+    raise NotImplementedError
+
+
+class PostgresWordSearch(WordSearch):
+  """Search backed by pg_trgm and full text search indexes"""
+
+  def fuzzy(self, language, term, limit=10):
+    asure_string(term)
+    return list(self.words(language)
+                .filter(name__trigram_similar=term)
+                .annotate(similarity=TrigramSimilarity('name', term))
+                .order_by('-similarity', 'name')[:limit])
+
+  def description(self, language, text, limit=10):
+    asure_string(text)
+    vector = SearchVector('description', config=SEARCH_CONFIG)
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+    return list(self.words(language)
+                .annotate(search=vector)
+                .filter(search=query)
+                .annotate(rank=SearchRank(vector, query))
+                .order_by('-rank', 'name')[:limit])
+
+
+class PythonWordSearch(WordSearch):
+  """Search which ranks in Python, for databases without trigram and full text support"""
+
+  def fuzzy(self, language, term, limit=10):
+    asure_string(term)
+    ranked = []
+    for word in self.words(language).iterator():
+      word.similarity = similarity(term, word.name)
+      if word.similarity > SIMILARITY_THRESHOLD:
+        ranked.append(word)
+    ranked.sort(key=lambda word: (-word.similarity, word.name))
+    return ranked[:limit]
+
+  def description(self, language, text, limit=10):
+    asure_string(text)
+    terms = text.lower().split()
+    if not terms:
+      return []
+    ranked = []
+    for word in self.words(language).filter(description__icontains=terms[0]).iterator():
+      description = word.description.lower()
+      if all(term in description for term in terms):
+        word.rank = sum(description.count(term) for term in terms) / len(description.split())
+        ranked.append(word)
+    ranked.sort(key=lambda word: (-word.rank, word.name))
+    return ranked[:limit]
+
+
+def get_word_search(using=None):
+  """Returns the search backend matching the database words are read from"""
+  using = using or router.db_for_read(Word)
+  if connections[using].vendor == 'postgresql':
+    return PostgresWordSearch(using)
+  return PythonWordSearch(using)
@@ -0,0 +1,21 @@
+from content.models import Language, Word
+from rest_framework import serializers
+
+
+class LanguageSerializer(serializers.ModelSerializer):
+  """Serializes a language"""
+
+  class Meta:
+    model = Language
+    fields = ['id', 'name', 'author', 'official', 'word_count', 'subscriber_count', 'active', 'created_at',
+              'updated_at']
+    read_only_fields = ['word_count', 'subscriber_count']
+
+
+class WordSerializer(serializers.ModelSerializer):
+  """Serializes the content of a word, practice counters are left out as they change all the time"""
+
+  class Meta:
+    model = Word
+    fields = ['id', 'name', 'language', 'description', 'author', 'official', 'type', 'gender', 'active',
+              'created_at', 'updated_at']
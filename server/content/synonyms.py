@@ -0,0 +1,146 @@
+"""
+Synonym groups are the connected components of the synonym graph of a language.
+Every word with at least one synonym carries the id of its component in Word.synonym_group, so checking whether
+two words are synonyms of each other, directly or through other synonyms, is a comparison instead of a graph walk.
+Words without synonyms have no group.
+"""
+from content.models import Language, Word
+from django.db import transaction
+from django.db.models import F
+
+
+class UnionFind:
+  """Disjoint sets with path halving and union by size"""
+
+  def __init__(self):
+    self.parents = {}
+    self.sizes = {}
+
+  def add(self, item):
+    if item not in self.parents:
+      self.parents[item] = item
+      self.sizes[item] = 1
+
+  def find(self, item):
+    self.add(item)
+    while self.parents[item] != item:
+      self.parents[item] = self.parents[self.parents[item]]
+      item = self.parents[item]
+    return item
+
+  def union(self, first, second):
+    first, second = self.find(first), self.find(second)
+    if first == second:
+      return first
+    if self.sizes[first] < self.sizes[second]:
+      first, second = second, first
+    self.parents[second] = first
+    self.sizes[first] += self.sizes[second]
+    return first
+
+  def components(self):
+    """Returns the sets as lists, largest first"""
+    components = {}
+    for item in self.parents:
+      components.setdefault(self.find(item), []).append(item)
+    return sorted(components.values(), key=len, reverse=True)
+
+
+def allocate_groups(language_id, count):
+  """Reserves count new group ids of the language, must run inside a transaction"""
+  Language.objects.filter(pk=language_id).update(synonym_group_seq=F('synonym_group_seq') + count)
+  last = Language.objects.filter(pk=language_id).values_list('synonym_group_seq', flat=True).get()
+  return list(range(last - count + 1, last + 1))
+
+
+@transaction.atomic
+def merge_pairs(pairs):
+  """
+  Merges the groups of the given (word, synonym) pairs.
+  Pairs of words in different languages are ignored, groups never span languages.
+  """
+  pairs = [(word, synonym) for word, synonym in pairs if word.language_id == synonym.language_id]
+  if not pairs:
+    return
+
+  ids = {word.pk for pair in pairs for word in pair}
+  current = {pk: (language_id, group) for pk, language_id, group in
+             Word.objects.filter(pk__in=ids).values_list('pk', 'language_id', 'synonym_group')}
+
+  def node(pk):
+    language_id, group = current[pk]
+    return ('group', language_id, group) if group is not None else ('word', language_id, pk)
+
+  sets = UnionFind()
+  for word, synonym in pairs:
+    sets.union(node(word.pk), node(synonym.pk))
+
+  targets = {}
+  for component in sets.components():
+    language_id = component[0][1]
+    groups = sorted(group for kind, _, group in component if kind == 'group')
+    target = groups[0] if groups else allocate_groups(language_id, 1)[0]
+    if groups[1:]:
+      Word.objects.filter(language_id=language_id, synonym_group__in=groups[1:]).update(synonym_group=target)
+    loose = [pk for kind, _, pk in component if kind == 'word']
+    if loose:
+      Word.objects.filter(pk__in=loose).update(synonym_group=target)
+    for item in component:
+      targets[item] = target
+
+  for pair in pairs:
+    for word in pair:
+      word.synonym_group = targets[sets.find(node(word.pk))]
+
+
+def _assign(language_id, components, keep=None):
+  """gives every component with more than one word its own group, the largest may keep an existing group"""
+  words = []
+  components = [component for component in components if len(component) > 1]
+  if keep is not None and components:
+    words.extend(Word(pk=pk, synonym_group=keep) for pk in components.pop(0))
+  groups = allocate_groups(language_id, len(components)) if components else []
+  for group, component in zip(groups, components):
+    words.extend(Word(pk=pk, synonym_group=group) for pk in component)
+  Word.objects.bulk_update(words, ['synonym_group'], batch_size=1000)
+
+
+@transaction.atomic
+def split_group(word, synonym):
+  """Recomputes the group of two words after the synonym link between them was removed"""
+  if word.synonym_group is None or word.synonym_group != synonym.synonym_group:
+    return
+  language_id, group = word.language_id, word.synonym_group
+  ids = list(Word.objects.filter(language_id=language_id, synonym_group=group).values_list('pk', flat=True))
+  edges = Word.synonyms.through.objects.filter(from_word_id__in=ids, to_word_id__in=ids)
+
+  sets = UnionFind()
+  for pk in ids:
+    sets.add(pk)
+  for from_id, to_id in edges.values_list('from_word_id', 'to_word_id').iterator():
+    sets.union(from_id, to_id)
+  components = sets.components()
+  if len(components) == 1:
+    return
+
+  Word.objects.filter(pk__in=[pk for component in components if len(component) == 1 for pk in component]) \
+      .update(synonym_group=None)
+  _assign(language_id, components, keep=group)
+  for item in (word, synonym):
+    item.refresh_from_db(fields=['synonym_group'])
+
+
+@transaction.atomic
+def rebuild_groups(language):
+  """Recomputes all groups of a language from the synonym links, returns the number of groups"""
+  sets = UnionFind()
+  edges = Word.synonyms.through.objects.filter(from_word__language=language, to_word__language=language)
+  for from_id, to_id in edges.values_list('from_word_id', 'to_word_id').iterator():
+    sets.union(from_id, to_id)
+  components = sets.components()
+
+  Word.objects.filter(language=language).exclude(synonym_group=None).update(synonym_group=None)
+  Language.objects.filter(pk=language.pk).update(synonym_group_seq=0)
+  _assign(language.pk, components)
+
+  return len(components)
@@ -0,0 +1,180 @@
+from io import StringIO
+
+from content.counters import WORD_COUNT, PracticeBuffer
+from content.models import Language, Word
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+
+class PracticeCounterTests(TestCase):
+
+  def setUp(self):
+    self.user = get_user_model().objects.create_superuser(
+        name='testsuperuser',
+        password='testsuperuser',
+    )
+    self.language = Language.objects.create_language(
+        name='English',
+        author=self.user,
+        official=True,
+    )
+    self.word = Word.objects.create_word(
+        language=self.language,
+        description='test description',
+        name='test',
+        author=self.user,
+        official=True,
+    )
+
+  def test_add_practice_successful(self):
+    """Test adding practices increments the counters in the database"""
+    self.word.add_practice(True)
+    self.word.add_practice(False)
+
+    self.assertEqual(self.word.practices, 2)
+    self.assertEqual(self.word.successful_practices, 1)
+    self.word.refresh_from_db()
+    self.assertEqual(self.word.practices, 2)
+    self.assertEqual(self.word.successful_practices, 1)
+
+  def test_add_practice_does_not_lose_concurrent_updates(self):
+    """Test practices on stale copies of a word are all counted"""
+    stale = Word.objects.get(pk=self.word.pk)
+    self.word.add_practice(True)
+    stale.add_practice(True)
+
+    self.word.refresh_from_db()
+    self.assertEqual(self.word.practices, 2)
+    self.assertEqual(self.word.successful_practices, 2)
+
+  def test_add_practice_is_a_single_update(self):
+    """Test adding a practice issues exactly one query"""
+    with self.assertNumQueries(1):
+      self.word.add_practice(True)
+
+  def test_buffered_practices_are_coalesced(self):
+    """Test buffered practices are written on flush"""
+    other = Word.objects.create_word(
+        language=self.language,
+        description='other description',
+        name='other',
+        author=self.user,
+        official=True,
+    )
+    buffer = PracticeBuffer(flush_interval_ms=1000)
+    for _ in range(3):
+      self.word.add_practice(True, buffer=buffer)
+    other.add_practice(False, buffer=buffer)
+
+    self.assertEqual(len(buffer), 2)
+    self.assertEqual(Word.objects.get(pk=self.word.pk).practices, 0)
+    self.assertEqual(buffer.flush(), 2)
+    self.assertEqual(len(buffer), 0)
+
+    self.word.refresh_from_db()
+    other.refresh_from_db()
+    self.assertEqual(self.word.practices, 3)
+    self.assertEqual(self.word.successful_practices, 3)
+    self.assertEqual(other.practices, 1)
+    self.assertEqual(other.successful_practices, 0)
+
+  def test_buffer_flushes_when_full(self):
+    """Test the buffer flushes on its own once max_pending words are waiting"""
+    buffer = PracticeBuffer(max_pending=1)
+    self.word.add_practice(True, buffer=buffer)
+
+    self.assertEqual(len(buffer), 0)
+    self.assertEqual(Word.objects.get(pk=self.word.pk).practices, 1)
+
+
+class LanguageCounterTests(TestCase):
+
+  def setUp(self):
+    self.user = get_user_model().objects.create_superuser(
+        name='testsuperuser',
+        password='testsuperuser',
+    )
+    self.english = Language.objects.create_language(name='English', author=self.user, official=True)
+    self.spanish = Language.objects.create_language(name='Spanish', author=self.user, official=True)
+
+  def create_word(self, name, language=None):
+    return Word.objects.create_word(name=name, language=language or self.english, description='test description',
+                                    author=self.user, official=True)
+
+  def word_counts(self):
+    return tuple(Language.objects.filter(pk=language.pk).values_list('word_count', flat=True).get()
+                 for language in (self.english, self.spanish))
+
+  def test_creating_and_deleting_words(self):
+    """Test word counts follow created, soft deleted, restored and deleted words"""
+    house = self.create_word('house')
+    self.create_word('car')
+    Word.objects.bulk_create_words([Word(name='casa', language=self.spanish, description='a house', author=self.user,
+                                         official=True)])
+    self.assertEqual(self.word_counts(), (2, 1))
+
+    house.soft_delete()
+    self.assertEqual(self.word_counts(), (1, 1))
+    house.active = True
+    house.save()
+    self.assertEqual(self.word_counts(), (2, 1))
+
+    Word.objects.filter(name__in=['house', 'casa']).soft_delete()
+    self.assertEqual(self.word_counts(), (1, 0))
+    Word.objects.get(name='car').delete()
+    Word.objects.get(name='house').delete()
+    self.assertEqual(self.word_counts(), (0, 0))
+
+  def test_moving_a_word(self):
+    """Test a word saved with another language moves between the counts"""
+    word = Word.objects.get(pk=self.create_word('house').pk)
+    word.language = self.spanish
+    word.save()
+    self.assertEqual(self.word_counts(), (0, 1))
+
+    word.description = 'changed'
+    word.save(update_fields=['description'])
+    self.assertEqual(self.word_counts(), (0, 1))
+
+  def test_stale_save_keeps_counters(self):
+    """Test saving an instance loaded before a counter changed does not write the old count back"""
+    stale = Language.objects.get(pk=self.english.pk)
+    self.create_word('house')
+    stale.name = 'British English'
+    stale.save()
+
+    language = Language.objects.get(pk=self.english.pk)
+    self.assertEqual(language.name, 'British English')
+    self.assertEqual(language.word_count, 1)
+
+  def test_subscribers(self):
+    """Test subscriber counts follow links changed from both sides"""
+    other = get_user_model().objects.create_user(name='otheruser', password='otherpassword')
+    self.english.add_subscriber(self.user)
+    other.subscribed_languages.add(self.english, self.spanish)
+    self.english.refresh_from_db()
+    self.assertEqual(self.english.subscriber_count, 2)
+
+    self.english.subscribers.remove(self.user, self.user)
+    other.subscribed_languages.remove(self.spanish)
+    self.assertEqual(list(Language.objects.order_by('name').values_list('subscriber_count', flat=True)), [1, 0])
+
+    other.subscribed_languages.clear()
+    self.english.refresh_from_db()
+    self.assertEqual(self.english.subscriber_count, 0)
+
+  def test_recount(self):
+    """Test the recount command repairs drifted counters"""
+    self.create_word('house')
+    self.english.add_subscriber(self.user)
+    Language.objects.update(word_count=5, subscriber_count=0)
+    self.assertEqual(WORD_COUNT.recount([self.english.pk, self.spanish.pk]), 2)
+
+    Language.objects.update(word_count=5, subscriber_count=0)
+    out = StringIO()
+    call_command('recount', 'content.language.word_count', 'content.language.subscriber_count', batch_size=1,
+                 stdout=out)
+    self.assertIn('content.language.word_count: 2 counters fixed', out.getvalue())
+    self.english.refresh_from_db()
+    self.assertEqual((self.english.word_count, self.english.subscriber_count), (1, 1))
@@ -1,6 +1,8 @@
 from content.models import Language, Word  # , WordContext
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 
 class LanguageTests(TestCase):
@@ -125,6 +127,33 @@ class WordTests(TestCase):
           author=self.user,
       )
 
+  def create_words(self, *names):
+    return [Word.objects.create_word(language=self.language, description='test description', name=name,
+                                     author=self.user, official=True) for name in names]
+
+  def test_alive_and_dead(self):
+    """Test alive and dead split words by their active flag"""
+    self.create_words('house', 'car')[1].soft_delete()
+
+    self.assertEqual(list(Word.objects.alive().values_list('name', flat=True)), ['house'])
+    self.assertEqual(list(Word.objects.dead().values_list('name', flat=True)), ['car'])
+    self.assertEqual(Word.objects.count(), 2)
+
+  def test_bulk_soft_delete(self):
+    """Test soft deleting a queryset is a single update of the words which moves updated_at"""
+    words = self.create_words('house', 'car', 'tree')
+    before = words[0].updated_at
+
+    with CaptureQueriesContext(connection) as queries:
+      count = Word.objects.filter(name__in=['house', 'car']).soft_delete()
+    updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE "content_word"')]
+
+    self.assertEqual(len(updates), 1)
+    self.assertEqual(count, 2)
+    self.assertEqual(Word.objects.alive().get().name, 'tree')
+    self.assertGreater(Word.objects.get(name='house').updated_at, before)
+    self.assertEqual(Word.objects.all().soft_delete(), 1)
+
 
 # class WordContextTests(TestCase):
 #   def setUp(self):
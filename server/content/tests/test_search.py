@@ -0,0 +1,88 @@
+from unittest import skipUnless
+
+from content.models import Language, Word
+from content.search import PythonWordSearch, get_word_search, similarity, trigrams
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+
+class WordSearchTests(TestCase):
+
+  def setUp(self):
+    self.user = get_user_model().objects.create_superuser(
+        name='testsuperuser',
+        password='testsuperuser',
+    )
+    self.language = Language.objects.create_language(
+        name='English',
+        author=self.user,
+        official=True,
+    )
+    self.other_language = Language.objects.create_language(
+        name='German',
+        author=self.user,
+        official=True,
+    )
+    words = [
+        ('house', 'a building people live in'),
+        ('household', 'the people living in a house'),
+        ('horse', 'an animal people ride'),
+        ('mouse', 'a small animal'),
+    ]
+    for name, description in words:
+      Word.objects.create_word(name=name, language=self.language, description=description, author=self.user,
+                               official=True)
+    Word.objects.create_word(name='hous', language=self.other_language, description='a building', author=self.user,
+                             official=True)
+    self.search = get_word_search()
+
+  def names(self, words):
+    return [word.name for word in words]
+
+  def test_fallback_backend_on_sqlite(self):
+    """Test the python backend is used on databases without trigram support"""
+    self.assertIsInstance(self.search, PythonWordSearch)
+
+  def test_similarity(self):
+    """Test the python trigram similarity matches pg_trgm"""
+    self.assertEqual(trigrams('cat'), {'  c', ' ca', 'cat', 'at '})
+    self.assertEqual(similarity('house', 'house'), 1.0)
+    self.assertAlmostEqual(similarity('hause', 'house'), 3 / 9)
+
+  def test_prefix(self):
+    """Test prefix search returns the shortest completions first"""
+    self.assertEqual(self.names(self.search.prefix(self.language, 'HOU')), ['house', 'household'])
+    self.assertEqual(self.names(self.search.prefix(self.language, 'hou', limit=1)), ['house'])
+
+  def test_prefix_skips_inactive_words(self):
+    """Test soft deleted words are not found"""
+    Word.objects.get(name='house').soft_delete()
+    self.assertEqual(self.names(self.search.prefix(self.language, 'hou')), ['household'])
+
+  def test_fuzzy_tolerates_typos(self):
+    """Test fuzzy search ranks the closest words first and stays in the language"""
+    names = self.names(self.search.fuzzy(self.language, 'hause'))
+    self.assertEqual(names[0], 'house')
+    self.assertNotIn('hous', names)
+
+  def test_description(self):
+    """Test description search requires all terms and ranks by relevance"""
+    self.assertEqual(self.names(self.search.description(self.language, 'animal')), ['mouse', 'horse'])
+    self.assertEqual(self.names(self.search.description(self.language, 'people animal')), ['horse'])
+
+  def test_description_without_terms(self):
+    """Test a description of whitespace only finds nothing"""
+    self.assertEqual(self.search.description(self.language, '   '), [])
+
+  @skipUnless(connection.vendor == 'sqlite', 'the plan is read from the output of sqlite')
+  def test_prefix_query_uses_completion_index(self):
+    """Test the prefix query reads the completion index in order instead of sorting all matches"""
+    plan = self.search.completions(self.language, 'h').explain()
+    self.assertIn('content_word_completion_idx', plan)
+    self.assertNotIn('TEMP B-TREE', plan)
+
+  def test_search_without_term(self):
+    """Test searching without a term fails"""
+    with self.assertRaises(ValueError):
+      self.search.prefix(self.language, '')
@@ -0,0 +1,160 @@
+import io
+
+from content.models import Language, Word
+from content.synonyms import UnionFind, rebuild_groups
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+
+class UnionFindTests(SimpleTestCase):
+
+  def test_components(self):
+    """Test unions are transitive and components are returned largest first"""
+    sets = UnionFind()
+    sets.union(1, 2)
+    sets.union(3, 2)
+    sets.union(4, 5)
+    sets.add(6)
+
+    self.assertEqual(sets.find(1), sets.find(3))
+    self.assertNotEqual(sets.find(1), sets.find(4))
+    self.assertEqual([sorted(component) for component in sets.components()], [[1, 2, 3], [4, 5], [6]])
+
+
+class SynonymGroupTests(TestCase):
+
+  def setUp(self):
+    self.user = get_user_model().objects.create_superuser(
+        name='testsuperuser',
+        password='testsuperuser',
+    )
+    self.language = Language.objects.create_language(
+        name='English',
+        author=self.user,
+        official=True,
+    )
+    self.words = {name: self.create_word(name) for name in ('big', 'large', 'huge', 'small', 'tiny')}
+
+  def create_word(self, name, language=None):
+    return Word.objects.create_word(
+        language=language or self.language,
+        description=f'{name} description',
+        name=name,
+        author=self.user,
+        official=True,
+    )
+
+  def group(self, name):
+    return Word.objects.get(name=name).synonym_group
+
+  def test_words_without_synonyms_have_no_group(self):
+    """Test only words with synonyms get a group"""
+    self.assertIsNone(self.group('big'))
+    self.assertFalse(self.words['big'].is_synonym(self.words['large']))
+    self.assertTrue(self.words['big'].is_synonym(self.words['big']))
+
+  def test_add_synonym_merges_groups(self):
+    """Test synonyms of synonyms end up in the same group"""
+    self.words['big'].add_synonym(self.words['large'])
+    self.words['huge'].add_synonym(self.words['large'])
+
+    self.assertIsNotNone(self.group('big'))
+    self.assertEqual(self.group('big'), self.group('huge'))
+    self.assertTrue(self.words['huge'].is_synonym(self.words['big']))
+    self.assertIsNone(self.group('small'))
+
+  def test_add_synonym_joins_two_groups(self):
+    """Test linking two groups merges them into one"""
+    self.words['big'].add_synonym(self.words['large'])
+    self.words['small'].add_synonym(self.words['tiny'])
+    self.assertNotEqual(self.group('big'), self.group('small'))
+
+    self.words['large'].add_synonym(self.words['small'])
+    self.assertEqual(len({self.group(name) for name in ('big', 'large', 'small', 'tiny')}), 1)
+
+  def test_chain_of_merges_with_stale_words(self):
+    """Test words whose group was changed by other merges do not write their stale group back"""
+    words = {name: self.create_word(name) for name in 'abcde'}
+    words['a'].add_synonym(words['b'])
+    words['c'].add_synonym(words['d'])
+    words['b'].add_synonym(words['c'])
+    words['d'].add_synonym(words['e'])
+
+    self.assertEqual(len({self.group(name) for name in 'abcde'}), 1)
+    self.assertTrue(Word.objects.get(name='a').is_synonym(Word.objects.get(name='e')))
+
+    words['a'].remove_synonym(words['b'])
+    self.assertIsNone(self.group('a'))
+    self.assertEqual(len({self.group(name) for name in 'bcde'}), 1)
+
+  def test_remove_synonym_splits_group(self):
+    """Test removing the only link between two parts splits the group"""
+    self.words['big'].add_synonym(self.words['large'])
+    self.words['large'].add_synonym(self.words['huge'])
+    self.words['huge'].add_synonym(self.words['small'])
+    self.words['huge'].remove_synonym(self.words['small'])
+
+    self.assertEqual(self.group('big'), self.group('huge'))
+    self.assertIsNone(self.group('small'))
+    self.assertFalse(self.words['huge'].is_synonym(self.words['small']))
+
+  def test_remove_synonym_keeps_group_with_other_path(self):
+    """Test removing a link keeps the group while the words are still connected"""
+    self.words['big'].add_synonym(self.words['large'])
+    self.words['large'].add_synonym(self.words['huge'])
+    self.words['huge'].add_synonym(self.words['big'])
+    self.words['huge'].remove_synonym(self.words['big'])
+
+    self.assertEqual(self.group('big'), self.group('huge'))
+
+  def test_create_word_with_synonyms(self):
+    """Test words created with synonyms join their group"""
+    self.words['big'].add_synonym(self.words['large'])
+    word = Word.objects.create_word_with_synonyms(
+        language=self.language,
+        description='enormous description',
+        name='enormous',
+        synonyms=[self.words['huge'], self.words['large']],
+        author=self.user,
+        official=True,
+        category='adjectives',
+    )
+
+    self.assertEqual(word.synonym_group, self.group('big'))
+    self.assertEqual(self.group('huge'), self.group('big'))
+
+  def test_groups_do_not_span_languages(self):
+    """Test synonyms in another language do not share a group"""
+    german = Language.objects.create_language(name='German', author=self.user, official=True)
+    gross = self.create_word('gross', german)
+    self.words['big'].add_synonym(gross)
+
+    self.assertFalse(self.words['big'].is_synonym(gross))
+
+  def test_bulk_add_synonyms_in_other_language(self):
+    """Test bulk linking refuses synonyms of another language, like create_word_with_synonyms"""
+    german = Language.objects.create_language(name='German', author=self.user, official=True)
+    gross = self.create_word('gross', german)
+    with self.assertRaises(ValueError):
+      Word.objects.bulk_add_synonyms([(self.words['big'], gross)])
+    self.assertFalse(Word.synonyms.through.objects.filter(to_word=gross).exists())
+
+  def test_rebuild_groups(self):
+    """Test rebuilding recomputes groups from the synonym links"""
+    self.words['big'].add_synonym(self.words['large'])
+    self.words['small'].add_synonym(self.words['tiny'])
+    Word.objects.update(synonym_group=None)
+
+    self.assertEqual(rebuild_groups(self.language), 2)
+    self.assertEqual(self.group('big'), self.group('large'))
+    self.assertEqual(self.group('small'), self.group('tiny'))
+    self.assertNotEqual(self.group('big'), self.group('small'))
+    self.assertIsNone(self.group('huge'))
+
+  def test_rebuild_synonym_groups_command(self):
+    """Test the rebuild_synonym_groups management command"""
+    out = io.StringIO()
+    call_command('rebuild_synonym_groups', 'English', stdout=out)
+
+    self.assertIn('English: 0 synonym groups', out.getvalue())
@@ -0,0 +1,9 @@
+from content import views
+from django.urls import path
+
+app_name = 'content'
+
+urlpatterns = [
+    path('words/', views.words, name='words'),
+    path('words/<uuid:pk>/', views.word, name='word'),
+]
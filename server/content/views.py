@@ -0,0 +1,47 @@
+from content.caching import get_word
+from content.models import Language, Word
+from content.serializers import WordSerializer
+from core.api import api_view, database, get_limit, read_json
+from core.pagination import KeysetPaginator
+from django.db import transaction
+from django.http import JsonResponse
+
+
+def _list_words(language_id, limit, cursor):
+  if not language_id:
+    raise ValueError('language is not submitted')
+  language = Language.objects.alive().get(pk=language_id)
+  page = KeysetPaginator(Word.objects.alive().filter(language=language), limit=limit).page(cursor)
+  return {'results': WordSerializer(page.rows, many=True).data, 'next': page.next_cursor}
+
+
+def _create_word(user, data):
+  official = data.get('official', False)
+  if official and not user.is_staff:
+    raise ValueError('only staff members can create official words')
+  language = Language.objects.alive().get(pk=data.get('language'))
+  # a duplicate name only rolls back the savepoint, the view answers it with 409
+  with transaction.atomic():
+    word = Word.objects.create_word(name=data.get('name'), language=language, description=data.get('description'),
+                                    author=user, official=official, type=data.get('type', ''),
+                                    gender=data.get('gender', ''))
+  return WordSerializer(word).data
+
+
+@api_view(['GET', 'POST'], login_required=True)
+async def words(request):
+  """Lists the words of a language in the order they were created or creates a word"""
+  if request.method == 'POST':
+    data = await database(_create_word)(request.user, read_json(request))
+    return JsonResponse(data, status=201)
+  data = await database(_list_words)(request.GET.get('language'), get_limit(request), request.GET.get('cursor'))
+  return JsonResponse(data)
+
+
+@api_view(['GET'], login_required=True)
+async def word(request, pk):
+  """Returns a word, served from the read-through cache"""
+  data = await database(get_word)(pk)
+  if data is None:
+    raise Word.DoesNotExist
+  return JsonResponse(data)
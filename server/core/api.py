@@ -0,0 +1,101 @@
+"""
+Helpers for the async json api.
+The ORM of Django 4.0 is synchronous, so views await database work which runs in a thread pool. Each pool thread
+keeps its own connection, which is checked for age and errors before and after every call like request_started and
+request_finished do for synchronous views. The pool is the one of settings.DATABASE_POOL if it has a size, see
+core/connections.py.
+"""
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from core.connections import get_pool
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.db import IntegrityError, close_old_connections
+from django.http import HttpResponseNotAllowed, JsonResponse
+
+
+def _closing(function):
+  @wraps(function)
+  def wrapper(*args, **kwargs):
+    close_old_connections()
+    try:
+      return function(*args, **kwargs)
+    finally:
+      close_old_connections()
+  return wrapper
+
+
+def database(function):
+  """
+  Returns an awaitable version of a function which uses the database.
+  With API_THREAD_SENSITIVE all calls run in the main thread, which tests need to share their transaction.
+  """
+  if getattr(settings, 'API_THREAD_SENSITIVE', False):
+    return sync_to_async(function, thread_sensitive=True)
+  return sync_to_async(_closing(function), thread_sensitive=False, executor=get_pool())
+
+
+def _user(request):
+  return request.user if request.user.is_authenticated else None
+
+
+async def get_user(request):
+  """Returns the authenticated user of the request or None, loading the user from the session if needed"""
+  return await database(_user)(request)
+
+
+def read_json(request):
+  """Returns the json object sent in the body of the request"""
+  try:
+    data = json.loads(request.body or b'{}')
+  except ValueError:
+    raise ValueError('body is not valid json')
+  if not isinstance(data, dict):
+    raise ValueError('body is not a json object')
+  return data
+
+
+def detail(message, status):
+  return JsonResponse({'detail': message}, status=status)
+
+
+def api_view(methods, login_required=False, csrf_exempt=False):
+  """
+  Decorator of the async api views.
+  Answers other methods with 405, anonymous users of views with login_required with 401, invalid input with 400,
+  missing objects with 404 and writes violating a unique constraint with 409. csrf_exempt views skip the csrf check,
+  the decorator of Django 4.0 only wraps sync views.
+  """
+  def decorator(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+      if request.method not in methods:
+        return HttpResponseNotAllowed(methods)
+      if login_required and await get_user(request) is None:
+        return detail('authentication required', 401)
+      try:
+        return await view(request, *args, **kwargs)
+      except ObjectDoesNotExist:
+        return detail('not found', 404)
+      except ValueError as error:
+        return detail(str(error), 400)
+      except ValidationError as error:
+        return detail(' '.join(error.messages), 400)
+      except IntegrityError:
+        return detail('conflicts with an existing object', 409)
+    wrapper.csrf_exempt = csrf_exempt
+    return wrapper
+  return decorator
+
+
+def get_limit(request, default=50, maximum=500):
+  """Returns the limit query parameter, capped at maximum"""
+  try:
+    limit = int(request.GET.get('limit', default))
+  except ValueError:
+    raise ValueError('limit is not a number')
+  if limit < 1:
+    raise ValueError('limit must be positive')
+  return min(limit, maximum)
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from core.instrumentation import instrument
+        from core.leaderboard import record_rating
+        from core.signals import rating_changed
+        from django.db.backends.signals import connection_created
+
+        rating_changed.connect(record_rating, dispatch_uid='record_rating_on_leaderboards')
+        connection_created.connect(instrument, dispatch_uid='instrument_queries')
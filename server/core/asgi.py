@@ -0,0 +1,62 @@
+"""
+Streaming responses which use the database under ASGI.
+The ASGIHandler of Django 4.0 iterates streaming responses on the event loop, where the ORM refuses to run, so a
+generator which loads rows while it streams breaks off after its first query. ThreadedStreamingHttpResponse marks
+such responses, ASGIHandler advances their iterator in the thread sync views run in and sends the parts it returns.
+WSGI servers and the test client iterate them like any other streaming response.
+"""
+from asgiref.sync import sync_to_async
+from django.core.handlers import asgi
+from django.http import StreamingHttpResponse
+
+
+class ThreadedStreamingHttpResponse(StreamingHttpResponse):
+  """StreamingHttpResponse whose iterator may use the database"""
+
+  batch_size = 64 * 1024   # bytes collected per step of the iterator in the sync thread
+
+  def next_batch(self, iterator):
+    """returns the next parts up to batch_size bytes, an empty list once the iterator is exhausted"""
+    parts = []
+    size = 0
+    for part in iterator:
+      parts.append(part)
+      size += len(part)
+      if size >= self.batch_size:
+        break
+    return parts
+
+
+class ASGIHandler(asgi.ASGIHandler):
+  """ASGIHandler which iterates ThreadedStreamingHttpResponse in the sync thread"""
+
+  async def send_response(self, response, send):
+    if not isinstance(response, ThreadedStreamingHttpResponse):
+      return await super().send_response(response, send)
+
+    headers = []
+    for header, value in response.items():
+      headers.append((header.encode('ascii') if isinstance(header, str) else bytes(header),
+                      value.encode('latin1') if isinstance(value, str) else bytes(value)))
+    for cookie in response.cookies.values():
+      headers.append((b'Set-Cookie', cookie.output(header='').encode('ascii').strip()))
+    await send({'type': 'http.response.start', 'status': response.status_code, 'headers': headers})
+
+    iterator = iter(response)
+    next_batch = sync_to_async(response.next_batch, thread_sensitive=True)
+    while True:
+      parts = await next_batch(iterator)
+      if not parts:
+        break
+      for part in parts:
+        for chunk, _ in self.chunk_bytes(part):
+          await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+    await send({'type': 'http.response.body'})
+    await sync_to_async(response.close, thread_sensitive=True)()
+
+
+def get_asgi_application():
+  """Like django.core.asgi.get_asgi_application, with the ASGIHandler of this module"""
+  import django
+  django.setup(set_prefix=False)
+  return ASGIHandler()
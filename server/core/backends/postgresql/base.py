@@ -0,0 +1,6 @@
+from core.connections import HealthCheckMixin
+from django.db.backends.postgresql import base
+
+
+class DatabaseWrapper(HealthCheckMixin, base.DatabaseWrapper):
+  """The postgresql backend with the connection health checks of core.connections"""
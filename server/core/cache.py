@@ -0,0 +1,209 @@
+"""
+Versioned read-through cache for serialized content.
+Values are stored under '<prefix>:<namespace>:<version>:<key>'. Invalidating a single key deletes it, invalidating a
+whole namespace bumps its version so all old entries are ignored and expire on their own. Invalidations wait for the
+transaction they are made in to commit, before that a miss would load and cache the old value again.
+The default LocalMemoryCache lives in the memory of one process, invalidations made by another process never reach it.
+Deployments running more than one process, like several uvicorn workers, have to configure a shared backend like
+RedisCache in READ_THROUGH_CACHES.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+###############################################################################
+#                               backends                                      #
+###############################################################################
+
+
+class CacheBackend:
+  """Interface of the cache backends, values must be json serializable"""
+
+  evictions = 0
+
+  def get(self, key):
+    """Returns the value stored under key or None"""
+    raise NotImplementedError
+
+  def set(self, key, value, ttl):
+    """Stores value under key for ttl seconds"""
+    raise NotImplementedError
+
+  def delete(self, key):
+    raise NotImplementedError
+
+  def incr(self, key):
+    """Increments the integer stored under key, starting at 1, and returns it"""
+    raise NotImplementedError
+
+  def clear(self):
+    raise NotImplementedError
+
+
+class LocalMemoryCache(CacheBackend):
+  """
+  Least recently used cache with expiry in the memory of the process, meant for tests, development and deployments
+  with a single process, as other processes neither see its entries nor invalidate them
+  """
+
+  def __init__(self, max_entries=10000):
+    if max_entries < 1:
+      raise ValueError('max_entries must be positive')
+    self.max_entries = max_entries
+    self.evictions = 0
+    self._entries = OrderedDict()
+    self._counters = {}   # never evicted, losing a namespace version would bring back stale entries
+    self._lock = threading.Lock()
+
+  def get(self, key):
+    with self._lock:
+      if key in self._counters:
+        return self._counters[key]
+      entry = self._entries.get(key)
+      if entry is None:
+        return None
+      value, expires_at = entry
+      if expires_at is not None and expires_at <= time.monotonic():
+        del self._entries[key]
+        self.evictions += 1
+        return None
+      self._entries.move_to_end(key)
+      return value
+
+  def set(self, key, value, ttl=None):
+    expires_at = time.monotonic() + ttl if ttl else None
+    with self._lock:
+      self._entries[key] = (value, expires_at)
+      self._entries.move_to_end(key)
+      while len(self._entries) > self.max_entries:
+        self._entries.popitem(last=False)
+        self.evictions += 1
+
+  def delete(self, key):
+    with self._lock:
+      self._entries.pop(key, None)
+
+  def incr(self, key):
+    with self._lock:
+      self._counters[key] = self._counters.get(key, 0) + 1
+      return self._counters[key]
+
+  def clear(self):
+    with self._lock:
+      self._entries.clear()
+      self._counters.clear()
+
+  def __len__(self):
+    return len(self._entries)
+
+
+class RedisCache(CacheBackend):
+  """
+  Cache in Redis or any server speaking its protocol.
+  Takes a redis-py compatible client or a url, in which case the redis package has to be installed.
+  Namespace versions are stored without expiry, run the server with a volatile-* maxmemory-policy so they are never
+  evicted. Evictions happen inside the server and are not counted.
+  """
+
+  def __init__(self, client=None, url=None):
+    if client is None:
+      try:
+        import redis
+      except ImportError:
+        raise ImproperlyConfigured('RedisCache needs the redis package or a client')
+      client = redis.Redis.from_url(url or 'redis://localhost:6379/0')
+    self.client = client
+
+  def get(self, key):
+    value = self.client.get(key)
+    return None if value is None else json.loads(value)
+
+  def set(self, key, value, ttl=None):
+    self.client.set(key, json.dumps(value, cls=DjangoJSONEncoder), ex=ttl or None)
+
+  def delete(self, key):
+    self.client.delete(key)
+
+  def incr(self, key):
+    return int(self.client.incr(key))
+
+  def clear(self):
+    self.client.flushdb()
+
+
+###############################################################################
+#                               read through                                  #
+###############################################################################
+
+
+class ReadThroughCache:
+  """Loads values on a miss and counts hits and misses"""
+
+  def __init__(self, backend, ttl=300, prefix='wurding'):
+    self.backend = backend
+    self.ttl = ttl
+    self.prefix = prefix
+    self.hits = 0
+    self.misses = 0
+
+  def version(self, namespace):
+    return self.backend.get(f'{self.prefix}:{namespace}:version') or 0
+
+  def key(self, namespace, key):
+    return f'{self.prefix}:{namespace}:{self.version(namespace)}:{key}'
+
+  def get(self, namespace, key, loader):
+    """Returns the cached value or stores and returns what loader returns, None is never cached"""
+    cache_key = self.key(namespace, key)
+    value = self.backend.get(cache_key)
+    if value is not None:
+      self.hits += 1
+      return value
+    self.misses += 1
+    value = loader()
+    if value is not None:
+      self.backend.set(cache_key, value, self.ttl)
+    return value
+
+  def invalidate(self, namespace, key=None, using=None):
+    """
+    Drops one key or, without a key, everything in the namespace once the transaction of the database `using` commits,
+    right away outside of transactions
+    """
+    transaction.on_commit(lambda: self._invalidate(namespace, key), using=using)
+
+  def _invalidate(self, namespace, key):
+    if key is None:
+      self.backend.incr(f'{self.prefix}:{namespace}:version')
+    else:
+      self.backend.delete(self.key(namespace, key))
+
+  def metrics(self):
+    return {'hits': self.hits, 'misses': self.misses, 'evictions': self.backend.evictions}
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name='content'):
+  """Returns the cache configured under the given name in settings.READ_THROUGH_CACHES, created once per process"""
+  with _caches_lock:
+    if name not in _caches:
+      config = getattr(settings, 'READ_THROUGH_CACHES', {}).get(name, {})
+      backend = import_string(config.get('BACKEND', 'core.cache.LocalMemoryCache'))
+      _caches[name] = ReadThroughCache(backend(**config.get('OPTIONS', {})), ttl=config.get('TTL', 300),
+                                       prefix=config.get('PREFIX', name))
+    return _caches[name]
+
+
+def invalidate_model(sender, **kwargs):
+  """Drops the namespace named after the sender model, for changes made without post_save like bulk updates"""
+  get_cache().invalidate(sender._meta.model_name)
@@ -0,0 +1,149 @@
+"""
+Channel layers deliver messages between websocket connections and the games they take part in.
+Messages are json serializable dicts sent to a named group, every subscription of the group receives a copy.
+The in-memory layer only reaches subscriptions of the same process, the redis layer reaches all processes sharing the
+server.
+"""
+import asyncio
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+  """Messages of one group for one receiver, in the order they were sent"""
+
+  def __init__(self, group, capacity):
+    self.group = group
+    self.queue = asyncio.Queue(maxsize=capacity)
+
+  async def receive(self, timeout=None):
+    """Returns the next message, or None if none arrived within timeout seconds"""
+    try:
+      return await asyncio.wait_for(self.queue.get(), timeout)
+    except asyncio.TimeoutError:
+      return None
+
+  def deliver(self, message):
+    try:
+      self.queue.put_nowait(message)
+    except asyncio.QueueFull:
+      # a receiver this far behind is stuck, dropping keeps the sender and everybody else going
+      logger.warning('dropped message for group %s, subscription is full', self.group)
+
+
+class ChannelLayer:
+  """Interface of the channel layers"""
+
+  async def send(self, group, message):
+    raise NotImplementedError
+
+  async def subscribe(self, group):
+    """Returns a new Subscription to the group"""
+    raise NotImplementedError
+
+  async def unsubscribe(self, subscription):
+    raise NotImplementedError
+
+
+class InMemoryChannelLayer(ChannelLayer):
+  """Channel layer of a single process, meant for tests and development"""
+
+  def __init__(self, capacity=100):
+    if capacity < 1:
+      raise ValueError('capacity must be positive')
+    self.capacity = capacity
+    self.groups = {}
+
+  async def send(self, group, message):
+    self._deliver(group, message)
+
+  async def subscribe(self, group):
+    subscription = Subscription(group, self.capacity)
+    self.groups.setdefault(group, set()).add(subscription)
+    return subscription
+
+  async def unsubscribe(self, subscription):
+    subscriptions = self.groups.get(subscription.group, set())
+    subscriptions.discard(subscription)
+    if not subscriptions:
+      self.groups.pop(subscription.group, None)
+
+  def _deliver(self, group, message):
+    for subscription in self.groups.get(group, ()):
+      subscription.deliver(message)
+
+
+class RedisChannelLayer(InMemoryChannelLayer):
+  """
+  Channel layer on top of redis pub/sub.
+  Takes a redis.asyncio compatible client or a url, in which case the redis package has to be installed.
+  Every process subscribes once per group with local receivers and fans messages out in memory, so idle connections
+  do not cost a redis connection each.
+  """
+
+  def __init__(self, client=None, url=None, prefix='wurding', **kwargs):
+    super().__init__(**kwargs)
+    if client is None:
+      try:
+        import redis.asyncio
+      except ImportError:
+        raise ImproperlyConfigured('RedisChannelLayer needs the redis package or a client')
+      client = redis.asyncio.Redis.from_url(url or 'redis://localhost:6379/0')
+    self.client = client
+    self.prefix = prefix
+    self._pubsub = None
+    self._reader = None
+
+  def channel(self, group):
+    return f'{self.prefix}:{group}'
+
+  async def send(self, group, message):
+    await self.client.publish(self.channel(group), json.dumps(message, cls=DjangoJSONEncoder))
+
+  async def subscribe(self, group):
+    new = group not in self.groups
+    subscription = await super().subscribe(group)
+    if new:
+      if self._pubsub is None:
+        self._pubsub = self.client.pubsub()
+      await self._pubsub.subscribe(self.channel(group))
+      if self._reader is None or self._reader.done():
+        self._reader = asyncio.ensure_future(self._read())
+    return subscription
+
+  async def unsubscribe(self, subscription):
+    await super().unsubscribe(subscription)
+    if subscription.group not in self.groups:
+      await self._pubsub.unsubscribe(self.channel(subscription.group))
+
+  async def _read(self):
+    start = len(self.prefix) + 1
+    async for message in self._pubsub.listen():
+      if message['type'] != 'message':
+        continue
+      channel = message['channel']
+      group = (channel.decode('utf-8') if isinstance(channel, bytes) else channel)[start:]
+      self._deliver(group, json.loads(message['data']))
+
+
+_layer = None
+_layer_lock = threading.Lock()
+
+
+def get_channel_layer():
+  """Returns the channel layer configured in settings.CHANNEL_LAYER, created once per process"""
+  global _layer
+  with _layer_lock:
+    if _layer is None:
+      config = getattr(settings, 'CHANNEL_LAYER', {})
+      backend = import_string(config.get('BACKEND', 'core.channels.InMemoryChannelLayer'))
+      _layer = backend(**config.get('OPTIONS', {}))
+    return _layer
@@ -0,0 +1,92 @@
+"""
+Connection management.
+Connections are kept open for CONN_MAX_AGE seconds instead of one connection per request. A persistent connection
+may have been closed by the server or a proxy in the meantime, so with CONN_HEALTH_CHECKS it is checked once per
+request before its first query and replaced if it is unusable, like Django 4.1 does.
+Database work of the async api runs in threads which keep their connection, with DATABASE_POOL['SIZE'] in a pool of
+that many threads, so each process holds at most that many connections for the async api, plus one for sync views.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.db.utils import OperationalError
+
+
+class HealthCheckMixin:
+  """Mixin of database wrappers which checks a reused connection before its first query of a request"""
+
+  health_check_done = False
+
+  @property
+  def health_check_enabled(self):
+    return self.settings_dict.get('CONN_HEALTH_CHECKS', False)
+
+  def connect(self):
+    super().connect()
+    # a new connection needs no check
+    self.health_check_done = True
+
+  def close_if_unusable_or_obsolete(self):
+    # runs when requests start and finish, the next query checks the connection again
+    self.health_check_done = False
+    super().close_if_unusable_or_obsolete()
+
+  def close_if_health_check_failed(self):
+    if self.connection is None or not self.health_check_enabled or self.health_check_done:
+      return
+    if not self.is_usable():
+      self.close()
+    self.health_check_done = True
+
+  def _cursor(self, name=None):
+    self.close_if_health_check_failed()
+    return super()._cursor(name)
+
+
+def pool_size():
+  return getattr(settings, 'DATABASE_POOL', {}).get('SIZE') or 0
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool():
+  """Returns the thread pool of the async api configured in settings.DATABASE_POOL, None without a size"""
+  size = pool_size()
+  if not size:
+    return None
+  with _pools_lock:
+    if size not in _pools:
+      _pools[size] = ThreadPoolExecutor(max_workers=size, thread_name_prefix='database')
+    return _pools[size]
+
+
+def probe(alias='default'):
+  """Opens a connection if needed and runs a query, raises OperationalError if the database is unavailable"""
+  connection = connections[alias]
+  with connection.cursor() as cursor:
+    cursor.execute('SELECT 1')
+    cursor.fetchone()
+
+
+def wait_for_database(alias='default', timeout=60, interval=1, on_retry=None):
+  """Probes the database until it answers, returns the attempts or raises the last error once timeout passed"""
+  deadline = time.monotonic() + timeout
+  attempt = 0
+  while True:
+    attempt += 1
+    try:
+      probe(alias)
+      return attempt
+    except OperationalError as error:
+      # a failed connect leaves no connection behind, a connection which broke afterwards has to be dropped
+      connections[alias].close()
+      if time.monotonic() + interval > deadline:
+        raise
+      if on_retry is not None:
+        on_retry(attempt, error)
+      time.sleep(interval)
@@ -0,0 +1,109 @@
+"""
+Denormalized counters.
+Counter columns are changed with relative updates inside the transaction which changes what they count, so they are
+never read, incremented and written back. Saves of stale instances can not overwrite them, see
+BaseEntity.COUNTER_FIELDS. Changes made behind the back of the models (raw sql, queryset updates of counted rows) make
+counters drift, `manage.py recount` repairs them.
+"""
+from django.db import transaction
+from django.db.models import Count, F
+
+_counters = {}
+
+
+def register(counter):
+  """Makes a counter known to the recount command"""
+  _counters[counter.name] = counter
+  return counter
+
+
+def get_counters():
+  return dict(_counters)
+
+
+class Counter:
+  """A counter column of model, subclasses define what it counts"""
+
+  def __init__(self, model, field):
+    self.model = model
+    self.field = field
+
+  @property
+  def name(self):
+    return f'{self.model._meta.label_lower}.{self.field}'
+
+  def counts(self, pks):
+    """Returns the exact counts of the given rows, rows counting nothing may be missing"""
+    raise NotImplementedError
+
+  def add(self, deltas):
+    """Adds {pk: delta} to the counters"""
+    for pk, delta in deltas.items():
+      if delta:
+        self.model.objects.filter(pk=pk).update(**{self.field: F(self.field) + delta})
+
+  def recount(self, pks):
+    """Writes the exact counts of the given rows and returns the number of counters which were wrong"""
+    with transaction.atomic():
+      # the lock makes concurrent increments wait until the exact counts are written, so none is lost
+      current = dict(self.model.objects.select_for_update().filter(pk__in=pks).values_list('pk', self.field))
+      counts = self.counts(list(current))
+      wrong = [self.model(pk=pk, **{self.field: counts.get(pk, 0)}) for pk, value in current.items()
+               if value != counts.get(pk, 0)]
+      self.model.objects.bulk_update(wrong, [self.field])
+    return len(wrong)
+
+
+class ForeignKeyCounter(Counter):
+  """Counts the rows of a queryset pointing to the model through foreign_key"""
+
+  def __init__(self, model, field, queryset, foreign_key):
+    super().__init__(model, field)
+    self.queryset = queryset   # callable, so managers of models which are not loaded yet can be used
+    self.foreign_key = foreign_key
+
+  def counts(self, pks):
+    rows = self.queryset().filter(**{f'{self.foreign_key}__in': pks}).order_by().values_list(self.foreign_key)
+    return dict(rows.annotate(count=Count('pk')))
+
+
+class RelationCounter(Counter):
+  """
+  Counts the links of a many to many relation of the model.
+  Connect changed to m2m_changed of the through table, links added from either side are counted up and the
+  counters of rows losing links are recounted, as remove does not tell which of the given links existed.
+  """
+
+  def __init__(self, model, field, relation):
+    super().__init__(model, field)
+    self.relation = model._meta.get_field(relation)
+    self.through = self.relation.remote_field.through
+    self.source = self.relation.m2m_field_name()
+    self.target = self.relation.m2m_reverse_field_name()
+    self._cleared = f'_cleared_{self.field}'
+
+  def counts(self, pks):
+    rows = self.through.objects.filter(**{f'{self.source}__in': pks}).order_by().values_list(self.source)
+    return dict(rows.annotate(count=Count('pk')))
+
+  def set_counts(self, pks):
+    counts = self.counts(pks)
+    for pk in pks:
+      self.model.objects.filter(pk=pk).update(**{self.field: counts.get(pk, 0)})
+    return counts
+
+  def changed(self, sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'post_add' and pk_set:
+      if reverse:
+        self.model.objects.filter(pk__in=pk_set).update(**{self.field: F(self.field) + 1})
+      else:
+        self.add({instance.pk: len(pk_set)})
+        setattr(instance, self.field, getattr(instance, self.field) + len(pk_set))
+    elif action == 'pre_clear' and reverse:
+      # the rows losing their links are only known before they are cleared
+      linked = self.through.objects.filter(**{self.target: instance.pk}).values_list(self.source, flat=True)
+      instance.__dict__[self._cleared] = list(linked)
+    elif action in ('post_remove', 'post_clear') and reverse:
+      self.set_counts(list(pk_set) if action == 'post_remove' else instance.__dict__.pop(self._cleared, []))
+    elif action in ('post_remove', 'post_clear'):
+      setattr(instance, self.field, self.set_counts([instance.pk]).get(instance.pk, 0))
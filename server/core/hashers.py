@@ -0,0 +1,43 @@
+"""
+Password hashers with the costs of settings.PASSWORD_HASHING.
+The costs are read on every use, so they can be tuned without touching the hashers. Django rehashes a password on the
+next successful login when it was hashed by another than the first of PASSWORD_HASHERS or with other costs, so raising
+or lowering a cost, or switching to another hasher, migrates users as they log in.
+Argon2 needs the argon2-cffi package and bcrypt the bcrypt package, hashes of a hasher whose package is missing can
+not be checked.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+def get_cost(name, default):
+  return getattr(settings, 'PASSWORD_HASHING', {}).get(name, default)
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+
+  @property
+  def time_cost(self):
+    return get_cost('ARGON2_TIME_COST', 2)
+
+  @property
+  def memory_cost(self):
+    return get_cost('ARGON2_MEMORY_COST', 102400)   # KiB
+
+  @property
+  def parallelism(self):
+    return get_cost('ARGON2_PARALLELISM', 8)
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+
+  @property
+  def rounds(self):
+    return get_cost('BCRYPT_ROUNDS', 12)
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+
+  @property
+  def iterations(self):
+    return get_cost('PBKDF2_ITERATIONS', 320000)
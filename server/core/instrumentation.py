@@ -0,0 +1,202 @@
+"""
+Query instrumentation.
+Every database connection gets an execute wrapper which times its queries into the QueryMetrics of the current
+context, so queries run by sync_to_async threads of an async view are counted for the request which awaited them.
+QueryInstrumentationMiddleware records every request, answers with a Server-Timing header and feeds the process wide
+metrics served in the Prometheus text format by core.views.metrics. query_budget fails code, usually tests, which
+issues more queries than allowed.
+"""
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.utils.deprecation import MiddlewareMixin
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar('query_metrics', default=None)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def get_setting(name, default):
+  return getattr(settings, 'INSTRUMENTATION', {}).get(name, default)
+
+
+class QueryBudgetExceeded(AssertionError):
+  """More queries than the budget allows were issued"""
+
+
+class QueryMetrics:
+  """Queries recorded while the metrics were current, may be fed by several threads"""
+
+  def __init__(self):
+    self.count = 0
+    self.duration = 0.0
+    self.slowest_sql = None
+    self.slowest_duration = 0.0
+    self._lock = threading.Lock()
+
+  def record(self, sql, duration):
+    with self._lock:
+      self.count += 1
+      self.duration += duration
+      if self.slowest_sql is None or duration > self.slowest_duration:
+        self.slowest_sql = sql
+        self.slowest_duration = duration
+
+
+def _execute(execute, sql, params, many, context):
+  """execute wrapper of all connections, records into the current metrics if there are any"""
+  metrics = _current.get()
+  if metrics is None:
+    return execute(sql, params, many, context)
+  started = time.perf_counter()
+  try:
+    return execute(sql, params, many, context)
+  finally:
+    metrics.record(sql, time.perf_counter() - started)
+
+
+def instrument(connection, **kwargs):
+  """Installs the execute wrapper on a connection once, connected to connection_created"""
+  if _execute not in connection.execute_wrappers:
+    connection.execute_wrappers.append(_execute)
+
+
+@contextmanager
+def record_queries():
+  """Records the queries of the block and of the sync_to_async threads it awaits, yields the QueryMetrics"""
+  for connection in connections.all():
+    instrument(connection)
+  metrics = QueryMetrics()
+  token = _current.set(metrics)
+  try:
+    yield metrics
+  finally:
+    _current.reset(token)
+
+
+@contextmanager
+def query_budget(limit):
+  """Raises QueryBudgetExceeded when the block issued more than limit queries"""
+  with record_queries() as metrics:
+    yield metrics
+  if metrics.count > limit:
+    raise QueryBudgetExceeded(f'{metrics.count} queries issued, the budget is {limit}, '
+                              f'slowest: {metrics.slowest_sql}')
+
+
+class RequestMetrics:
+  """Process wide totals per view in the Prometheus text format"""
+
+  def __init__(self, buckets=LATENCY_BUCKETS):
+    self.buckets = buckets
+    self._views = {}
+    self._lock = threading.Lock()
+
+  def observe(self, view, method, status, latency, metrics):
+    with self._lock:
+      totals = self._views.setdefault(view, {'requests': {}, 'latency': 0.0, 'buckets': [0] * len(self.buckets),
+                                             'queries': 0, 'db': 0.0})
+      key = (method, status)
+      totals['requests'][key] = totals['requests'].get(key, 0) + 1
+      totals['latency'] += latency
+      for index, bound in enumerate(self.buckets):
+        if latency <= bound:
+          totals['buckets'][index] += 1
+      totals['queries'] += metrics.count
+      totals['db'] += metrics.duration
+
+  def clear(self):
+    with self._lock:
+      self._views = {}
+
+  def render(self):
+    """Returns the totals in the Prometheus text exposition format"""
+    with self._lock:
+      views = {view: {**totals, 'requests': dict(totals['requests']), 'buckets': list(totals['buckets'])}
+               for view, totals in self._views.items()}
+    lines = [
+        '# HELP http_requests_total Requests per view, method and status.',
+        '# TYPE http_requests_total counter',
+    ]
+    for view, totals in sorted(views.items()):
+      for (method, status), count in sorted(totals['requests'].items()):
+        lines.append(f'http_requests_total{{view="{view}",method="{method}",status="{status}"}} {count}')
+    lines += [
+        '# HELP http_request_duration_seconds Request latency per view.',
+        '# TYPE http_request_duration_seconds histogram',
+    ]
+    for view, totals in sorted(views.items()):
+      count = sum(totals['requests'].values())
+      for bound, observed in zip(self.buckets, totals['buckets']):
+        lines.append(f'http_request_duration_seconds_bucket{{view="{view}",le="{bound}"}} {observed}')
+      lines.append(f'http_request_duration_seconds_bucket{{view="{view}",le="+Inf"}} {count}')
+      lines.append(f'http_request_duration_seconds_sum{{view="{view}"}} {totals["latency"]:.6f}')
+      lines.append(f'http_request_duration_seconds_count{{view="{view}"}} {count}')
+    lines += [
+        '# HELP db_queries_total Database queries per view.',
+        '# TYPE db_queries_total counter',
+    ]
+    lines += [f'db_queries_total{{view="{view}"}} {totals["queries"]}' for view, totals in sorted(views.items())]
+    lines += [
+        '# HELP db_query_duration_seconds_total Time spent in database queries per view.',
+        '# TYPE db_query_duration_seconds_total counter',
+    ]
+    lines += [f'db_query_duration_seconds_total{{view="{view}"}} {totals["db"]:.6f}'
+              for view, totals in sorted(views.items())]
+    return '\n'.join(lines) + '\n'
+
+
+request_metrics = RequestMetrics()
+
+
+class QueryInstrumentationMiddleware(MiddlewareMixin):
+  """
+  Records query count, database time and latency of every request.
+  Responses get a Server-Timing header, requests over INSTRUMENTATION['SLOW_REQUEST_SECONDS'] log their slowest
+  query and requests over INSTRUMENTATION['QUERY_BUDGET'] queries log a warning, or fail with QueryBudgetExceeded
+  if INSTRUMENTATION['STRICT'] is set, like in tests.
+  """
+
+  def __call__(self, request):
+    if asyncio.iscoroutinefunction(self.get_response):
+      return self.__acall__(request)
+    started = time.perf_counter()
+    with record_queries() as metrics:
+      response = self.get_response(request)
+    return self.measured(request, response, metrics, time.perf_counter() - started)
+
+  async def __acall__(self, request):
+    started = time.perf_counter()
+    with record_queries() as metrics:
+      response = await self.get_response(request)
+    return self.measured(request, response, metrics, time.perf_counter() - started)
+
+  def measured(self, request, response, metrics, latency):
+    match = getattr(request, 'resolver_match', None)
+    view = match.view_name if match is not None else 'unmatched'
+    request_metrics.observe(view, request.method, response.status_code, latency, metrics)
+    if get_setting('SERVER_TIMING', True):
+      response['Server-Timing'] = (f'db;dur={metrics.duration * 1000:.1f};desc="{metrics.count} queries", '
+                                   f'slowest;dur={metrics.slowest_duration * 1000:.1f}, '
+                                   f'total;dur={latency * 1000:.1f}')
+
+    if latency > get_setting('SLOW_REQUEST_SECONDS', 1.0):
+      logger.warning('slow request %s %s: %.3fs, %d queries in %.3fs, slowest %.3fs: %s', request.method,
+                     request.path, latency, metrics.count, metrics.duration, metrics.slowest_duration,
+                     metrics.slowest_sql)
+    budget = get_setting('QUERY_BUDGET', None)
+    if budget is not None and metrics.count > budget:
+      message = f'{request.method} {request.path} issued {metrics.count} queries, the budget is {budget}'
+      if get_setting('STRICT', False):
+        raise QueryBudgetExceeded(message)
+      logger.warning(message)
+
+    return response
@@ -0,0 +1,102 @@
+"""
+Leaderboards.
+Users are ranked in sorted sets (see core.sortedset) instead of counting the users with a higher elo, so the rank of a
+user and the page around them are O(log n) lookups. The global board holds the elo of every user who played a rated
+game (User.games), weekly boards the elo won in a calendar week, they are dropped two weeks after their last change.
+Boards are updated by rating_changed, which is sent once a result is committed, and refilled from the database by
+`manage.py rebuild_leaderboards`, except the weekly boards which only exist in the sorted sets.
+"""
+from datetime import timedelta
+
+from core.sortedset import get_sorted_sets
+from django.utils import timezone
+
+GLOBAL = 'global'
+WEEKLY_RETENTION = timedelta(weeks=2)
+
+
+def weekly_board(now=None):
+  year, week, _ = timezone.localdate(now or timezone.now()).isocalendar()
+  return f'weekly:{year}-W{week:02d}'
+
+
+def language_board(language_id):
+  return f'language:{language_id}'
+
+
+class Entry:
+  """A user on a leaderboard, rank starts at 1"""
+
+  def __init__(self, rank, user_id, score):
+    self.rank = rank
+    self.user_id = user_id
+    self.score = score
+
+  def __eq__(self, other):
+    return (self.rank, self.user_id, self.score) == (other.rank, other.user_id, other.score)
+
+  def __repr__(self):
+    return f'Entry({self.rank}, {self.user_id}, {self.score})'
+
+
+class Leaderboard:
+  """A board of users ordered by descending score, ties are ordered by descending user id"""
+
+  def __init__(self, board, sorted_sets=None):
+    self.board = board
+    self.sorted_sets = sorted_sets or get_sorted_sets()
+
+  def set(self, scores):
+    """Sets {user id: score}"""
+    if scores:
+      self.sorted_sets.zadd(self.board, {str(user_id): score for user_id, score in scores.items()})
+
+  def increment(self, user_id, amount):
+    return self.sorted_sets.zincrby(self.board, amount, str(user_id))
+
+  def remove(self, *user_ids):
+    return self.sorted_sets.zrem(self.board, *map(str, user_ids))
+
+  def clear(self):
+    self.sorted_sets.delete(self.board)
+
+  def expire(self, seconds):
+    self.sorted_sets.expire(self.board, seconds)
+
+  def __len__(self):
+    return self.sorted_sets.zcard(self.board)
+
+  def rank(self, user_id):
+    """Returns the rank of a user, None if the user is not on the board"""
+    rank = self.sorted_sets.zrevrank(self.board, str(user_id))
+    return None if rank is None else rank + 1
+
+  def score(self, user_id):
+    return self.sorted_sets.zscore(self.board, str(user_id))
+
+  def _entries(self, start, stop):
+    pairs = self.sorted_sets.zrevrange(self.board, start, stop, withscores=True)
+    return [Entry(start + offset + 1, user_id, score) for offset, (user_id, score) in enumerate(pairs)]
+
+  def top(self, limit=10):
+    """Returns the first limit entries"""
+    if limit < 1:
+      raise ValueError('limit must be positive')
+    return self._entries(0, limit - 1)
+
+  def around(self, user_id, radius=5):
+    """Returns the entries up to radius ranks above and below a user, empty if the user is not on the board"""
+    if radius < 0:
+      raise ValueError('radius must not be negative')
+    rank = self.sorted_sets.zrevrank(self.board, str(user_id))
+    if rank is None:
+      return []
+    return self._entries(max(0, rank - radius), rank + radius)
+
+
+def record_rating(sender, user, delta, **kwargs):
+  """rating_changed handler, moves the user on the global board and adds the delta to the current weekly board"""
+  Leaderboard(GLOBAL).set({user.pk: user.elo})
+  weekly = Leaderboard(weekly_board())
+  weekly.increment(user.pk, delta)
+  weekly.expire(int(WEEKLY_RETENTION.total_seconds()))
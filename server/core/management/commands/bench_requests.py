@@ -0,0 +1,118 @@
+import asyncio
+import time
+
+from core.tokens import access_token
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from django.test import override_settings
+
+# name: (CONN_MAX_AGE, DATABASE_POOL size)
+CONFIGURATIONS = {
+    'per-request': (0, 0),
+    'persistent': (60, 0),
+    'pooled': (60, None),
+}
+
+
+async def _request(application, host, path, headers):
+  """sends a GET request straight to the asgi application and returns the status"""
+  path, _, query = path.partition('?')
+  scope = {
+      'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+      'path': path, 'raw_path': path.encode(), 'query_string': query.encode(), 'root_path': '',
+      'headers': [(b'host', host.encode()), *headers], 'client': ('127.0.0.1', 0), 'server': (host, 80),
+  }
+  body = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+  status = []
+
+  async def receive():
+    if body:
+      return body.pop()
+    # the client never disconnects
+    await asyncio.Event().wait()
+
+  async def send(message):
+    if message['type'] == 'http.response.start':
+      status.append(message['status'])
+
+  await application(scope, receive, send)
+  return status[0] if status else None
+
+
+async def _run(application, host, path, headers, requests, concurrency):
+  semaphore = asyncio.Semaphore(concurrency)
+
+  async def limited():
+    async with semaphore:
+      return await _request(application, host, path, headers)
+
+  return await asyncio.gather(*(limited() for _ in range(requests)))
+
+
+class Command(BaseCommand):
+  """Django command to compare requests per second with and without persistent and pooled connections"""
+
+  help = ('Sends GET requests straight to the asgi application, once opening a connection per request, once with '
+          'persistent connections and once with the connection pool of the async api, and reports requests per '
+          'second and the connections opened')
+
+  def add_arguments(self, parser):
+    parser.add_argument('configurations', nargs='*', help=f"configurations to run, all if omitted: "
+                                                          f"{', '.join(CONFIGURATIONS)}")
+    parser.add_argument('--path', default='/game/packages/')
+    parser.add_argument('--host', default='localhost', help='host header, has to be one of ALLOWED_HOSTS')
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--pool-size', type=int, default=10, help='threads and connections of the pooled run')
+    parser.add_argument('--user', help=('name of the user the requests authenticate as with an access token, the '
+                                        'default path needs one'))
+    parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+  def handle(self, *args, **options):
+    if options['requests'] < 1 or options['concurrency'] < 1 or options['pool_size'] < 1:
+      raise CommandError('requests, concurrency and pool size must be positive')
+    unknown = set(options['configurations']) - set(CONFIGURATIONS)
+    if unknown:
+      raise CommandError(f"unknown configurations: {', '.join(sorted(unknown))}")
+    headers = []
+    if options['user']:
+      user = get_user_model().objects.get(name=options['user'])
+      headers.append((b'authorization', f'Bearer {access_token(user)}'.encode()))
+
+    # the asgi module sets up the application, so it is imported once django is ready
+    from app.asgi import application
+
+    for name in options['configurations'] or CONFIGURATIONS:
+      max_age, size = CONFIGURATIONS[name]
+      rate, errors, opened = self.measure(application, headers, options, max_age,
+                                          options['pool_size'] if size is None else size)
+      self.stdout.write(f'{name}: {rate:.0f} requests/s, {errors} errors, {opened} connections opened')
+
+    self.stdout.write(self.style.SUCCESS('Benchmark finished!'))
+
+  def measure(self, application, headers, options, max_age, size):
+    database = connections.settings[options['database']]
+    opened = []
+
+    def count(sender, connection, **kwargs):
+      if connection.alias == options['database']:
+        opened.append(connection)
+
+    # every connection shares the settings dict, threads opening their connection later see the change as well
+    original = database.get('CONN_MAX_AGE', 0)
+    database['CONN_MAX_AGE'] = max_age
+    connection_created.connect(count, weak=False)
+    try:
+      with override_settings(DATABASE_POOL={'SIZE': size}):
+        started = time.perf_counter()
+        statuses = asyncio.run(_run(application, options['host'], options['path'], headers, options['requests'],
+                                    options['concurrency']))
+        elapsed = time.perf_counter() - started
+    finally:
+      connection_created.disconnect(count)
+      database['CONN_MAX_AGE'] = original
+      connections.close_all()
+    errors = sum(1 for status in statuses if status is None or status >= 400)
+    return options['requests'] / elapsed, errors, len(opened)
@@ -0,0 +1,99 @@
+import time
+import uuid
+
+from core.uuids import uuid7
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection, models
+from django.utils import timezone
+
+GENERATORS = {
+    'uuid4': uuid.uuid4,
+    'uuid7': uuid7,
+}
+
+
+class Command(BaseCommand):
+  """Django command to compare random and time ordered primary keys"""
+
+  help = ('Inserts rows shaped like words and the vocabulary word links into scratch tables, once with uuid4 and '
+          'once with uuid7 keys, and reports insert rate and index size')
+
+  def add_arguments(self, parser):
+    parser.add_argument('--rows', type=int, default=100000, help='number of words inserted per generator')
+    parser.add_argument('--links', type=int, default=2, help='vocabulary links per word')
+    parser.add_argument('--batch-size', type=int, default=1000)
+
+  def handle(self, *args, **options):
+    if options['rows'] < 1 or options['batch_size'] < 1:
+      self.stderr.write('rows and batch size must be positive')
+      return
+    for name, generator in GENERATORS.items():
+      words, links = self.run(name, generator, options['rows'], options['links'], options['batch_size'])
+      self.stdout.write(f'{name}: words {words[0]:.0f} rows/s, index {self.size(words[1])}; '
+                        f'links {links[0]:.0f} rows/s, index {self.size(links[1])}')
+
+    self.stdout.write(self.style.SUCCESS('Benchmark finished!'))
+
+  def size(self, value):
+    return 'n/a' if value is None else f'{value / 1024:.0f} KiB'
+
+  def run(self, name, generator, rows, links, batch_size):
+    """returns (rows per second, index bytes) for the word table and the link table"""
+    uuid_type = models.UUIDField().db_type(connection)
+    word_table = f'benchmark_{name}_word'
+    link_table = f'benchmark_{name}_link'
+    # the same keys and indexes as content_word and game_vocabulary_domestic_words, without foreign key checks
+    statements = [
+        f'CREATE TABLE {word_table} (id {uuid_type} PRIMARY KEY, language_id {uuid_type} NOT NULL, '
+        f'name varchar(255) NOT NULL UNIQUE, created_at {models.DateTimeField().db_type(connection)} NOT NULL)',
+        f'CREATE INDEX {word_table}_language ON {word_table} (language_id, created_at, id)',
+        f'CREATE TABLE {link_table} (vocabulary_id {uuid_type} NOT NULL, word_id {uuid_type} NOT NULL, '
+        f'UNIQUE (vocabulary_id, word_id))',
+        f'CREATE INDEX {link_table}_word ON {link_table} (word_id)',
+    ]
+    prepare = models.UUIDField().get_db_prep_value
+    language = prepare(generator(), connection)
+    now = timezone.now()
+
+    with connection.cursor() as cursor:
+      for statement in statements:
+        cursor.execute(statement)
+      try:
+        word_ids = []
+        started = time.perf_counter()
+        for start in range(0, rows, batch_size):
+          batch = [(prepare(generator(), connection), language, f'word {index}', now)
+                   for index in range(start, min(rows, start + batch_size))]
+          cursor.executemany(f'INSERT INTO {word_table} VALUES (%s, %s, %s, %s)', batch)
+          word_ids.extend(row[0] for row in batch)
+        words = rows / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        batch = []
+        for word_id in word_ids:
+          batch.extend((prepare(generator(), connection), word_id) for _ in range(links))
+          if len(batch) >= batch_size:
+            cursor.executemany(f'INSERT INTO {link_table} VALUES (%s, %s)', batch)
+            batch = []
+        if batch:
+          cursor.executemany(f'INSERT INTO {link_table} VALUES (%s, %s)', batch)
+        link_rate = rows * links / (time.perf_counter() - started)
+
+        return (words, self.index_size(cursor, word_table)), (link_rate, self.index_size(cursor, link_table))
+      finally:
+        cursor.execute(f'DROP TABLE {link_table}')
+        cursor.execute(f'DROP TABLE {word_table}')
+
+  def index_size(self, cursor, table):
+    """returns the bytes used by the indexes of a table, None if the database does not tell"""
+    try:
+      if connection.vendor == 'postgresql':
+        cursor.execute('SELECT pg_indexes_size(%s)', [table])
+      elif connection.vendor == 'sqlite':
+        cursor.execute("SELECT SUM(pgsize) FROM dbstat WHERE name IN "
+                       "(SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s)", [table])
+      else:
+        return None
+    except DatabaseError:
+      return None
+    return cursor.fetchone()[0]
@@ -0,0 +1,12 @@
+from core.tokens import clear_refresh_tokens
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """Django command to forget used refresh tokens which expired, meant to run daily"""
+
+    help = 'Removes the used refresh tokens which expired, they are refused by their expiry alone'
+
+    def handle(self, *args, **options):
+        tokens = clear_refresh_tokens()
+        self.stdout.write(self.style.SUCCESS(f'Used refresh tokens cleared, {tokens} removed!'))
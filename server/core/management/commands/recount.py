@@ -0,0 +1,38 @@
+from core.counting import get_counters
+from core.pagination import iterate
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+  """Django command to repair drifted counter columns"""
+
+  help = ('Recounts the counter columns of all rows, of all counters or the given ones like '
+          'content.language.word_count, locking one batch of rows at a time')
+
+  def add_arguments(self, parser):
+    parser.add_argument('counters', nargs='*', help='names of the counters to recount, all if omitted')
+    parser.add_argument('--batch-size', type=int, default=1000)
+
+  def handle(self, *args, **options):
+    counters = get_counters()
+    if options['batch_size'] < 1:
+      raise CommandError('batch size must be positive')
+    missing = set(options['counters']) - set(counters)
+    if missing:
+      raise CommandError(f"unknown counters: {', '.join(sorted(missing))}")
+
+    for name in options['counters'] or sorted(counters):
+      counter = counters[name]
+      rows = iterate(counter.model.objects.only('id', 'created_at'), chunk_size=options['batch_size'])
+      fixed = 0
+      batch = []
+      for row in rows:
+        batch.append(row.pk)
+        if len(batch) == options['batch_size']:
+          fixed += counter.recount(batch)
+          batch = []
+      if batch:
+        fixed += counter.recount(batch)
+      self.stdout.write(f'{name}: {fixed} counters fixed')
+
+    self.stdout.write(self.style.SUCCESS('Counters recounted!'))
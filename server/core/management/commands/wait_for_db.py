@@ -1,21 +1,29 @@
-import time
-
-from django.core.management.base import BaseCommand
-from django.db import connection
+from core.connections import wait_for_database
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
 from django.db.utils import OperationalError
 
 
 class Command(BaseCommand):
     """Django command to pause execution until database is available"""
 
+    help = 'Probes the database with a query until it answers or the timeout passed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--timeout', type=float, default=60, help='seconds to wait before giving up')
+        parser.add_argument('--interval', type=float, default=1, help='seconds between two probes')
+
     def handle(self, *args, **options):
         self.stdout.write('Waiting for database...')
-        db_conn = None
-        while not db_conn:
-            try:
-                db_conn = connection
-            except OperationalError:
-                self.stdout.write('Database unavailable, waiting 1 second...')
-                time.sleep(1)
-
-        self.stdout.write(self.style.SUCCESS('Database available!'))
+
+        def retry(attempt, error):
+            self.stdout.write(f'Database unavailable, waiting {options["interval"]:g} seconds...')
+
+        try:
+            attempts = wait_for_database(options['database'], options['timeout'], options['interval'],
+                                         on_retry=retry)
+        except OperationalError as error:
+            raise CommandError(f'Database unavailable after {options["timeout"]} seconds: {error}')
+
+        self.stdout.write(self.style.SUCCESS(f'Database available after {attempts} attempts!'))
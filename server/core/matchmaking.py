@@ -0,0 +1,260 @@
+"""
+Matchmaking queues.
+InMemoryMatchmakingQueue pairs the players waiting in one process, so players connected to different processes never
+meet. RedisMatchmakingQueue keeps the waiting players in redis, where all processes pair them.
+"""
+import json
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+
+class Ticket:
+  """A player waiting for an opponent"""
+
+  def __init__(self, user_id, rating, enqueued_at):
+    self.user_id = user_id
+    self.rating = rating
+    self.enqueued_at = enqueued_at
+
+  def key(self):
+    return (self.rating, self.enqueued_at, str(self.user_id))
+
+  def __eq__(self, other):
+    return self.user_id == other.user_id and self.rating == other.rating and self.enqueued_at == other.enqueued_at
+
+  def __repr__(self):
+    return f"ticket {self.user_id} rating: {self.rating}"
+
+
+class Match:
+  """Two players paired by the queue"""
+
+  def __init__(self, first, second):
+    self.players = (first, second)
+
+  @property
+  def rating_difference(self):
+    return abs(self.players[0].rating - self.players[1].rating)
+
+  def __repr__(self):
+    return f"match {self.players[0]} vs {self.players[1]}"
+
+
+class MatchmakingQueue:
+  """
+  Base class for matchmaking queues.
+  A player accepts opponents within a rating window which grows by window_growth per second of waiting, starting
+  at base_window and never exceeding max_window.
+  """
+
+  def __init__(self, name='default', base_window=50, window_growth=10, max_window=400):
+    if base_window < 0 or window_growth < 0 or max_window < base_window:
+      raise ValueError('windows must be positive and max_window must not be smaller than base_window')
+    self.name = name
+    self.base_window = base_window
+    self.window_growth = window_growth
+    self.max_window = max_window
+
+  def window(self, ticket, now):
+    """Returns the rating window the ticket currently accepts"""
+    waited = max(0, now - ticket.enqueued_at)
+    return min(self.max_window, self.base_window + self.window_growth * waited)
+
+  def accepts(self, ticket, other, now):
+    """Two tickets match if either of them has waited long enough to accept the rating difference"""
+    difference = abs(ticket.rating - other.rating)
+    return difference <= self.window(ticket, now) or difference <= self.window(other, now)
+
+  def enqueue(self, user_id, rating, now=None):
+    """Queues a player and returns a Match right away if an opponent is waiting, otherwise None"""
+    raise NotImplementedError
+
+  def cancel(self, user_id):
+    """Removes a waiting player, returns whether the player was waiting"""
+    raise NotImplementedError
+
+  def match_waiting(self, now=None):
+    """Pairs waiting players whose windows grew enough since they were queued, oldest first"""
+    raise NotImplementedError
+
+  def __len__(self):
+    raise NotImplementedError
+
+
+class InMemoryMatchmakingQueue(MatchmakingQueue):
+  """
+  Matchmaking queue for a single process, players waiting in other processes are never paired with its players.
+  Waiting players are kept sorted by rating, so finding an opponent is a binary search followed by a walk over the
+  players inside the largest possible window instead of a scan of the whole queue.
+  """
+
+  def __init__(self, **kwargs):
+    super().__init__(**kwargs)
+    self._sorted = []
+    self._tickets = {}
+    self._lock = threading.Lock()
+
+  def enqueue(self, user_id, rating, now=None):
+    now = time.monotonic() if now is None else now
+    ticket = Ticket(user_id, rating, now)
+    with self._lock:
+      if user_id in self._tickets:
+        raise ValueError('user is already waiting for a match')
+      opponent = self._find_opponent(ticket, now)
+      if opponent is not None:
+        self._remove(opponent)
+        return Match(opponent, ticket)
+      self._insert(ticket)
+
+    return None
+
+  def cancel(self, user_id):
+    with self._lock:
+      ticket = self._tickets.get(user_id)
+      if ticket is None:
+        return False
+      self._remove(ticket)
+
+    return True
+
+  def match_waiting(self, now=None):
+    now = time.monotonic() if now is None else now
+    matches = []
+    with self._lock:
+      for ticket in sorted(self._tickets.values(), key=lambda ticket: ticket.enqueued_at):
+        if ticket.user_id not in self._tickets:
+          continue
+        self._remove(ticket)
+        opponent = self._find_opponent(ticket, now)
+        if opponent is None:
+          self._insert(ticket)
+          continue
+        self._remove(opponent)
+        matches.append(Match(opponent, ticket))
+
+    return matches
+
+  def __len__(self):
+    return len(self._tickets)
+
+  def _remove(self, ticket):
+    del self._tickets[ticket.user_id]
+    del self._sorted[bisect_left(self._sorted, ticket.key())]
+
+  def _find_opponent(self, ticket, now):
+    """walks outwards from the ticket's rating and returns the closest acceptable opponent"""
+    below = bisect_left(self._sorted, (ticket.rating,)) - 1
+    above = below + 1
+    while below >= 0 or above < len(self._sorted):
+      below_difference = ticket.rating - self._sorted[below][0] if below >= 0 else None
+      above_difference = self._sorted[above][0] - ticket.rating if above < len(self._sorted) else None
+      if above_difference is None or (below_difference is not None and below_difference <= above_difference):
+        index, difference = below, below_difference
+        below -= 1
+      else:
+        index, difference = above, above_difference
+        above += 1
+      if difference > self.max_window:
+        break
+      candidate = self._sorted[index][-1]
+      if self.accepts(ticket, candidate, now):
+        return candidate
+
+    return None
+
+  def _insert(self, ticket):
+    self._tickets[ticket.user_id] = ticket
+    # keys are unique per user, so the ticket itself is never compared
+    insort(self._sorted, ticket.key() + (ticket,))
+
+
+class RedisMatchmakingQueue(MatchmakingQueue):
+  """
+  Matchmaking queue in redis, shared by all processes using the same name.
+  Waiting players are kept in a sorted set by rating, next to a hash of their tickets. Every change holds a redis lock
+  of the queue, so a player is never paired twice, and ticket ages are taken from the wall clock all processes share.
+  Takes a redis-py compatible client or a url, in which case the redis package has to be installed. Players of a
+  process which dies stay in the queue until they are paired, their opponent then wins the duel on time.
+  """
+
+  def __init__(self, client=None, url=None, prefix='matchmaking', lock_seconds=5, **kwargs):
+    super().__init__(**kwargs)
+    if client is None:
+      try:
+        import redis
+      except ImportError:
+        raise ImproperlyConfigured('RedisMatchmakingQueue needs the redis package or a client')
+      client = redis.Redis.from_url(url or 'redis://localhost:6379/0', decode_responses=True)
+    self.client = client
+    self.ratings = f'{prefix}:{self.name}:ratings'
+    self.tickets = f'{prefix}:{self.name}:tickets'
+    self.lock_name = f'{prefix}:{self.name}:lock'
+    self.lock_seconds = lock_seconds
+
+  def _lock(self):
+    return self.client.lock(self.lock_name, timeout=self.lock_seconds, blocking_timeout=self.lock_seconds)
+
+  def _local(self, user_ids):
+    """returns an in-memory queue holding the tickets of the users"""
+    local = InMemoryMatchmakingQueue(base_window=self.base_window, window_growth=self.window_growth,
+                                     max_window=self.max_window)
+    for user_id, value in zip(user_ids, self.client.hmget(self.tickets, user_ids) if user_ids else []):
+      if value is not None:
+        rating, enqueued_at = json.loads(value)
+        local._insert(Ticket(user_id, rating, enqueued_at))
+    return local
+
+  def _remove(self, *tickets):
+    user_ids = [ticket.user_id for ticket in tickets]
+    self.client.zrem(self.ratings, *user_ids)
+    self.client.hdel(self.tickets, *user_ids)
+
+  def enqueue(self, user_id, rating, now=None):
+    now = time.time() if now is None else now
+    ticket = Ticket(user_id, rating, now)
+    with self._lock():
+      if self.client.hexists(self.tickets, user_id):
+        raise ValueError('user is already waiting for a match')
+      # only players inside the largest window can be paired right away
+      candidates = self.client.zrangebyscore(self.ratings, rating - self.max_window, rating + self.max_window)
+      opponent = self._local(candidates)._find_opponent(ticket, now)
+      if opponent is not None:
+        self._remove(opponent)
+        return Match(opponent, ticket)
+      self.client.hset(self.tickets, user_id, json.dumps([rating, now]))
+      self.client.zadd(self.ratings, {user_id: rating})
+
+    return None
+
+  def cancel(self, user_id):
+    with self._lock():
+      if not self.client.hexists(self.tickets, user_id):
+        return False
+      self._remove(Ticket(user_id, None, None))
+
+    return True
+
+  def match_waiting(self, now=None):
+    now = time.time() if now is None else now
+    with self._lock():
+      matches = self._local(list(self.client.hkeys(self.tickets))).match_waiting(now)
+      for match in matches:
+        self._remove(*match.players)
+
+    return matches
+
+  def __len__(self):
+    return self.client.zcard(self.ratings)
+
+
+def get_matchmaking_queue(name='default'):
+  """Creates the matchmaking queue configured in settings.MATCHMAKING, queues of the same name share their players"""
+  config = getattr(settings, 'MATCHMAKING', {})
+  backend = import_string(config.get('BACKEND', 'core.matchmaking.InMemoryMatchmakingQueue'))
+
+  return backend(name=name, **config.get('OPTIONS', {}))
@@ -0,0 +1,19 @@
+# Generated by Django 4.0.2 on 2026-10-18 07:25
+
+import core.uuids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='id',
+            field=models.UUIDField(default=core.uuids.generate_id, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
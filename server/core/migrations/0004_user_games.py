@@ -0,0 +1,25 @@
+# Generated by Django 4.0.2 on 2026-10-18 08:14
+
+from django.db import migrations, models
+
+
+def count_played(apps, schema_editor):
+    # games were not counted before, users whose elo moved played at least one
+    User = apps.get_model('core', 'User')
+    User.objects.using(schema_editor.connection.alias).exclude(elo=1000).update(games=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_used_refresh_tokens'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='games',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_played, migrations.RunPython.noop),
+    ]
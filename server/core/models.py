@@ -1,8 +1,10 @@
-import uuid
-
+from core.signals import entities_soft_deleted
+from core.uuids import generate_id
 from django.contrib.auth.models import (AbstractBaseUser, BaseUserManager,
                                         PermissionsMixin)
 from django.db import models
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
 
 ###############################################################################
 #                                  utils                                      #
@@ -33,7 +35,7 @@ def asure_string(string: str, min_length: int = 0):
 
 def asure_boolean(boolean):
     """check if boolean is submitted"""
-    if not boolean:
+    if boolean is None:
         raise ValueError('boolean is not submitted')
     if not isinstance(boolean, bool):
         raise ValueError('boolean is not a boolean')
@@ -44,30 +46,79 @@ def asure_boolean(boolean):
 ###############################################################################
 
 
-class BaseEntityManager(models.Manager):
+class BaseEntityQuerySet(models.QuerySet):
     """
-    Base manager for all entities.
+    Queryset for all entities.
+    Entities are soft deleted by setting active to false, the rows stay so offline clients can sync the deletion.
     """
 
-    def get_queryset(self, **kwargs):
+    def alive(self):
+        """Returns the active entities, served by the partial indexes WHERE active"""
+        return self.filter(active=True)
+
+    def dead(self):
+        """Returns the soft deleted entities"""
+        return self.filter(active=False)
+
+    def soft_delete(self):
         """
-        Returns a queryset of all entities.
+        Soft deletes all entities of the queryset with a single update and returns their number.
+        Like every update it bypasses save and post_save, entities_soft_deleted is sent instead.
         """
-        return self.get_queryset().filter(**kwargs)
+        count = self.alive().update(active=False, updated_at=timezone.now())
+        if count:
+            entities_soft_deleted.send(sender=self.model, count=count)
+        return count
+
+    def bulk_increment(self, fields, increments):
+        """
+        Adds {pk: (amount per field)} to the integer fields of many entities with a single update and returns the
+        number of rows updated. Like every update it leaves updated_at alone, counters are statistics and not content.
+        """
+        if not isinstance(increments, dict):
+            raise ValueError('increments is not a dict')
+        if not increments:
+            return 0
+
+        def added(index):
+            return Case(*[When(pk=pk, then=Value(amounts[index])) for pk, amounts in increments.items()],
+                        default=Value(0), output_field=models.IntegerField())
+        return self.filter(pk__in=list(increments)).update(
+            **{field: F(field) + added(index) for index, field in enumerate(fields)})
+
+
+class BaseEntityManager(models.Manager.from_queryset(BaseEntityQuerySet)):
+    """
+    Base manager for all entities.
+    Returns dead entities as well, use alive() for everything shown to users.
+    """
 
 
 class BaseEntity(models.Model):
     """
     Base class for all models
     """
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=generate_id, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     active = models.BooleanField(default=True)
 
+    # columns only changed with queryset updates, like the counters of core.counting, saving an instance never writes
+    # them back
+    COUNTER_FIELDS = ()
+
+    def save(self, *args, **kwargs):
+        stale_counters = self.COUNTER_FIELDS and not self._state.adding and not kwargs.get('force_insert')
+        if stale_counters and kwargs.get('update_fields') is None:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields
+                                       if not field.primary_key and field.name not in self.COUNTER_FIELDS
+                                       and field.attname not in deferred]
+        super().save(*args, **kwargs)
+
     def soft_delete(self):
         self.active = False
-        self.save()
+        self.save(update_fields=['active', 'updated_at'])
 
     class Meta:
         abstract = True
@@ -78,7 +129,7 @@ class BaseEntity(models.Model):
 ###############################################################################
 
 
-class UserManager(BaseUserManager):
+class UserManager(BaseUserManager.from_queryset(BaseEntityQuerySet)):
     """
     Custom user manager.
     """
@@ -129,10 +180,22 @@ class User(AbstractBaseUser, PermissionsMixin, BaseEntity):
     is_staff = models.BooleanField(default=False)
     is_superuser = models.BooleanField(default=False)
     elo = models.IntegerField(default=1000)
+    games = models.IntegerField(default=0)   # rated games, users who played one are on the global leaderboard
 
     objects = UserManager()
 
+    COUNTER_FIELDS = ('games',)
+
     USERNAME_FIELD = 'name'
 
     def __str__(self):
         return f"user object {self.name}"
+
+
+class UsedRefreshToken(models.Model):
+    """
+    Refresh token which was exchanged already, see core.tokens.refresh_user.
+    Rows are only needed until the token expires, `manage.py clear_refresh_tokens` removes them afterwards.
+    """
+    jti = models.CharField(max_length=32, primary_key=True)
+    expires_at = models.DateTimeField(db_index=True)
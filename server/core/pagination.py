@@ -0,0 +1,94 @@
+"""
+Keyset pagination.
+Rows are read in the order of a unique key, (created_at, id) by default, and a page continues after the key of the
+last row of the previous page. Unlike OFFSET, a deep page costs the same as the first one as long as an index on the
+key (behind the equality filters of the query) exists, and rows inserted meanwhile do not shift pages.
+"""
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+
+DEFAULT_KEY = ('created_at', 'id')
+
+
+def after(key, values):
+  """
+  Returns the condition selecting rows which come after values in the order of key.
+  Fields prefixed with '-' are descending, (a, b) > (x, y) is expanded to a > x OR (a = x AND b > y).
+  """
+  condition = None
+  for name, value in reversed(list(zip(key, values))):
+    field = name.lstrip('-')
+    beyond = Q(**{f"{field}__{'lt' if name.startswith('-') else 'gt'}": value})
+    condition = beyond if condition is None else beyond | (Q(**{field: value}) & condition)
+  return condition
+
+
+def key_values(row, key):
+  return [getattr(row, field.lstrip('-')) for field in key]
+
+
+def encode_cursor(values):
+  """Returns an opaque cursor for the given key values"""
+  data = [value.isoformat() if hasattr(value, 'isoformat') else str(value) for value in values]
+  return base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, model, key):
+  """Returns the key values stored in a cursor, converted by the fields of the model"""
+  try:
+    data = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+  except (ValueError, TypeError, binascii.Error):
+    raise ValueError('cursor is invalid')
+  if not isinstance(data, list) or len(data) != len(key):
+    raise ValueError('cursor is invalid')
+  fields = [model._meta.get_field(field.lstrip('-')) for field in key]
+  return [field.to_python(value) for field, value in zip(fields, data)]
+
+
+class Page:
+  """A page of rows and the cursor of the following page, None on the last page"""
+
+  def __init__(self, rows, next_cursor):
+    self.rows = rows
+    self.next_cursor = next_cursor
+
+
+class KeysetPaginator:
+  """Pages through a queryset in the order of a unique key"""
+
+  def __init__(self, queryset, key=DEFAULT_KEY, limit=50):
+    if limit < 1:
+      raise ValueError('limit must be positive')
+    self.queryset = queryset
+    self.key = tuple(key)
+    self.limit = limit
+
+  def page(self, cursor=None):
+    """Returns the page after the cursor, the first page without one"""
+    queryset = self.queryset.order_by(*self.key)
+    if cursor:
+      queryset = queryset.filter(after(self.key, decode_cursor(cursor, queryset.model, self.key)))
+    rows = list(queryset[:self.limit + 1])
+    if len(rows) <= self.limit:
+      return Page(rows, None)
+    rows = rows[:self.limit]
+    return Page(rows, encode_cursor(key_values(rows[-1], self.key)))
+
+
+def iterate(queryset, key=DEFAULT_KEY, chunk_size=1000):
+  """
+  Yields all rows of a queryset, chunk_size rows per query.
+  Meant for commands walking whole tables: every query is short, so no transaction or server side cursor is held
+  open while the rows are processed.
+  """
+  queryset = queryset.order_by(*key)
+  values = None
+  while True:
+    chunk = list((queryset if values is None else queryset.filter(after(key, values)))[:chunk_size])
+    yield from chunk
+    if len(chunk) < chunk_size:
+      return
+    values = key_values(chunk[-1], key)
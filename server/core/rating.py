@@ -0,0 +1,57 @@
+from core.models import User, asure_user
+from core.signals import rating_changed
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+WIN = 1.0
+DRAW = 0.5
+LOSS = 0.0
+
+
+def asure_score(score):
+  """check if score is a valid game outcome"""
+  if score not in (WIN, DRAW, LOSS):
+    raise ValueError('score must be 1 for a win, 0.5 for a draw or 0 for a loss')
+
+
+def expected_score(rating: int, opponent_rating: int):
+  """Returns the probability of winning against the opponent"""
+  return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+
+def rating_change(rating: int, opponent_rating: int, score: float, k_factor: int = None):
+  """Returns how much the rating changes after a game with the given score"""
+  if k_factor is None:
+    k_factor = getattr(settings, 'ELO_K_FACTOR', 32)
+  return round(k_factor * (score - expected_score(rating, opponent_rating)))
+
+
+def apply_result(player, opponent, score, k_factor: int = None):
+  """
+  Applies the outcome of a game between two users to their elo.
+  score is seen from the player, 1 for a win, 0.5 for a draw and 0 for a loss.
+  Both rows are locked in a consistent order, so concurrent results for the same users neither deadlock nor lose
+  updates. rating_changed is sent once the result is committed. Returns the rating delta of the player, the opponent
+  changes by the negated delta.
+  """
+  asure_user(player, "user")
+  asure_user(opponent, "user")
+  asure_score(score)
+  if player.pk == opponent.pk:
+    raise ValueError('a user can not play against themselves')
+
+  with transaction.atomic():
+    ratings = dict(User.objects.select_for_update().filter(pk__in=[player.pk, opponent.pk])
+                   .order_by('pk').values_list('pk', 'elo'))
+    delta = rating_change(ratings[player.pk], ratings[opponent.pk], score, k_factor)
+    player.elo = ratings[player.pk] + delta
+    opponent.elo = ratings[opponent.pk] - delta
+    User.objects.filter(pk=player.pk).update(elo=player.elo, games=F('games') + 1)
+    User.objects.filter(pk=opponent.pk).update(elo=opponent.elo, games=F('games') + 1)
+
+  # inside an outer transaction the signal waits for it, a rolled back result must not reach the leaderboards
+  transaction.on_commit(lambda: rating_changed.send(sender=User, user=player, delta=delta))
+  transaction.on_commit(lambda: rating_changed.send(sender=User, user=opponent, delta=-delta))
+
+  return delta
@@ -0,0 +1,121 @@
+"""
+Read replicas.
+Reads of the content models in REPLICAS['MODELS'] go to a random replica, everything else and all writes go to the
+primary. Replicas lag behind the primary, so a request reads from the primary once it wrote, and
+ReplicaPinMiddleware keeps the client on the primary for REPLICAS['PIN_SECONDS'] afterwards with a cookie, so it
+reads its own writes. Reads inside a transaction of the primary stay on the primary as well.
+Without replicas the router leaves every decision to Django.
+"""
+import asyncio
+import contextvars
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.utils.deprecation import MiddlewareMixin
+
+_pin = contextvars.ContextVar('replica_pin', default=None)
+
+
+def replica_settings():
+  config = getattr(settings, 'REPLICAS', {})
+  return {
+      'primary': config.get('PRIMARY', 'default'),
+      'replicas': list(config.get('REPLICAS', [])),
+      'models': set(config.get('MODELS', [])),
+      'pin_seconds': config.get('PIN_SECONDS', 5),
+      'cookie': config.get('COOKIE', 'primary_pin'),
+  }
+
+
+class Pin:
+  """Whether reads of the current request go to the primary, shared with the threads the request awaits"""
+
+  def __init__(self, pinned=False):
+    self.pinned = pinned
+    self.wrote = False
+
+  @property
+  def primary(self):
+    return self.pinned or self.wrote
+
+
+@contextmanager
+def use_primary():
+  """Sends all reads of the block to the primary"""
+  token = _pin.set(Pin(pinned=True))
+  try:
+    yield
+  finally:
+    _pin.reset(token)
+
+
+class ReplicaRouter:
+  """Database router of settings.REPLICAS"""
+
+  def db_for_read(self, model, **hints):
+    config = replica_settings()
+    if not config['replicas'] or model._meta.label_lower not in config['models']:
+      return None
+    pin = _pin.get()
+    if pin is not None and pin.primary:
+      return config['primary']
+    if connections[config['primary']].in_atomic_block:
+      return config['primary']
+    return random.choice(config['replicas'])
+
+  def db_for_write(self, model, **hints):
+    config = replica_settings()
+    if not config['replicas']:
+      return None
+    pin = _pin.get()
+    if pin is not None:
+      pin.wrote = True
+    return config['primary']
+
+  def allow_relation(self, obj1, obj2, **hints):
+    config = replica_settings()
+    databases = {config['primary'], *config['replicas']}
+    if obj1._state.db in databases and obj2._state.db in databases:
+      return True
+    return None
+
+  def allow_migrate(self, db, app_label, model_name=None, **hints):
+    # replicas get their tables by replication
+    return False if db in replica_settings()['replicas'] else None
+
+
+class ReplicaPinMiddleware(MiddlewareMixin):
+  """
+  Pins requests of clients which wrote less than REPLICAS['PIN_SECONDS'] ago to the primary.
+  Requests which wrote answer with the pin cookie.
+  """
+
+  def __call__(self, request):
+    if asyncio.iscoroutinefunction(self.get_response):
+      return self.__acall__(request)
+    pin, token = self.pin(request)
+    try:
+      response = self.get_response(request)
+    finally:
+      _pin.reset(token)
+    return self.pinned(pin, response)
+
+  async def __acall__(self, request):
+    pin, token = self.pin(request)
+    try:
+      response = await self.get_response(request)
+    finally:
+      _pin.reset(token)
+    return self.pinned(pin, response)
+
+  def pin(self, request):
+    pin = Pin(pinned=replica_settings()['cookie'] in request.COOKIES)
+    return pin, _pin.set(pin)
+
+  def pinned(self, pin, response):
+    config = replica_settings()
+    if pin.wrote and config['replicas']:
+      response.set_cookie(config['cookie'], '1', max_age=config['pin_seconds'], httponly=True, samesite='Lax')
+    return response
@@ -0,0 +1,7 @@
+from django.dispatch import Signal
+
+# sent with the user and the applied rating delta whenever the elo of a user changed
+rating_changed = Signal()
+
+# sent with the model as sender and the number of rows after a queryset soft deleted entities with a single update
+entities_soft_deleted = Signal()
@@ -0,0 +1,338 @@
+"""
+Sorted sets.
+A subset of the Redis sorted set commands (ZADD, ZINCRBY, ZREM, ZSCORE, ZREVRANK, ZREVRANGE, ZCARD), so leaderboards
+run on a Redis server in production and on an in-process skiplist in tests and single process deployments. Members
+are strings, ties of equal scores are ordered by member like Redis does.
+"""
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+MAX_LEVEL = 32
+BRANCHING = 0.25   # chance of a node to reach the next level, as in Redis
+
+
+class _Node:
+  __slots__ = ('score', 'member', 'forward', 'span')
+
+  def __init__(self, score, member, level):
+    self.score = score
+    self.member = member
+    self.forward = [None] * level
+    self.span = [0] * level   # nodes skipped by each forward pointer, used to compute ranks
+
+
+def _key(node):
+  return node.score, node.member
+
+
+class SkipList:
+  """
+  (score, member) pairs in ascending order.
+  Insert, delete, rank and access by rank take O(log n) on average, a range of m entries O(log n + m).
+  """
+
+  def __init__(self, seed=None):
+    self._random = random.Random(seed)
+    self._head = _Node(None, None, MAX_LEVEL)
+    self._level = 1
+    self._length = 0
+
+  def __len__(self):
+    return self._length
+
+  def _random_level(self):
+    level = 1
+    while level < MAX_LEVEL and self._random.random() < BRANCHING:
+      level += 1
+    return level
+
+  def _path(self, score, member):
+    """returns the last node before (score, member) on every level and the rank of each of them"""
+    update = [self._head] * MAX_LEVEL
+    ranks = [0] * MAX_LEVEL
+    node = self._head
+    for level in range(self._level - 1, -1, -1):
+      ranks[level] = ranks[level + 1] if level + 1 < self._level else 0
+      while node.forward[level] is not None and _key(node.forward[level]) < (score, member):
+        ranks[level] += node.span[level]
+        node = node.forward[level]
+      update[level] = node
+    return update, ranks
+
+  def insert(self, score, member):
+    """Inserts a pair which must not be in the list yet"""
+    update, ranks = self._path(score, member)
+    level = self._random_level()
+    if level > self._level:
+      for new in range(self._level, level):
+        ranks[new] = 0
+        update[new] = self._head
+        self._head.span[new] = self._length
+      self._level = level
+
+    node = _Node(score, member, level)
+    for index in range(level):
+      node.forward[index] = update[index].forward[index]
+      update[index].forward[index] = node
+      # the span of the predecessor is split at the new node
+      node.span[index] = update[index].span[index] - (ranks[0] - ranks[index])
+      update[index].span[index] = ranks[0] - ranks[index] + 1
+    for index in range(level, self._level):
+      update[index].span[index] += 1
+    self._length += 1
+
+  def delete(self, score, member):
+    """Deletes a pair, returns whether it was in the list"""
+    update, _ = self._path(score, member)
+    node = update[0].forward[0]
+    if node is None or node.score != score or node.member != member:
+      return False
+    for index in range(self._level):
+      if update[index].forward[index] is node:
+        update[index].span[index] += node.span[index] - 1
+        update[index].forward[index] = node.forward[index]
+      else:
+        update[index].span[index] -= 1
+    while self._level > 1 and self._head.forward[self._level - 1] is None:
+      self._level -= 1
+    self._length -= 1
+    return True
+
+  def rank(self, score, member):
+    """Returns the 0 based ascending rank of a pair, None if it is not in the list"""
+    rank = 0
+    node = self._head
+    for level in range(self._level - 1, -1, -1):
+      while node.forward[level] is not None and _key(node.forward[level]) <= (score, member):
+        rank += node.span[level]
+        node = node.forward[level]
+      if node is not self._head and node.member == member and node.score == score:
+        return rank - 1
+    return None
+
+  def _by_rank(self, rank):
+    """returns the node at a 0 based ascending rank"""
+    traversed = 0
+    node = self._head
+    for level in range(self._level - 1, -1, -1):
+      while node.forward[level] is not None and traversed + node.span[level] <= rank + 1:
+        traversed += node.span[level]
+        node = node.forward[level]
+      if traversed == rank + 1:
+        return node
+    return None
+
+  def range(self, start, stop):
+    """Returns the (score, member) pairs from ascending rank start to stop, both included"""
+    if start > stop or start >= self._length:
+      return []
+    node = self._by_rank(start)
+    pairs = []
+    for _ in range(min(stop, self._length - 1) - start + 1):
+      pairs.append((node.score, node.member))
+      node = node.forward[0]
+    return pairs
+
+
+class SortedSets:
+  """Interface of the sorted set backends, keys name independent sets"""
+
+  def zadd(self, key, mapping):
+    """Sets the scores of {member: score}, returns the number of added members"""
+    raise NotImplementedError
+
+  def zincrby(self, key, amount, member):
+    """Adds amount to the score of a member, missing members start at 0, returns the new score"""
+    raise NotImplementedError
+
+  def zrem(self, key, *members):
+    raise NotImplementedError
+
+  def zscore(self, key, member):
+    raise NotImplementedError
+
+  def zrevrank(self, key, member):
+    """Returns the 0 based rank of a member from the highest score, None if it is not in the set"""
+    raise NotImplementedError
+
+  def zrevrange(self, key, start, stop, withscores=False):
+    """Returns the members from the highest score, start and stop are included and may count from the end"""
+    raise NotImplementedError
+
+  def zcard(self, key):
+    raise NotImplementedError
+
+  def delete(self, key):
+    raise NotImplementedError
+
+  def expire(self, key, seconds):
+    raise NotImplementedError
+
+
+class _Set:
+  """a skiplist with the scores of its members"""
+
+  def __init__(self):
+    self.scores = {}
+    self.list = SkipList()
+    self.expires_at = None
+
+
+class InMemorySortedSets(SortedSets):
+  """
+  Sorted sets in process memory, shared by the threads of one process.
+  Meant for tests and single process deployments: other processes keep boards of their own and everything is lost on
+  restart, including the weekly boards which can not be rebuilt.
+  """
+
+  def __init__(self):
+    self._sets = {}
+    self._lock = threading.Lock()
+
+  def _get(self, key, create=False):
+    entry = self._sets.get(key)
+    if entry is not None and entry.expires_at is not None and entry.expires_at <= time.monotonic():
+      del self._sets[key]
+      entry = None
+    if entry is None and create:
+      entry = self._sets[key] = _Set()
+    return entry
+
+  def _set_score(self, entry, member, score):
+    old = entry.scores.get(member)
+    if old is not None:
+      entry.list.delete(old, member)
+    entry.scores[member] = score
+    entry.list.insert(score, member)
+    return old is None
+
+  def zadd(self, key, mapping):
+    with self._lock:
+      entry = self._get(key, create=True)
+      return sum(self._set_score(entry, str(member), score) for member, score in mapping.items())
+
+  def zincrby(self, key, amount, member):
+    with self._lock:
+      entry = self._get(key, create=True)
+      score = entry.scores.get(str(member), 0) + amount
+      self._set_score(entry, str(member), score)
+      return score
+
+  def zrem(self, key, *members):
+    with self._lock:
+      entry = self._get(key)
+      removed = 0
+      for member in map(str, members):
+        if entry is not None and member in entry.scores:
+          entry.list.delete(entry.scores.pop(member), member)
+          removed += 1
+      return removed
+
+  def zscore(self, key, member):
+    with self._lock:
+      entry = self._get(key)
+      return None if entry is None else entry.scores.get(str(member))
+
+  def zrevrank(self, key, member):
+    with self._lock:
+      entry = self._get(key)
+      if entry is None or str(member) not in entry.scores:
+        return None
+      return len(entry.list) - 1 - entry.list.rank(entry.scores[str(member)], str(member))
+
+  def zrevrange(self, key, start, stop, withscores=False):
+    with self._lock:
+      entry = self._get(key)
+      if entry is None:
+        return []
+      length = len(entry.list)
+      start, stop = start + length if start < 0 else start, stop + length if stop < 0 else stop
+      start = max(start, 0)
+      if start > stop or start >= length:
+        return []
+      stop = min(stop, length - 1)
+      # descending ranks start..stop are the ascending ranks length-1-stop..length-1-start
+      pairs = entry.list.range(length - 1 - stop, length - 1 - start)[::-1]
+    return [(member, score) for score, member in pairs] if withscores else [member for _, member in pairs]
+
+  def zcard(self, key):
+    with self._lock:
+      entry = self._get(key)
+      return 0 if entry is None else len(entry.list)
+
+  def delete(self, key):
+    with self._lock:
+      self._sets.pop(key, None)
+
+  def expire(self, key, seconds):
+    with self._lock:
+      entry = self._get(key)
+      if entry is not None:
+        entry.expires_at = time.monotonic() + seconds
+
+
+class RedisSortedSets(SortedSets):
+  """
+  Sorted sets in Redis.
+  Takes a redis-py compatible client or a url, in which case the redis package has to be installed.
+  """
+
+  def __init__(self, client=None, url=None, prefix='sortedset'):
+    if client is None:
+      try:
+        import redis
+      except ImportError:
+        raise ImproperlyConfigured('RedisSortedSets needs the redis package or a client')
+      client = redis.Redis.from_url(url or 'redis://localhost:6379/0', decode_responses=True)
+    self.client = client
+    self.prefix = prefix
+
+  def _key(self, key):
+    return f'{self.prefix}:{key}'
+
+  def zadd(self, key, mapping):
+    return self.client.zadd(self._key(key), {str(member): score for member, score in mapping.items()})
+
+  def zincrby(self, key, amount, member):
+    return self.client.zincrby(self._key(key), amount, str(member))
+
+  def zrem(self, key, *members):
+    return self.client.zrem(self._key(key), *map(str, members)) if members else 0
+
+  def zscore(self, key, member):
+    return self.client.zscore(self._key(key), str(member))
+
+  def zrevrank(self, key, member):
+    return self.client.zrevrank(self._key(key), str(member))
+
+  def zrevrange(self, key, start, stop, withscores=False):
+    return self.client.zrevrange(self._key(key), start, stop, withscores=withscores)
+
+  def zcard(self, key):
+    return self.client.zcard(self._key(key))
+
+  def delete(self, key):
+    self.client.delete(self._key(key))
+
+  def expire(self, key, seconds):
+    self.client.expire(self._key(key), seconds)
+
+
+_sorted_sets = None
+_sorted_sets_lock = threading.Lock()
+
+
+def get_sorted_sets():
+  """Returns the sorted sets configured in settings.SORTED_SETS, created once per process"""
+  global _sorted_sets
+  with _sorted_sets_lock:
+    if _sorted_sets is None:
+      config = getattr(settings, 'SORTED_SETS', {})
+      backend = import_string(config.get('BACKEND', 'core.sortedset.InMemorySortedSets'))
+      _sorted_sets = backend(**config.get('OPTIONS', {}))
+    return _sorted_sets
@@ -0,0 +1,78 @@
+from unittest import mock
+
+from core.cache import LocalMemoryCache, ReadThroughCache
+from django.test import SimpleTestCase
+
+
+class LocalMemoryCacheTests(SimpleTestCase):
+
+  def test_least_recently_used_entries_are_evicted(self):
+    """Test the least recently used entry is evicted once the cache is full"""
+    cache = LocalMemoryCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    self.assertEqual(cache.get('a'), 1)
+    self.assertIsNone(cache.get('b'))
+    self.assertEqual(cache.evictions, 1)
+
+  def test_entries_expire(self):
+    """Test entries are gone after their ttl"""
+    cache = LocalMemoryCache()
+    with mock.patch('core.cache.time.monotonic', return_value=100):
+      cache.set('a', 1, ttl=10)
+    with mock.patch('core.cache.time.monotonic', return_value=109):
+      self.assertEqual(cache.get('a'), 1)
+    with mock.patch('core.cache.time.monotonic', return_value=110):
+      self.assertIsNone(cache.get('a'))
+    self.assertEqual(cache.evictions, 1)
+
+  def test_counters_are_never_evicted(self):
+    """Test counters survive a full cache"""
+    cache = LocalMemoryCache(max_entries=1)
+    self.assertEqual(cache.incr('version'), 1)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    self.assertEqual(cache.incr('version'), 2)
+
+
+class ReadThroughCacheTests(SimpleTestCase):
+
+  def setUp(self):
+    self.cache = ReadThroughCache(LocalMemoryCache(), ttl=60)
+    self.loads = 0
+
+  def load(self):
+    self.loads += 1
+    return {'loads': self.loads}
+
+  def test_values_are_loaded_once(self):
+    """Test a cached value is only loaded on the first read"""
+    self.assertEqual(self.cache.get('word', 1, self.load), {'loads': 1})
+    self.assertEqual(self.cache.get('word', 1, self.load), {'loads': 1})
+    self.assertEqual(self.cache.metrics(), {'hits': 1, 'misses': 1, 'evictions': 0})
+
+  def test_none_is_not_cached(self):
+    """Test missing objects are loaded again"""
+    self.cache.get('word', 1, lambda: None)
+    self.assertEqual(self.cache.get('word', 1, self.load), {'loads': 1})
+
+  def test_invalidate_key(self):
+    """Test invalidating a key reloads only that key"""
+    self.cache.get('word', 1, self.load)
+    self.cache.get('word', 2, self.load)
+    self.cache.invalidate('word', 1)
+
+    self.assertEqual(self.cache.get('word', 1, self.load), {'loads': 3})
+    self.assertEqual(self.cache.get('word', 2, self.load), {'loads': 2})
+
+  def test_invalidate_namespace(self):
+    """Test invalidating a namespace reloads all of its keys but not other namespaces"""
+    self.cache.get('word', 1, self.load)
+    self.cache.get('language', 1, self.load)
+    self.cache.invalidate('word')
+
+    self.assertEqual(self.cache.get('word', 1, self.load), {'loads': 3})
+    self.assertEqual(self.cache.get('language', 1, self.load), {'loads': 2})
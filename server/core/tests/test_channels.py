@@ -0,0 +1,40 @@
+from core.channels import InMemoryChannelLayer
+from django.test import SimpleTestCase
+
+
+class InMemoryChannelLayerTests(SimpleTestCase):
+
+  async def test_groups_fan_out(self):
+    """Test every subscription of a group receives the messages sent to it, in order"""
+    layer = InMemoryChannelLayer()
+    first = await layer.subscribe('duel')
+    second = await layer.subscribe('duel')
+    other = await layer.subscribe('other')
+    await layer.send('duel', {'index': 0})
+    await layer.send('duel', {'index': 1})
+
+    for subscription in (first, second):
+      self.assertEqual(await subscription.receive(), {'index': 0})
+      self.assertEqual(await subscription.receive(), {'index': 1})
+    self.assertIsNone(await other.receive(timeout=0))
+
+  async def test_unsubscribe(self):
+    """Test unsubscribed receivers get nothing and empty groups are dropped"""
+    layer = InMemoryChannelLayer()
+    subscription = await layer.subscribe('duel')
+    await layer.unsubscribe(subscription)
+    await layer.send('duel', {'index': 0})
+
+    self.assertIsNone(await subscription.receive(timeout=0))
+    self.assertEqual(layer.groups, {})
+
+  async def test_full_subscriptions_drop_messages(self):
+    """Test a receiver which does not keep up does not block the sender"""
+    layer = InMemoryChannelLayer(capacity=1)
+    subscription = await layer.subscribe('duel')
+    with self.assertLogs('core.channels', 'WARNING'):
+      await layer.send('duel', {'index': 0})
+      await layer.send('duel', {'index': 1})
+
+    self.assertEqual(await subscription.receive(), {'index': 0})
+    self.assertIsNone(await subscription.receive(timeout=0))
@@ -0,0 +1,100 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from core.connections import HealthCheckMixin, get_pool, wait_for_database
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.backends.sqlite3 import base
+from django.db.utils import OperationalError
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+
+class DatabaseWrapper(HealthCheckMixin, base.DatabaseWrapper):
+  pass
+
+
+class HealthCheckTests(SimpleTestCase):
+
+  def setUp(self):
+    # in memory databases are never closed by the sqlite backend
+    directory = tempfile.TemporaryDirectory()
+    self.addCleanup(directory.cleanup)
+    self.wrapper = DatabaseWrapper({**connection.settings_dict, 'NAME': os.path.join(directory.name, 'health.db'),
+                                    'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True}, alias='health')
+    self.addCleanup(self.wrapper.close)
+
+  def query(self):
+    with self.wrapper.cursor() as cursor:
+      cursor.execute('SELECT 1')
+
+  def test_checked_once_per_request(self):
+    """Test a reused connection is checked before the first query of a request only"""
+    self.query()
+    with mock.patch.object(DatabaseWrapper, 'is_usable', return_value=True) as is_usable:
+      self.query()
+      self.wrapper.close_if_unusable_or_obsolete()
+      self.query()
+      self.query()
+    self.assertEqual(is_usable.call_count, 1)
+
+  def test_unusable_connection_is_replaced(self):
+    """Test a connection failing the check is replaced by a new one"""
+    self.query()
+    broken = self.wrapper.connection
+    self.wrapper.close_if_unusable_or_obsolete()
+    with mock.patch.object(DatabaseWrapper, 'is_usable', return_value=False):
+      self.query()
+    self.assertIsNot(self.wrapper.connection, broken)
+
+  def test_disabled(self):
+    """Test connections are not checked without CONN_HEALTH_CHECKS"""
+    self.wrapper.settings_dict['CONN_HEALTH_CHECKS'] = False
+    self.query()
+    self.wrapper.close_if_unusable_or_obsolete()
+    with mock.patch.object(DatabaseWrapper, 'is_usable') as is_usable:
+      self.query()
+    is_usable.assert_not_called()
+
+
+class ConnectionTests(TestCase):
+
+  def test_pool(self):
+    """Test the pool is only used with a size and shared by all callers"""
+    with override_settings(DATABASE_POOL={'SIZE': 0}):
+      self.assertIsNone(get_pool())
+    with override_settings(DATABASE_POOL={'SIZE': 2}):
+      self.assertIs(get_pool(), get_pool())
+      self.assertEqual(get_pool()._max_workers, 2)
+
+  def test_wait_for_database(self):
+    """Test the database is probed until it answers"""
+    retries = []
+    probe = mock.patch('core.connections.probe', side_effect=[OperationalError, OperationalError, None])
+    with probe, mock.patch('core.connections.time.sleep'):
+      self.assertEqual(wait_for_database(timeout=10, on_retry=lambda attempt, error: retries.append(attempt)), 3)
+    self.assertEqual(retries, [1, 2])
+    self.assertEqual(wait_for_database(), 1)
+
+  def test_wait_for_db_command(self):
+    """Test the command fails once the timeout passed"""
+    out = StringIO()
+    call_command('wait_for_db', stdout=out)
+    self.assertIn('Database available after 1 attempts!', out.getvalue())
+    with mock.patch('core.connections.probe', side_effect=OperationalError('refused')):
+      with self.assertRaises(CommandError):
+        call_command('wait_for_db', '--timeout=0', stdout=StringIO())
+
+
+class BenchRequestsTests(TransactionTestCase):
+
+  def test_bench_requests(self):
+    """Test the benchmark reports every configuration"""
+    get_user_model().objects.create_user(name='testuser', password='testpassword')
+    out = StringIO()
+    call_command('bench_requests', '--requests=4', '--concurrency=2', '--pool-size=1', '--user=testuser',
+                 '--host=testserver', stdout=out)
+    for name in ('per-request', 'persistent', 'pooled'):
+      self.assertRegex(out.getvalue(), rf'{name}: \d+ requests/s, 0 errors, \d+ connections opened')
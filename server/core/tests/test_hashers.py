@@ -0,0 +1,37 @@
+from django.contrib.auth import authenticate, get_user_model
+from django.test import TestCase, override_settings
+
+MD5 = ['django.contrib.auth.hashers.MD5PasswordHasher']
+PBKDF2 = ['core.hashers.PBKDF2PasswordHasher', *MD5]
+
+
+class HasherTests(TestCase):
+
+  @override_settings(PASSWORD_HASHERS=PBKDF2, PASSWORD_HASHING={'PBKDF2_ITERATIONS': 1000})
+  def test_costs_are_read_from_settings(self):
+    """Test new passwords are hashed with the configured costs"""
+    user = get_user_model().objects.create_user(name='testuser', password='testpassword')
+    self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+
+  def test_rehash_on_login_with_other_hasher(self):
+    """Test passwords of a hasher which is no longer the first are rehashed on login"""
+    with override_settings(PASSWORD_HASHERS=MD5):
+      user = get_user_model().objects.create_user(name='testuser', password='testpassword')
+    self.assertTrue(user.password.startswith('md5$'))
+    with override_settings(PASSWORD_HASHERS=PBKDF2, PASSWORD_HASHING={'PBKDF2_ITERATIONS': 1000}):
+      self.assertEqual(authenticate(name='testuser', password='testpassword'), user)
+    user.refresh_from_db()
+    self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+
+  @override_settings(PASSWORD_HASHERS=PBKDF2)
+  def test_rehash_on_login_with_other_costs(self):
+    """Test passwords are rehashed on login when the costs changed, failed logins change nothing"""
+    with self.settings(PASSWORD_HASHING={'PBKDF2_ITERATIONS': 1000}):
+      user = get_user_model().objects.create_user(name='testuser', password='testpassword')
+    with self.settings(PASSWORD_HASHING={'PBKDF2_ITERATIONS': 2000}):
+      self.assertIsNone(authenticate(name='testuser', password='wrongpassword'))
+      user.refresh_from_db()
+      self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+      authenticate(name='testuser', password='testpassword')
+    user.refresh_from_db()
+    self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))
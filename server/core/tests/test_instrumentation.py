@@ -0,0 +1,57 @@
+from core.instrumentation import QueryBudgetExceeded, query_budget, record_queries, request_metrics
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+
+@override_settings(API_THREAD_SENSITIVE=True)
+class InstrumentationTests(TestCase):
+
+  def setUp(self):
+    request_metrics.clear()
+    self.user = get_user_model().objects.create_user(name='testuser', password='testpassword')
+    self.async_client.force_login(self.user)
+
+  def test_record_queries(self):
+    """Test queries of the block are counted and the slowest one is kept"""
+    with record_queries() as metrics:
+      list(get_user_model().objects.all())
+      get_user_model().objects.filter(name='testuser').exists()
+    get_user_model().objects.count()
+
+    self.assertEqual(metrics.count, 2)
+    self.assertGreater(metrics.duration, 0)
+    self.assertIn('core_user', metrics.slowest_sql)
+
+  def test_query_budget(self):
+    """Test blocks over the budget fail"""
+    with query_budget(1):
+      get_user_model().objects.count()
+    with self.assertRaises(QueryBudgetExceeded):
+      with query_budget(1):
+        get_user_model().objects.count()
+        get_user_model().objects.count()
+
+  async def test_async_views_are_measured(self):
+    """Test queries run by sync_to_async threads of async views are counted for the request"""
+    response = await self.async_client.get(reverse('game:packages'))
+
+    timing = response['Server-Timing']
+    self.assertRegex(timing, r'^db;dur=[\d.]+;desc="[1-9]\d* queries", slowest;dur=[\d.]+, total;dur=[\d.]+$')
+    self.assertIn('http_requests_total{view="game:packages",method="GET",status="200"} 1', request_metrics.render())
+
+  @override_settings(INSTRUMENTATION={'QUERY_BUDGET': 0, 'STRICT': True})
+  def test_strict_budget(self):
+    """Test requests over the budget fail in strict mode"""
+    self.client.force_login(self.user)
+    with self.assertRaises(QueryBudgetExceeded):
+      self.client.get(reverse('game:sync'))
+
+  @override_settings(INSTRUMENTATION={'METRICS_TOKEN': 'scraper'})
+  def test_metrics_endpoint(self):
+    """Test metrics are served to staff and to scrapers with the token"""
+    self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+    response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scraper')
+    self.assertEqual(response.status_code, 200)
+    self.assertIn('# TYPE http_request_duration_seconds histogram', response.content.decode())
+    self.assertIn('http_requests_total{view="metrics",method="GET",status="401"} 1', response.content.decode())
@@ -0,0 +1,59 @@
+from core.leaderboard import GLOBAL, Entry, Leaderboard, weekly_board
+from core.rating import LOSS, WIN, apply_result
+from core.sortedset import InMemorySortedSets
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+
+class LeaderboardTests(SimpleTestCase):
+
+  def setUp(self):
+    self.board = Leaderboard('test', InMemorySortedSets())
+    self.board.set({f'user{index:02d}': 1000 + index * 10 for index in range(20)})
+
+  def test_top_and_rank(self):
+    """Test the top entries and the rank of a user"""
+    self.assertEqual(self.board.top(2), [Entry(1, 'user19', 1190), Entry(2, 'user18', 1180)])
+    self.assertEqual(self.board.rank('user19'), 1)
+    self.assertEqual(self.board.rank('user00'), 20)
+    self.assertIsNone(self.board.rank('nobody'))
+    with self.assertRaises(ValueError):
+      self.board.top(0)
+
+  def test_around(self):
+    """Test the entries around a user are cut at the ends of the board"""
+    self.assertEqual([entry.rank for entry in self.board.around('user10', radius=2)], [8, 9, 10, 11, 12])
+    self.assertEqual([entry.user_id for entry in self.board.around('user18', radius=2)],
+                     ['user19', 'user18', 'user17', 'user16'])
+    self.assertEqual(self.board.around('nobody'), [])
+
+  def test_increment_and_remove(self):
+    """Test incremented users move up and removed users leave the board"""
+    self.board.increment('user00', 500)
+    self.assertEqual(self.board.rank('user00'), 1)
+    self.board.remove('user00')
+    self.assertEqual(len(self.board), 19)
+
+
+class RatingLeaderboardTests(TestCase):
+
+  def setUp(self):
+    Leaderboard(GLOBAL).clear()
+    Leaderboard(weekly_board()).clear()
+    self.player = get_user_model().objects.create_user(name='testplayer', password='testpassword')
+    self.opponent = get_user_model().objects.create_user(name='testopponent', password='testpassword')
+
+  def test_results_move_users(self):
+    """Test applied results update the global board and add to the weekly board"""
+    with self.captureOnCommitCallbacks(execute=True):
+      apply_result(self.player, self.opponent, WIN)
+      apply_result(self.player, self.opponent, LOSS)
+
+    board = Leaderboard(GLOBAL)
+    self.assertEqual(board.score(self.player.pk), self.player.elo)
+    self.assertEqual(board.score(self.opponent.pk), self.opponent.elo)
+    weekly = Leaderboard(weekly_board())
+    self.assertEqual(weekly.score(self.player.pk), self.player.elo - 1000)
+    self.assertEqual(board.rank(self.player.pk), 1 if self.player.elo > self.opponent.elo else 2)
+    self.player.refresh_from_db()
+    self.assertEqual(self.player.games, 2)
@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+from core.pagination import KeysetPaginator, after, iterate
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+
+class KeysetPaginationTests(TestCase):
+
+  def setUp(self):
+    User = get_user_model()
+    now = timezone.now()
+    for index in range(5):
+      User.objects.create_user(name=f'testuser{index}', password='testpassword')
+    # two users share a timestamp, so the id has to break the tie
+    users = list(User.objects.order_by('name'))
+    for index, user in enumerate(users):
+      User.objects.filter(pk=user.pk).update(created_at=now + timedelta(seconds=min(index, 3)))
+    self.expected = list(User.objects.order_by('created_at', 'id').values_list('name', flat=True))
+    self.users = User.objects.all()
+
+  def test_pages_cover_all_rows_once(self):
+    """Test following the cursors returns every row exactly once in key order"""
+    paginator = KeysetPaginator(self.users, limit=2)
+    names, cursor, pages = [], None, 0
+    while True:
+      page = paginator.page(cursor)
+      names.extend(user.name for user in page.rows)
+      pages += 1
+      cursor = page.next_cursor
+      if cursor is None:
+        break
+
+    self.assertEqual(names, self.expected)
+    self.assertEqual(pages, 3)
+
+  def test_exact_last_page_has_no_cursor(self):
+    """Test a page ending on the last row does not point to an empty page"""
+    page = KeysetPaginator(self.users, limit=5).page()
+    self.assertEqual(len(page.rows), 5)
+    self.assertIsNone(page.next_cursor)
+
+  def test_descending_key(self):
+    """Test keys with descending fields page backwards"""
+    paginator = KeysetPaginator(self.users, key=('-created_at', '-id'), limit=3)
+    first = paginator.page()
+    second = paginator.page(first.next_cursor)
+    self.assertEqual([user.name for user in first.rows + second.rows], self.expected[::-1])
+
+  def test_invalid_cursor(self):
+    """Test broken cursors raise ValueError"""
+    with self.assertRaises(ValueError):
+      KeysetPaginator(self.users).page('broken')
+
+  def test_iterate(self):
+    """Test iterate walks the whole table in chunks"""
+    with self.assertNumQueries(3):
+      names = [user.name for user in iterate(self.users, chunk_size=2)]
+    self.assertEqual(names, self.expected)
+
+  def test_after(self):
+    """Test the condition is the lexicographic comparison of the key"""
+    self.assertEqual(str(after(('created_at', 'id'), (1, 2))),
+                     "(OR: ('created_at__gt', 1), (AND: ('created_at', 1), ('id__gt', 2)))")
@@ -0,0 +1,208 @@
+import threading
+
+from core.matchmaking import InMemoryMatchmakingQueue, RedisMatchmakingQueue, get_matchmaking_queue
+from core.rating import DRAW, LOSS, WIN, apply_result, expected_score, rating_change
+from core.signals import rating_changed
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+
+
+class RatingTests(TestCase):
+
+  def setUp(self):
+    self.player = get_user_model().objects.create_user(name='testplayer', password='testpassword')
+    self.opponent = get_user_model().objects.create_user(name='testopponent', password='testpassword')
+
+  def test_expected_score(self):
+    """Test equal ratings are expected to draw and a 400 point gap to win ten to one"""
+    self.assertEqual(expected_score(1000, 1000), 0.5)
+    self.assertAlmostEqual(expected_score(1400, 1000), 10 / 11)
+
+  def test_rating_change(self):
+    """Test rating changes scale with the k factor and the surprise of the result"""
+    self.assertEqual(rating_change(1000, 1000, WIN, k_factor=32), 16)
+    self.assertEqual(rating_change(1000, 1000, DRAW, k_factor=32), 0)
+    self.assertLess(rating_change(1400, 1000, WIN, k_factor=32), 16)
+
+  def test_apply_result_successful(self):
+    """Test applying a win moves elo from the loser to the winner"""
+    delta = apply_result(self.player, self.opponent, WIN)
+
+    self.assertEqual(delta, 16)
+    self.player.refresh_from_db()
+    self.opponent.refresh_from_db()
+    self.assertEqual(self.player.elo, 1016)
+    self.assertEqual(self.opponent.elo, 984)
+
+  def test_apply_result_uses_current_ratings(self):
+    """Test results are computed from the stored ratings, not from stale objects"""
+    get_user_model().objects.filter(pk=self.opponent.pk).update(elo=1400)
+    apply_result(self.player, self.opponent, LOSS)
+
+    self.opponent.refresh_from_db()
+    self.assertEqual(self.opponent.elo, 1400 + rating_change(1400, 1000, WIN))
+
+  def test_apply_result_sends_signal(self):
+    """Test a rating_changed signal is sent for both users once the result is committed"""
+    received = []
+
+    def receiver(sender, user, delta, **kwargs):
+      received.append((user.pk, delta))
+    rating_changed.connect(receiver)
+    try:
+      with self.captureOnCommitCallbacks(execute=True):
+        apply_result(self.player, self.opponent, WIN)
+        self.assertEqual(received, [])
+      self.assertEqual(received, [(self.player.pk, 16), (self.opponent.pk, -16)])
+
+      received.clear()
+      with self.assertRaises(RuntimeError), self.captureOnCommitCallbacks(execute=True):
+        with transaction.atomic():
+          apply_result(self.player, self.opponent, WIN)
+          raise RuntimeError('rolled back')
+      self.assertEqual(received, [])
+    finally:
+      rating_changed.disconnect(receiver)
+
+  def test_apply_result_against_themselves(self):
+    """Test a user can not play against themselves"""
+    with self.assertRaises(ValueError):
+      apply_result(self.player, self.player, WIN)
+
+  def test_apply_result_with_invalid_score(self):
+    """Test only wins, draws and losses are accepted"""
+    with self.assertRaises(ValueError):
+      apply_result(self.player, self.opponent, 2)
+
+
+class MatchmakingQueueTests(SimpleTestCase):
+
+  def setUp(self):
+    self.queue = InMemoryMatchmakingQueue(base_window=50, window_growth=10, max_window=400)
+
+  def test_close_ratings_match_right_away(self):
+    """Test a player is matched with a waiting player inside the window"""
+    self.assertIsNone(self.queue.enqueue('a', 1000, now=0))
+    match = self.queue.enqueue('b', 1040, now=0)
+
+    self.assertEqual([ticket.user_id for ticket in match.players], ['a', 'b'])
+    self.assertEqual(len(self.queue), 0)
+
+  def test_closest_opponent_is_chosen(self):
+    """Test the opponent with the closest rating is chosen"""
+    self.queue.enqueue('far', 940, now=0)
+    self.queue.enqueue('close', 1010, now=0)
+    match = self.queue.enqueue('new', 1000, now=0)
+
+    self.assertEqual(match.players[0].user_id, 'close')
+    self.assertEqual(len(self.queue), 1)
+
+  def test_window_expands_while_waiting(self):
+    """Test distant players are matched once they waited long enough"""
+    self.queue.enqueue('a', 1000, now=0)
+    self.assertIsNone(self.queue.enqueue('b', 1200, now=0))
+    self.assertEqual(self.queue.match_waiting(now=10), [])
+
+    matches = self.queue.match_waiting(now=15)
+    self.assertEqual(len(matches), 1)
+    self.assertEqual(matches[0].rating_difference, 200)
+    self.assertEqual(len(self.queue), 0)
+
+  def test_window_is_capped(self):
+    """Test players further apart than max_window are never matched"""
+    self.queue.enqueue('a', 1000, now=0)
+    self.queue.enqueue('b', 1500, now=0)
+
+    self.assertEqual(self.queue.match_waiting(now=1000), [])
+
+  def test_cancel(self):
+    """Test cancelled players are not matched"""
+    self.queue.enqueue('a', 1000, now=0)
+    self.assertTrue(self.queue.cancel('a'))
+    self.assertFalse(self.queue.cancel('a'))
+
+    self.assertIsNone(self.queue.enqueue('b', 1000, now=0))
+
+  def test_enqueue_twice(self):
+    """Test a player can only wait once"""
+    self.queue.enqueue('a', 1000, now=0)
+    with self.assertRaises(ValueError):
+      self.queue.enqueue('a', 1000, now=0)
+
+  def test_get_matchmaking_queue(self):
+    """Test the configured queue is created"""
+    queue = get_matchmaking_queue()
+    self.assertIsInstance(queue, InMemoryMatchmakingQueue)
+    self.assertEqual(queue.max_window, 400)
+
+
+class FakeRedis:
+  """the redis commands the matchmaking queue uses, on dicts"""
+
+  def __init__(self):
+    self.sets = {}
+    self.hashes = {}
+    self.locks = {}
+
+  def lock(self, name, timeout=None, blocking_timeout=None):
+    return self.locks.setdefault(name, threading.Lock())
+
+  def zadd(self, key, mapping):
+    self.sets.setdefault(key, {}).update(mapping)
+
+  def zrangebyscore(self, key, low, high):
+    scores = self.sets.get(key, {})
+    return sorted((member for member, score in scores.items() if low <= score <= high), key=scores.get)
+
+  def zrem(self, key, *members):
+    for member in members:
+      self.sets.get(key, {}).pop(member, None)
+
+  def zcard(self, key):
+    return len(self.sets.get(key, {}))
+
+  def hset(self, key, field, value):
+    self.hashes.setdefault(key, {})[field] = value
+
+  def hmget(self, key, fields):
+    return [self.hashes.get(key, {}).get(field) for field in fields]
+
+  def hexists(self, key, field):
+    return field in self.hashes.get(key, {})
+
+  def hkeys(self, key):
+    return list(self.hashes.get(key, {}))
+
+  def hdel(self, key, *fields):
+    for field in fields:
+      self.hashes.get(key, {}).pop(field, None)
+
+
+class RedisMatchmakingQueueTests(MatchmakingQueueTests):
+
+  def setUp(self):
+    self.client = FakeRedis()
+    self.queue = self.create_queue()
+
+  def create_queue(self, name='default'):
+    return RedisMatchmakingQueue(client=self.client, name=name, base_window=50, window_growth=10, max_window=400)
+
+  def test_get_matchmaking_queue(self):
+    """Test the redis queue is created with the configured options"""
+    with override_settings(MATCHMAKING={'BACKEND': 'core.matchmaking.RedisMatchmakingQueue',
+                                        'OPTIONS': {'client': self.client, 'max_window': 300}}):
+      queue = get_matchmaking_queue('package:1')
+    self.assertIsInstance(queue, RedisMatchmakingQueue)
+    self.assertEqual(queue.max_window, 300)
+
+  def test_processes_share_the_queue(self):
+    """Test players queued by different processes are paired, and only queues of the same name meet"""
+    self.assertIsNone(self.queue.enqueue('a', 1000, now=0))
+    self.assertIsNone(self.create_queue('other').enqueue('b', 1000, now=0))
+    other_process = self.create_queue()
+    self.assertEqual(len(other_process), 1)
+
+    match = other_process.enqueue('c', 1020, now=0)
+    self.assertEqual([ticket.user_id for ticket in match.players], ['a', 'c'])
+    self.assertEqual(len(self.queue), 0)
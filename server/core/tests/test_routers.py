@@ -0,0 +1,77 @@
+from unittest import mock
+
+from content.models import Word
+from core.routers import ReplicaPinMiddleware, ReplicaRouter, use_primary
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from game.models import Learning
+
+REPLICAS = {'PRIMARY': 'default', 'REPLICAS': ['replica'], 'MODELS': ['content.word'], 'PIN_SECONDS': 5}
+
+
+@override_settings(REPLICAS=REPLICAS)
+class ReplicaRouterTests(SimpleTestCase):
+
+  def setUp(self):
+    self.router = ReplicaRouter()
+
+  def test_reads(self):
+    """Test reads of the configured models go to a replica and others are left to django"""
+    self.assertEqual(self.router.db_for_read(Word), 'replica')
+    self.assertIsNone(self.router.db_for_read(Learning))
+    self.assertEqual(self.router.db_for_write(Word), 'default')
+    with override_settings(REPLICAS={**REPLICAS, 'REPLICAS': []}):
+      self.assertIsNone(self.router.db_for_read(Word))
+      self.assertIsNone(self.router.db_for_write(Word))
+
+  def test_primary_reads(self):
+    """Test reads inside transactions of the primary and of use_primary go to the primary"""
+    with mock.patch.object(connections['default'], 'in_atomic_block', True):
+      self.assertEqual(self.router.db_for_read(Word), 'default')
+    with use_primary():
+      self.assertEqual(self.router.db_for_read(Word), 'default')
+    self.assertEqual(self.router.db_for_read(Word), 'replica')
+
+  def test_migrate(self):
+    """Test replicas are never migrated"""
+    self.assertFalse(self.router.allow_migrate('replica', 'content'))
+    self.assertIsNone(self.router.allow_migrate('default', 'content'))
+
+
+@override_settings(REPLICAS=REPLICAS)
+class ReplicaPinMiddlewareTests(SimpleTestCase):
+
+  def setUp(self):
+    self.router = ReplicaRouter()
+    self.factory = RequestFactory()
+    self.reads = []
+
+  def view(self, write):
+    def get_response(request):
+      self.reads.append(self.router.db_for_read(Word))
+      if write:
+        self.router.db_for_write(Word)
+        self.reads.append(self.router.db_for_read(Word))
+      return HttpResponse()
+    return ReplicaPinMiddleware(get_response)
+
+  def test_read_your_writes(self):
+    """Test requests read from the primary after writing and pin the client for the next requests"""
+    response = self.view(write=True)(self.factory.post('/'))
+    self.assertEqual(self.reads, ['replica', 'default'])
+    cookie = response.cookies['primary_pin']
+    self.assertEqual(cookie['max-age'], 5)
+
+    self.factory.cookies['primary_pin'] = cookie.value
+    response = self.view(write=False)(self.factory.get('/'))
+    self.assertEqual(self.reads[-1], 'default')
+    self.assertNotIn('primary_pin', response.cookies)
+
+  def test_reads_are_not_pinned(self):
+    """Test requests which only read neither read from the primary nor pin the client"""
+    response = self.view(write=False)(self.factory.get('/'))
+    self.assertEqual(self.reads, ['replica'])
+    self.assertNotIn('primary_pin', response.cookies)
+    # the pin ends with the request
+    self.assertEqual(self.router.db_for_read(Word), 'replica')
@@ -0,0 +1,72 @@
+import random
+
+from core.sortedset import InMemorySortedSets, SkipList
+from django.test import SimpleTestCase
+
+
+class SkipListTests(SimpleTestCase):
+
+  def test_matches_a_sorted_list(self):
+    """Test random inserts and deletes keep order, ranks and ranges of a sorted list"""
+    generator = random.Random(7)
+    skiplist = SkipList(seed=7)
+    expected = []
+    for step in range(2000):
+      if expected and generator.random() < 0.4:
+        pair = expected.pop(generator.randrange(len(expected)))
+        self.assertTrue(skiplist.delete(*pair))
+      else:
+        pair = (generator.randrange(50), f'member{step}')
+        skiplist.insert(*pair)
+        expected.append(pair)
+        expected.sort()
+    self.assertEqual(len(skiplist), len(expected))
+    self.assertEqual(skiplist.range(0, len(expected)), expected)
+    for rank in range(0, len(expected), 17):
+      self.assertEqual(skiplist.rank(*expected[rank]), rank)
+      self.assertEqual(skiplist.range(rank, rank + 5), expected[rank:rank + 6])
+
+  def test_missing_pairs(self):
+    """Test missing pairs have no rank and can not be deleted"""
+    skiplist = SkipList()
+    skiplist.insert(1, 'a')
+    self.assertIsNone(skiplist.rank(1, 'b'))
+    self.assertIsNone(skiplist.rank(2, 'a'))
+    self.assertFalse(skiplist.delete(1, 'b'))
+    self.assertEqual(skiplist.range(1, 5), [])
+
+
+class InMemorySortedSetsTests(SimpleTestCase):
+
+  def setUp(self):
+    self.sets = InMemorySortedSets()
+    self.sets.zadd('board', {'a': 10, 'b': 30, 'c': 20, 'd': 20})
+
+  def test_ranks_and_ranges(self):
+    """Test descending ranks and ranges order ties by descending member like redis"""
+    self.assertEqual(self.sets.zrevrange('board', 0, -1), ['b', 'd', 'c', 'a'])
+    self.assertEqual(self.sets.zrevrange('board', -2, -1, withscores=True), [('c', 20), ('a', 10)])
+    self.assertEqual(self.sets.zrevrange('board', 3, 10), ['a'])
+    self.assertEqual(self.sets.zrevrange('board', 5, 10), [])
+    self.assertEqual([self.sets.zrevrank('board', member) for member in 'abcd'], [3, 0, 2, 1])
+    self.assertIsNone(self.sets.zrevrank('board', 'e'))
+    self.assertIsNone(self.sets.zrevrank('missing', 'a'))
+
+  def test_updates(self):
+    """Test zadd, zincrby and zrem move and remove members"""
+    self.assertEqual(self.sets.zadd('board', {'a': 40, 'e': 0}), 1)
+    self.assertEqual(self.sets.zincrby('board', 5, 'c'), 25)
+    self.assertEqual(self.sets.zincrby('board', -3, 'f'), -3)
+    self.assertEqual(self.sets.zrem('board', 'b', 'x'), 1)
+    self.assertEqual(self.sets.zrevrange('board', 0, -1, withscores=True),
+                     [('a', 40), ('c', 25), ('d', 20), ('e', 0), ('f', -3)])
+    self.assertEqual(self.sets.zscore('board', 'd'), 20)
+    self.assertEqual(self.sets.zcard('board'), 5)
+
+  def test_delete_and_expire(self):
+    """Test deleted and expired sets are empty"""
+    self.sets.zadd('other', {'a': 1})
+    self.sets.delete('board')
+    self.assertEqual(self.sets.zcard('board'), 0)
+    self.sets.expire('other', 0)
+    self.assertIsNone(self.sets.zscore('other', 'a'))
@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta, timezone
+
+from core.instrumentation import record_queries
+from core.tokens import (ACCESS, REFRESH, TokenError, access_token, clear_refresh_tokens, decode, issue_tokens,
+                         refresh_user, token_user)
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+
+class TokenTests(TestCase):
+
+  def setUp(self):
+    self.user = get_user_model().objects.create_user(name='testuser', password='testpassword')
+
+  def test_token_user(self):
+    """Test access tokens are turned into users without a query"""
+    claims = decode(access_token(self.user), ACCESS)
+    with record_queries() as metrics:
+      user = token_user(claims)
+      self.assertEqual(user.pk, self.user.pk)
+      self.assertEqual(user.name, 'testuser')
+      self.assertFalse(user.is_staff)
+      self.assertTrue(user.is_authenticated)
+    self.assertEqual(metrics.count, 0)
+    self.assertEqual(user.elo, 1000)
+
+  def test_token_user_save(self):
+    """Test saving a token user only writes the fields of the claims"""
+    user = token_user(decode(access_token(self.user), ACCESS))
+    user.name = 'renameduser'
+    user.save()
+    self.user.refresh_from_db()
+    self.assertEqual(self.user.name, 'renameduser')
+    self.assertTrue(self.user.check_password('testpassword'))
+
+  def test_invalid_tokens(self):
+    """Test expired, foreign and mistyped tokens are rejected"""
+    tokens = issue_tokens(self.user)
+    with self.assertRaises(TokenError):
+      decode(tokens['refresh'], ACCESS)
+    with self.assertRaises(TokenError):
+      decode(tokens['access'], REFRESH)
+    with self.assertRaises(TokenError):
+      decode(access_token(self.user, now=datetime.now(timezone.utc) - timedelta(hours=1)), ACCESS)
+    with override_settings(JWT={'SIGNING_KEY': 'another key'}):
+      with self.assertRaises(TokenError):
+        decode(tokens['access'], ACCESS)
+
+  def test_password_change_revokes_refresh_tokens(self):
+    """Test refresh tokens stop working once the password changed"""
+    self.assertEqual(refresh_user(issue_tokens(self.user)['refresh']), self.user)
+    token = issue_tokens(self.user)['refresh']
+    self.user.set_password('otherpassword')
+    self.user.save()
+    with self.assertRaisesMessage(TokenError, 'revoked'):
+      refresh_user(token)
+
+  def test_refresh_tokens_work_once(self):
+    """Test a refresh token is refused once it was exchanged, and forgotten once it expired"""
+    token = issue_tokens(self.user)['refresh']
+    self.assertEqual(refresh_user(token), self.user)
+    with self.assertRaisesMessage(TokenError, 'already used'):
+      refresh_user(token)
+
+    self.assertEqual(clear_refresh_tokens(), 0)
+    self.assertEqual(clear_refresh_tokens(now=datetime.now(timezone.utc) + timedelta(days=15)), 1)
+
+
+@override_settings(API_THREAD_SENSITIVE=True)
+class TokenApiTests(TestCase):
+
+  def setUp(self):
+    self.user = get_user_model().objects.create_user(name='testuser', password='testpassword')
+
+  async def test_login(self):
+    """Test name and password are exchanged for tokens"""
+    response = await self.async_client.post(reverse('token'), {'name': 'testuser', 'password': 'testpassword'},
+                                            content_type='application/json')
+    self.assertEqual(response.status_code, 200)
+    self.assertEqual(set(response.json()), {'access', 'refresh', 'expiresIn'})
+
+    response = await self.async_client.post(reverse('token'), {'name': 'testuser', 'password': 'wrongpassword'},
+                                            content_type='application/json')
+    self.assertEqual(response.status_code, 401)
+    response = await self.async_client.post(reverse('token'), {'name': 'testuser'}, content_type='application/json')
+    self.assertEqual(response.status_code, 400)
+
+  async def test_refresh(self):
+    """Test refresh tokens are exchanged for new tokens and access tokens are refused"""
+    tokens = issue_tokens(self.user)
+    response = await self.async_client.post(reverse('token-refresh'), {'refresh': tokens['refresh']},
+                                            content_type='application/json')
+    self.assertEqual(response.status_code, 200)
+    self.assertEqual(decode(response.json()['access'], ACCESS)['sub'], str(self.user.pk))
+
+    response = await self.async_client.post(reverse('token-refresh'), {'refresh': tokens['refresh']},
+                                            content_type='application/json')
+    self.assertEqual(response.status_code, 401)
+
+    response = await self.async_client.post(reverse('token-refresh'), {'refresh': tokens['access']},
+                                            content_type='application/json')
+    self.assertEqual(response.status_code, 401)
+
+  def test_bearer_authentication(self):
+    """Test requests with an access token are authenticated without reading the session"""
+    headers = {'HTTP_AUTHORIZATION': f'Bearer {access_token(self.user)}'}
+    self.assertEqual(self.client.get(reverse('game:stats')).status_code, 401)
+    with CaptureQueriesContext(connection) as queries:
+      response = self.client.get(reverse('game:stats'), **headers)
+    self.assertEqual(response.status_code, 200)
+    self.assertFalse([query for query in queries if 'django_session' in query['sql'] or 'core_user' in query['sql']])
+
+    response = self.client.get(reverse('game:stats'), HTTP_AUTHORIZATION='Bearer invalid')
+    self.assertEqual(response.status_code, 401)
+
+  def test_bearer_requests_skip_csrf(self):
+    """Test token authenticated requests need no csrf token, cookie authenticated ones do"""
+    self.client.handler.enforce_csrf_checks = True
+    response = self.client.post(reverse('game:sessions'), {'clientId': 'session1', 'answers': []},
+                                content_type='application/json',
+                                HTTP_AUTHORIZATION=f'Bearer {access_token(self.user)}')
+    self.assertNotEqual(response.status_code, 403)
+
+    self.client.force_login(self.user)
+    response = self.client.post(reverse('game:sessions'), {'clientId': 'session2', 'answers': []},
+                                content_type='application/json')
+    self.assertEqual(response.status_code, 403)
@@ -0,0 +1,52 @@
+import uuid
+
+from core.uuids import MAX_COUNTER, Uuid7Generator, generate_id, uuid7_time
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+
+class Uuid7Tests(SimpleTestCase):
+
+  def setUp(self):
+    self.uuid7 = Uuid7Generator()
+
+  def test_version_and_time(self):
+    """Test ids are version 7 uuids of the RFC variant carrying the time"""
+    value = self.uuid7(now_ms=1_700_000_000_000)
+    self.assertEqual(value.version, 7)
+    self.assertEqual(value.variant, uuid.RFC_4122)
+    self.assertEqual(uuid7_time(value), 1_700_000_000_000)
+
+  def test_strictly_increasing(self):
+    """Test ids of one process increase, also within a millisecond and when the clock goes back"""
+    ids = [self.uuid7() for _ in range(10000)]
+    ids.append(self.uuid7(now_ms=0))
+    self.assertEqual(ids, sorted(set(ids)))
+
+  def test_counter_overflow_moves_to_next_millisecond(self):
+    """Test more ids than the counter holds in one millisecond stay ordered"""
+    ms = uuid7_time(self.uuid7()) + 1000
+    ids = [self.uuid7(now_ms=ms) for _ in range(MAX_COUNTER + 2)]
+    self.assertEqual(ids, sorted(ids))
+    self.assertEqual(uuid7_time(ids[-1]), ms + 1)
+
+  def test_uuid4_is_not_accepted(self):
+    """Test reading the time of a random uuid fails"""
+    with self.assertRaises(ValueError):
+      uuid7_time(uuid.uuid4())
+
+
+class GenerateIdTests(TestCase):
+
+  def test_random_by_default(self):
+    """Test entities get random ids unless time ordered ids are enabled"""
+    self.assertEqual(generate_id().version, 4)
+    with override_settings(TIME_ORDERED_IDS=True):
+      user = get_user_model().objects.create_user(name='testuser', password='testpassword')
+    self.assertEqual(user.pk.version, 7)
+
+  def test_benchmark(self):
+    """Test the benchmark runs and cleans up"""
+    call_command('benchmark_ids', rows=10, batch_size=3, stdout=open('/dev/null', 'w'))
+    call_command('benchmark_ids', rows=10, batch_size=3, stdout=open('/dev/null', 'w'))
@@ -0,0 +1,153 @@
+"""
+Stateless token authentication.
+POST /auth/token/ exchanges name and password for a short lived access token and a long lived refresh token, both
+JWTs signed with JWT['SIGNING_KEY']. Requests sending `Authorization: Bearer <access token>` are authenticated by
+TokenAuthenticationMiddleware from the claims alone, without reading the session or the user table. The user of such
+a request only has the fields of the claims loaded, the others are deferred and read on first access.
+Refresh tokens are rotated: POST /auth/token/refresh/ answers one with a new pair and records its jti in
+UsedRefreshToken, so every refresh token works once. Refresh tokens also carry a fingerprint of the password hash, so
+changing the password revokes them, access tokens stay valid until they expire.
+"""
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import jwt
+from core.models import UsedRefreshToken
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils.crypto import salted_hmac
+from django.utils.deprecation import MiddlewareMixin
+
+ACCESS = 'access'
+REFRESH = 'refresh'
+
+
+class TokenError(ValueError):
+  """The token is malformed, expired, not signed by us or of the wrong type"""
+
+
+def jwt_settings():
+  config = getattr(settings, 'JWT', {})
+  return {
+      'signing_key': config.get('SIGNING_KEY') or settings.SECRET_KEY,
+      'algorithm': config.get('ALGORITHM', 'HS256'),
+      'access_seconds': config.get('ACCESS_SECONDS', 300),
+      'refresh_seconds': config.get('REFRESH_SECONDS', 14 * 24 * 3600),
+      'leeway': config.get('LEEWAY', 10),
+  }
+
+
+def password_fingerprint(user):
+  return salted_hmac('core.tokens.password_fingerprint', user.password, algorithm='sha256').hexdigest()[:16]
+
+
+def _encode(claims, seconds, now):
+  config = jwt_settings()
+  issued = now or datetime.now(timezone.utc)
+  claims = {**claims, 'iat': issued, 'exp': issued + timedelta(seconds=seconds), 'jti': uuid.uuid4().hex}
+  return jwt.encode(claims, config['signing_key'], algorithm=config['algorithm'])
+
+
+def access_token(user, now=None):
+  """Returns an access token carrying the claims the token user is built from"""
+  claims = {'type': ACCESS, 'sub': str(user.pk), 'name': user.name, 'staff': user.is_staff,
+            'superuser': user.is_superuser}
+  return _encode(claims, jwt_settings()['access_seconds'], now)
+
+
+def refresh_token(user, now=None):
+  claims = {'type': REFRESH, 'sub': str(user.pk), 'pwd': password_fingerprint(user)}
+  return _encode(claims, jwt_settings()['refresh_seconds'], now)
+
+
+def issue_tokens(user, now=None):
+  return {'access': access_token(user, now), 'refresh': refresh_token(user, now),
+          'expiresIn': jwt_settings()['access_seconds']}
+
+
+def decode(token, token_type):
+  """Returns the claims of a valid token of token_type, raises TokenError otherwise"""
+  config = jwt_settings()
+  try:
+    claims = jwt.decode(token, config['signing_key'], algorithms=[config['algorithm']], leeway=config['leeway'],
+                        options={'require': ['exp', 'iat', 'jti', 'sub', 'type']})
+  except jwt.InvalidTokenError as error:
+    raise TokenError(f'invalid token: {error}')
+  if claims['type'] != token_type:
+    raise TokenError(f'not an {token_type} token' if token_type == ACCESS else f'not a {token_type} token')
+  return claims
+
+
+def token_user(claims):
+  """Returns the user of access token claims without a query, fields missing in the claims are deferred"""
+  try:
+    pk = uuid.UUID(claims['sub'])
+  except (KeyError, TypeError, ValueError):
+    raise TokenError('invalid token: malformed subject')
+  fields = ['id', 'name', 'is_staff', 'is_superuser']
+  values = [pk, claims.get('name', ''), bool(claims.get('staff')), bool(claims.get('superuser'))]
+  # from_db marks the instance as loaded from the database, saving it only writes the loaded fields
+  return get_user_model().from_db('default', fields, values)
+
+
+def refresh_user(token):
+  """
+  Returns the active user of a refresh token and marks the token as used, raises TokenError if the token is invalid,
+  revoked or was used before
+  """
+  claims = decode(token, REFRESH)
+  try:
+    user = get_user_model().objects.alive().get(pk=claims['sub'])
+  except (get_user_model().DoesNotExist, ValueError):
+    raise TokenError('invalid token: unknown user')
+  if claims.get('pwd') != password_fingerprint(user):
+    raise TokenError('invalid token: revoked')
+  expires_at = datetime.fromtimestamp(claims['exp'], timezone.utc)
+  with transaction.atomic():
+    # of concurrent refreshes with the same token only the one inserting the row succeeds
+    _, created = UsedRefreshToken.objects.get_or_create(jti=str(claims['jti']), defaults={'expires_at': expires_at})
+  if not created:
+    raise TokenError('invalid token: already used')
+  return user
+
+
+def clear_refresh_tokens(now=None):
+  """Forgets used refresh tokens which expired, returns their number"""
+  leeway = timedelta(seconds=jwt_settings()['leeway'])
+  expired = UsedRefreshToken.objects.filter(expires_at__lt=(now or datetime.now(timezone.utc)) - leeway)
+  return expired.delete()[0]
+
+
+def bearer_token(request):
+  scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+  return token.strip() if scheme.lower() == 'bearer' and token.strip() else None
+
+
+class TokenAuthenticationMiddleware(MiddlewareMixin):
+  """
+  Authenticates requests with a valid bearer access token, after AuthenticationMiddleware.
+  These requests skip the csrf check, which protects cookies browsers send on their own, not headers. Invalid tokens
+  are ignored, so other bearer tokens like the metrics token keep working and the request stays anonymous.
+  """
+
+  def __call__(self, request):
+    if asyncio.iscoroutinefunction(self.get_response):
+      return self.__acall__(request)
+    self.authenticate(request)
+    return self.get_response(request)
+
+  async def __acall__(self, request):
+    self.authenticate(request)
+    return await self.get_response(request)
+
+  def authenticate(self, request):
+    token = bearer_token(request)
+    if token is None:
+      return
+    try:
+      request.user = token_user(decode(token, ACCESS))
+    except TokenError:
+      return
+    request._dont_enforce_csrf_checks = True
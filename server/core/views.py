@@ -0,0 +1,56 @@
+import hmac
+
+from core.api import api_view, database, detail, read_json
+from core.instrumentation import get_setting, request_metrics
+from core.tokens import TokenError, issue_tokens, refresh_user
+from django.contrib.auth import authenticate
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_GET
+
+
+@require_GET
+def metrics(request):
+  """Serves the request and query metrics of this process to staff users or scrapers sending the metrics token"""
+  token = get_setting('METRICS_TOKEN', None)
+  authorization = request.headers.get('Authorization', '')
+  scraper = token is not None and hmac.compare_digest(authorization, f'Bearer {token}')
+  if not scraper and not (request.user.is_authenticated and request.user.is_staff):
+    return JsonResponse({'detail': 'authentication required'}, status=401)
+  return HttpResponse(request_metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _login(request, name, password):
+  # checking the password rehashes it when the hasher or its costs changed, see core/hashers.py
+  user = authenticate(request, name=name, password=password)
+  if user is None or not user.active:
+    return None
+  return issue_tokens(user)
+
+
+def _refresh(token):
+  return issue_tokens(refresh_user(token))
+
+
+@api_view(['POST'], csrf_exempt=True)
+async def token(request):
+  """Answers name and password with an access and a refresh token"""
+  data = read_json(request)
+  name, password = data.get('name'), data.get('password')
+  if not isinstance(name, str) or not isinstance(password, str):
+    raise ValueError('name and password are required')
+  tokens = await database(_login)(request, name, password)
+  if tokens is None:
+    return detail('invalid name or password', 401)
+  return JsonResponse(tokens)
+
+
+@api_view(['POST'], csrf_exempt=True)
+async def refresh_token(request):
+  """Answers a refresh token with a new access and refresh token"""
+  data = read_json(request)
+  if not isinstance(data.get('refresh'), str):
+    raise ValueError('refresh is required')
+  try:
+    return JsonResponse(await database(_refresh)(data['refresh']))
+  except TokenError as error:
+    return detail(str(error), 401)
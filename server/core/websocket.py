@@ -0,0 +1,147 @@
+"""
+Plain ASGI websocket handling.
+Django 4.0 only serves http over ASGI, websocket connections are routed to consumers by path in app/asgi.py.
+A consumer is an async callable taking a WebSocket, it holds no thread and no database connection while idle.
+Connections are authenticated by the session cookie or by an access token. Browsers can not set headers on websocket
+handshakes, so they offer the subprotocols `bearer` and `<access token>`, other clients may send
+`Authorization: Bearer <access token>`.
+"""
+import json
+from importlib import import_module
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+from core.api import database
+from core.tokens import ACCESS, TokenError, decode, token_user
+from django.conf import settings
+from django.contrib.auth import get_user, get_user_model
+from django.http import parse_cookie
+
+BEARER = 'bearer'
+
+
+class WebSocket:
+  """A websocket connection speaking json text frames"""
+
+  def __init__(self, scope, receive, send):
+    self.scope = scope
+    self._receive = receive
+    self._send = send
+    self.user = None
+    self.closed = False
+
+  @property
+  def headers(self):
+    return {name.decode('latin-1'): value.decode('latin-1') for name, value in self.scope.get('headers', [])}
+
+  @property
+  def subprotocols(self):
+    return self.scope.get('subprotocols', [])
+
+  @property
+  def query(self):
+    return {name: values[-1] for name, values in parse_qs(self.scope.get('query_string', b'').decode()).items()}
+
+  async def accept(self):
+    message = await self._receive()
+    if message['type'] != 'websocket.connect':
+      raise ValueError('expected websocket.connect')
+    accept = {'type': 'websocket.accept'}
+    if BEARER in self.subprotocols:
+      # the client only accepts the handshake if one of its subprotocols is chosen
+      accept['subprotocol'] = BEARER
+    await self._send(accept)
+
+  async def receive_json(self):
+    """Returns the next json object sent by the client, None once the client disconnected"""
+    while True:
+      message = await self._receive()
+      if message['type'] == 'websocket.disconnect':
+        self.closed = True
+        return None
+      text = message.get('text')
+      if text is None:
+        continue
+      try:
+        data = json.loads(text)
+      except ValueError:
+        data = None
+      if isinstance(data, dict):
+        return data
+      await self.send_json({'type': 'error', 'detail': 'messages must be json objects'})
+
+  async def send_json(self, data):
+    if not self.closed:
+      await self._send({'type': 'websocket.send', 'text': json.dumps(data, separators=(',', ':'))})
+
+  async def close(self, code=1000):
+    if not self.closed:
+      self.closed = True
+      await self._send({'type': 'websocket.close', 'code': code})
+
+
+def _scope_user(cookies):
+  engine = import_module(settings.SESSION_ENGINE)
+  request = SimpleNamespace(session=engine.SessionStore(cookies.get(settings.SESSION_COOKIE_NAME)))
+  user = get_user(request)
+  return user if user.is_authenticated else None
+
+
+def bearer_token(websocket):
+  """Returns the access token of the Authorization header or of the subprotocol following `bearer`, or None"""
+  scheme, _, token = websocket.headers.get('authorization', '').partition(' ')
+  if scheme.lower() == BEARER and token.strip():
+    return token.strip()
+  subprotocols = websocket.subprotocols
+  if BEARER in subprotocols and subprotocols.index(BEARER) + 1 < len(subprotocols):
+    return subprotocols[subprotocols.index(BEARER) + 1]
+  return None
+
+
+def _token_user(token):
+  # consumers read fields a token user only has deferred, so the user is loaded
+  pk = token_user(decode(token, ACCESS)).pk
+  return get_user_model().objects.alive().filter(pk=pk).first()
+
+
+async def authenticate(websocket):
+  """
+  Returns the user of the access token sent with the handshake, or of the session cookie if no valid token was sent,
+  or None
+  """
+  token = bearer_token(websocket)
+  if token is not None:
+    try:
+      user = await database(_token_user)(token)
+    except TokenError:
+      user = None
+    if user is not None:
+      return user
+  return await database(_scope_user)(parse_cookie(websocket.headers.get('cookie', '')))
+
+
+def allowed_origin(websocket):
+  """
+  Browsers send cookies with cross site websocket handshakes, so connections from foreign origins are refused.
+  Clients which are no browsers send no origin and are allowed.
+  """
+  origin = websocket.headers.get('origin')
+  if origin is None:
+    return True
+  if origin in getattr(settings, 'CORS_ORIGIN_WHITELIST', []):
+    return True
+  return urlparse(origin).netloc == websocket.headers.get('host')
+
+
+def websocket_router(routes):
+  """Returns an ASGI application which hands websocket connections to the consumer registered for their path"""
+  async def application(scope, receive, send):
+    consumer = routes.get(scope['path'])
+    websocket = WebSocket(scope, receive, send)
+    if consumer is None or not allowed_origin(websocket):
+      # closing before accepting makes the server answer the handshake with 403
+      await receive()
+      await websocket.close()
+      return
+    await consumer(websocket)
+  return application
@@ -1,6 +1,37 @@
+from core.signals import entities_soft_deleted, rating_changed
 from django.apps import AppConfig
+from django.db.models.signals import m2m_changed, post_delete, post_save
 
 
 class GameConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'game'
+
+    def ready(self):
+        from core.cache import invalidate_model
+        from content.models import Word
+        from game import caching, counters, leaderboards, quiz, sync
+        from game.models import Folder, LearningStats, Package, Vocabulary
+
+        for model, handler in ((Package, caching.invalidate_package), (Folder, caching.invalidate_folder)):
+            post_save.connect(handler, sender=model, dispatch_uid=f'invalidate_{model.__name__}_on_save')
+            post_delete.connect(handler, sender=model, dispatch_uid=f'invalidate_{model.__name__}_on_delete')
+            entities_soft_deleted.connect(invalidate_model, sender=model,
+                                          dispatch_uid=f'invalidate_{model.__name__}_on_soft_delete')
+        m2m_changed.connect(caching.invalidate_package_vocabularies, sender=Package.vocabularies.through,
+                            dispatch_uid='invalidate_package_vocabularies')
+        m2m_changed.connect(caching.invalidate_folder_packages, sender=Folder.packages.through,
+                            dispatch_uid='invalidate_folder_packages')
+        m2m_changed.connect(counters.VOCABULARY_COUNT.changed, sender=Package.vocabularies.through,
+                            dispatch_uid='count_package_vocabularies')
+        m2m_changed.connect(counters.PACKAGE_COUNT.changed, sender=Folder.packages.through,
+                            dispatch_uid='count_folder_packages')
+        for relation in (Folder.packages, Package.vocabularies, Vocabulary.domestic_words, Vocabulary.foreign_words):
+            m2m_changed.connect(sync.touch_links, sender=relation.through,
+                                dispatch_uid=f'touch_{relation.through.__name__}')
+        post_save.connect(leaderboards.join_language_board, sender=LearningStats, dispatch_uid='join_language_board')
+        rating_changed.connect(leaderboards.record_language_ratings, dispatch_uid='record_language_ratings')
+        post_save.connect(quiz.invalidate_word_pools, sender=Word, dispatch_uid='invalidate_word_pools_on_save')
+        post_delete.connect(quiz.invalidate_word_pools, sender=Word, dispatch_uid='invalidate_word_pools_on_delete')
+        entities_soft_deleted.connect(quiz.invalidate_word_pools, sender=Word,
+                                      dispatch_uid='invalidate_word_pools_on_soft_delete')
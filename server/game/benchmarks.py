@@ -0,0 +1,110 @@
+"""
+Benchmarks of the model managers and hot paths, run by `manage.py bench`.
+seed creates synthetic content at a configurable scale, every case then runs one operation per round against it.
+Results are plain dicts, so they can be stored as json and compared between commits.
+"""
+import random
+import statistics
+import time
+
+from content.models import Language, Word
+from core.instrumentation import record_queries
+from django.contrib.auth import get_user_model
+from game.export import Exporter
+from game.models import Learning, Package, Vocabulary
+
+
+class Fixture:
+  """The seeded content the cases work on"""
+
+  def __init__(self, user, languages, words, vocabularies, package):
+    self.user = user
+    self.languages = languages
+    self.words = words   # {language pk: [words]}
+    self.vocabularies = vocabularies
+    self.package = package
+    self.random = random.Random(0)
+
+
+def seed(words=1000, vocabularies=500, learnings=200, package_size=100, prefix='bench'):
+  """Creates a user, two languages with words each, vocabularies, a package and learnings of the user"""
+  user = get_user_model().objects.create_user(name=f'{prefix}user', password=f'{prefix}password')
+  languages = [Language.objects.create_language(name=f'{prefix} {name}', author=user, official=True)
+               for name in ('domestic', 'foreign')]
+  created = {}
+  for language in languages:
+    created[language.pk] = Word.objects.bulk_create_words([
+        Word(name=f'{prefix} {language.name} {index}', language=language, description='synthetic word', author=user,
+             official=True)
+        for index in range(words)
+    ])
+  generator = random.Random(0)
+  domestic, foreign = languages
+  entries = [(domestic, foreign, generator.sample(created[domestic.pk], 2), generator.sample(created[foreign.pk], 2))
+             for _ in range(vocabularies)]
+  created_vocabularies = Vocabulary.objects.bulk_create_vocabularies_with_words(entries, author=user, official=True)
+  package = Package.objects.create_package_with_vocabularies(name=f'{prefix} package', author=user, official=True,
+                                                             description='synthetic package',
+                                                             vocabulary=created_vocabularies[:package_size])
+  Learning.objects.bulk_create([Learning(user=user, vocabulary=vocabulary)
+                                for vocabulary in created_vocabularies[:learnings]])
+
+  return Fixture(user, languages, created, created_vocabularies, package)
+
+
+def create_word_with_synonyms(fixture, index):
+  language = fixture.languages[1]
+  Word.objects.create_word_with_synonyms(name=f'bench synonym {index}', language=language, description='synthetic',
+                                         synonyms=fixture.random.sample(fixture.words[language.pk], 3),
+                                         author=fixture.user, official=True, category='synthetic')
+
+
+def create_vocabulary_with_words(fixture, index):
+  domestic, foreign = fixture.languages
+  Vocabulary.objects.create_vocabulary_with_words(domestic_language=domestic, foreign_language=foreign,
+                                                  domestic_words=fixture.random.sample(fixture.words[domestic.pk], 2),
+                                                  foreign_words=fixture.random.sample(fixture.words[foreign.pk], 2),
+                                                  author=fixture.user, official=True)
+
+
+def add_practice(fixture, index):
+  fixture.random.choice(fixture.words[fixture.languages[1].pk]).add_practice(index % 2 == 0)
+
+
+def export_package(fixture, index):
+  for _ in Exporter().package(fixture.package):
+    pass
+
+
+def next_due(fixture, index):
+  list(Learning.objects.next_due(fixture.user, limit=20))
+
+
+CASES = {case.__name__: case for case in (create_word_with_synonyms, create_vocabulary_with_words, add_practice,
+                                          export_package, next_due)}
+
+
+def run(case, fixture, rounds=20):
+  """Runs a case rounds times and returns timing statistics in milliseconds and the queries per round"""
+  timings = []
+  queries = 0
+  for index in range(rounds):
+    with record_queries() as metrics:
+      started = time.perf_counter()
+      case(fixture, index)
+      timings.append((time.perf_counter() - started) * 1000)
+    queries += metrics.count
+  return {
+      'rounds': rounds,
+      'min_ms': min(timings),
+      'median_ms': statistics.median(timings),
+      'mean_ms': statistics.mean(timings),
+      'max_ms': max(timings),
+      'queries': queries / rounds,
+  }
+
+
+def compare(results, baseline):
+  """Returns {case: median of results / median of baseline} for the cases both contain"""
+  return {name: result['median_ms'] / baseline[name]['median_ms']
+          for name, result in results.items() if baseline.get(name, {}).get('median_ms')}
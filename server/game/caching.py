@@ -0,0 +1,59 @@
+"""Cached serialized packages and folders, kept fresh by the signal handlers connected in GameConfig.ready"""
+from core.cache import get_cache
+from core.routers import use_primary
+from game.models import Folder, Package
+from game.serializers import FolderSerializer, PackageSerializer
+
+
+def _loader(model, serializer, relation, pk):
+  def load():
+    # a lagging replica would put a stale value into the cache, where it outlives the pin of the writer
+    with use_primary():
+      instance = model.objects.alive().filter(pk=pk).prefetch_related(relation).first()
+      return dict(serializer(instance).data) if instance is not None else None
+  return load
+
+
+def get_package(pk):
+  """Returns the serialized active package or None"""
+  return get_cache().get('package', pk, _loader(Package, PackageSerializer, 'vocabularies', pk))
+
+
+def get_folder(pk):
+  """Returns the serialized active folder or None"""
+  return get_cache().get('folder', pk, _loader(Folder, FolderSerializer, 'packages', pk))
+
+
+def invalidate_package(sender, instance, **kwargs):
+  get_cache().invalidate('package', instance.pk)
+
+
+def invalidate_folder(sender, instance, **kwargs):
+  get_cache().invalidate('folder', instance.pk)
+
+
+def invalidate_package_vocabularies(sender, instance, action, reverse, pk_set, **kwargs):
+  """package.vocabularies changed, from the package side or from the vocabulary side (reverse)"""
+  if not action.startswith('post_'):
+    return
+  if not reverse:
+    get_cache().invalidate('package', instance.pk)
+  elif pk_set is None:
+    # a vocabulary was removed from all of its packages, which ones is not known anymore
+    get_cache().invalidate('package')
+  else:
+    for pk in pk_set:
+      get_cache().invalidate('package', pk)
+
+
+def invalidate_folder_packages(sender, instance, action, reverse, pk_set, **kwargs):
+  """folder.packages changed, from the folder side or from the package side (reverse)"""
+  if not action.startswith('post_'):
+    return
+  if not reverse:
+    get_cache().invalidate('folder', instance.pk)
+  elif pk_set is None:
+    get_cache().invalidate('folder')
+  else:
+    for pk in pk_set:
+      get_cache().invalidate('folder', pk)
@@ -0,0 +1,108 @@
+"""
+Websocket consumers of the game.
+A duel connection is opened on /ws/duel/?package=<uuid> by a logged in user. The server answers with waiting, then
+start, question, answered, solution and finally finished (or cancelled) messages, the client sends
+{"type": "answer", "index": <question>, "answer": "<text>"} for every question.
+"""
+import asyncio
+import time
+
+from core.api import database
+from core.channels import get_channel_layer
+from core.websocket import authenticate
+from django.core.exceptions import ValidationError
+from game.duels import duel_group, get_matchmaker, user_group
+from game.models import Package
+
+# close codes, 4000 + the http status they correspond to
+UNAUTHORIZED = 4401
+NOT_FOUND = 4404
+CONFLICT = 4409
+
+FINAL = ('finished', 'cancelled')
+
+
+def _package_exists(pk):
+  try:
+    return pk is not None and Package.objects.alive().filter(pk=pk).exists()
+  except ValidationError:
+    return False
+
+
+class _Relay:
+  """the state of one duel connection"""
+
+  def __init__(self, websocket, user, layer, subscription):
+    self.websocket = websocket
+    self.user = user
+    self.layer = layer
+    self.subscription = subscription
+    self.duel_id = None
+    self.finished = False
+
+  async def run(self):
+    """relays messages until the duel finished or the client disconnected"""
+    client = asyncio.ensure_future(self.websocket.receive_json())
+    server = asyncio.ensure_future(self.subscription.receive())
+    try:
+      while not self.finished:
+        done, _ = await asyncio.wait({client, server}, return_when=asyncio.FIRST_COMPLETED)
+        if server in done:
+          await self.to_client(server.result())
+          server = asyncio.ensure_future(self.subscription.receive())
+        if client in done:
+          if client.result() is None:
+            return
+          await self.to_duel(client.result())
+          client = asyncio.ensure_future(self.websocket.receive_json())
+    finally:
+      client.cancel()
+      server.cancel()
+
+  async def to_client(self, message):
+    if message['type'] == 'start':
+      self.duel_id = message['duel']
+    self.finished = message['type'] in FINAL
+    await self.websocket.send_json(message)
+
+  async def to_duel(self, data):
+    if data.get('type') == 'answer' and self.duel_id is not None:
+      await self.layer.send(duel_group(self.duel_id), {'type': 'answer', 'user': str(self.user.pk),
+                                                       'index': data.get('index'), 'answer': data.get('answer'),
+                                                       'at': time.time()})
+
+  async def leave(self):
+    if self.duel_id is not None and not self.finished:
+      await self.layer.send(duel_group(self.duel_id), {'type': 'leave', 'user': str(self.user.pk)})
+
+
+async def duel(websocket):
+  """Queues the user for a duel on a package and relays messages between the client and the duel"""
+  await websocket.accept()
+  user = await authenticate(websocket)
+  if user is None:
+    return await websocket.close(UNAUTHORIZED)
+  package_id = websocket.query.get('package')
+  if not await database(_package_exists)(package_id):
+    return await websocket.close(NOT_FOUND)
+
+  layer = get_channel_layer()
+  matchmaker = get_matchmaker()
+  subscription = await layer.subscribe(user_group(user.pk))
+  try:
+    matchmaker.join(user, package_id)
+  except ValueError as error:
+    await layer.unsubscribe(subscription)
+    await websocket.send_json({'type': 'error', 'detail': str(error)})
+    return await websocket.close(CONFLICT)
+
+  relay = _Relay(websocket, user, layer, subscription)
+  try:
+    await websocket.send_json({'type': 'waiting'})
+    await relay.run()
+  finally:
+    matchmaker.leave(user, package_id)
+    await relay.leave()
+    await layer.unsubscribe(subscription)
+
+  await websocket.close()
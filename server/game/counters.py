@@ -0,0 +1,7 @@
+"""Counters of game models, kept up to date by the m2m_changed handlers connected in GameConfig.ready"""
+from core.counting import RelationCounter, register
+from game.models import Folder, Package
+
+VOCABULARY_COUNT = register(RelationCounter(Package, 'vocabulary_count', 'vocabularies'))
+# links, not distinct vocabularies: a vocabulary in two packages of a folder is counted twice by the packages only
+PACKAGE_COUNT = register(RelationCounter(Folder, 'package_count', 'packages'))
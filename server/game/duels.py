@@ -0,0 +1,272 @@
+"""
+Head-to-head vocabulary duels.
+Players waiting on the same package are paired by the matchmaking queue of the package. The duel runs as a task of
+the process which paired them and talks to the players only through the channel layer: questions, results and the
+end of the duel go to the group of each user, answers and departures come in on the group of the duel. Answers are
+timestamped by the server which received them, the player with more correct answers wins, equal counts go to the
+faster player.
+"""
+import asyncio
+import logging
+import random
+import time
+import uuid
+
+from content.models import Word
+from core.api import database
+from core.channels import get_channel_layer
+from core.matchmaking import get_matchmaking_queue
+from core.models import User
+from core.rating import DRAW, LOSS, WIN, apply_result
+from django.conf import settings
+from game.models import Vocabulary
+
+logger = logging.getLogger(__name__)
+
+
+def duel_settings():
+  config = getattr(settings, 'DUELS', {})
+  return {
+      'questions': config.get('QUESTIONS', 10),
+      'question_seconds': config.get('QUESTION_SECONDS', 15),
+      'match_interval': config.get('MATCH_INTERVAL', 1),
+  }
+
+
+def user_group(user_id):
+  return f'user.{user_id}'
+
+
+def duel_group(duel_id):
+  return f'duel.{duel_id}'
+
+
+###############################################################################
+#                               questions                                     #
+###############################################################################
+
+
+class Question:
+  """Asks for the foreign words of a vocabulary, synonyms of the foreign words are accepted as well"""
+
+  def __init__(self, vocabulary_id, prompt, answers, accepted):
+    self.vocabulary_id = vocabulary_id
+    self.prompt = prompt
+    self.answers = answers
+    self.accepted = {answer.lower() for answer in accepted}
+
+  def is_correct(self, answer):
+    return answer.strip().lower() in self.accepted
+
+
+def draw_questions(package_id, count, rng=random):
+  """Returns questions for up to count random active vocabularies of the package"""
+  ids = list(Vocabulary.objects.alive().filter(packages=package_id).values_list('pk', flat=True))
+  chosen = rng.sample(ids, min(count, len(ids)))
+  order = {pk: index for index, pk in enumerate(chosen)}
+  vocabularies = sorted(Vocabulary.objects.filter(pk__in=chosen).prefetch_related('domestic_words', 'foreign_words'),
+                        key=lambda vocabulary: order[vocabulary.pk])
+
+  groups = {(word.language_id, word.synonym_group) for vocabulary in vocabularies
+            for word in vocabulary.foreign_words.all() if word.synonym_group is not None}
+  synonyms = {}
+  if groups:
+    rows = Word.objects.alive().filter(language__in={language for language, _ in groups},
+                                       synonym_group__in={group for _, group in groups})
+    for language_id, group, name in rows.values_list('language_id', 'synonym_group', 'name'):
+      synonyms.setdefault((language_id, group), []).append(name)
+
+  questions = []
+  for vocabulary in vocabularies:
+    answers = [word.name for word in vocabulary.foreign_words.all()]
+    accepted = set(answers)
+    for word in vocabulary.foreign_words.all():
+      accepted.update(synonyms.get((word.language_id, word.synonym_group), []))
+    questions.append(Question(vocabulary.pk, [word.name for word in vocabulary.domestic_words.all()], answers,
+                              accepted))
+
+  return questions
+
+
+###############################################################################
+#                               duel                                          #
+###############################################################################
+
+
+class Duel:
+  """Score keeping of a duel between two players"""
+
+  def __init__(self, duel_id, player_ids, questions):
+    if len(player_ids) != 2:
+      raise ValueError('a duel needs two players')
+    self.id = duel_id
+    self.player_ids = [str(player_id) for player_id in player_ids]
+    self.questions = questions
+    self.correct = {player_id: 0 for player_id in self.player_ids}
+    self.seconds = {player_id: 0.0 for player_id in self.player_ids}
+
+  def answer(self, player_id, question, answer, seconds):
+    """Records an answer given seconds after the question was asked and returns whether it was correct"""
+    correct = question.is_correct(answer)
+    if correct:
+      self.correct[player_id] += 1
+      self.seconds[player_id] += max(0.0, seconds)
+    return correct
+
+  def outcome(self, forfeit=None):
+    """Returns the score of the first player, a player who left the duel loses it"""
+    first, second = self.player_ids
+    if forfeit is not None:
+      return LOSS if forfeit == first else WIN
+    if self.correct[first] != self.correct[second]:
+      return WIN if self.correct[first] > self.correct[second] else LOSS
+    if self.correct[first] == 0 or self.seconds[first] == self.seconds[second]:
+      return DRAW
+    return WIN if self.seconds[first] < self.seconds[second] else LOSS
+
+
+def prepare_duel(player_ids, package_id, question_count):
+  users = {str(user.pk): user for user in User.objects.filter(pk__in=player_ids)}
+  return [users[str(player_id)] for player_id in player_ids], draw_questions(package_id, question_count)
+
+
+def settle(players, score):
+  """Applies the outcome to the elo of both players and returns their new ratings"""
+  apply_result(players[0], players[1], score)
+  return {str(player.pk): player.elo for player in players}
+
+
+async def _broadcast(layer, duel, message):
+  for player_id in duel.player_ids:
+    await layer.send(user_group(player_id), message)
+
+
+async def _play(layer, subscription, duel, question_seconds):
+  """asks all questions, returns the id of a player who left or None"""
+  for index, question in enumerate(duel.questions):
+    asked_at = time.time()
+    deadline = asked_at + question_seconds
+    await _broadcast(layer, duel, {'type': 'question', 'index': index, 'prompt': question.prompt,
+                                   'seconds': question_seconds})
+    answered = set()
+    while len(answered) < len(duel.player_ids):
+      message = await subscription.receive(timeout=max(0, deadline - time.time()))
+      if message is None:
+        break
+      player_id = message.get('user')
+      if player_id not in duel.player_ids:
+        continue
+      if message['type'] == 'leave':
+        return player_id
+      if message['type'] != 'answer' or message.get('index') != index or player_id in answered:
+        continue
+      answered.add(player_id)
+      correct = duel.answer(player_id, question, str(message.get('answer') or ''), message['at'] - asked_at)
+      await _broadcast(layer, duel, {'type': 'answered', 'index': index, 'user': player_id, 'correct': correct})
+    await _broadcast(layer, duel, {'type': 'solution', 'index': index, 'answers': question.answers})
+
+  return None
+
+
+async def run_duel(layer, duel_id, player_ids, package_id, question_count=10, question_seconds=15):
+  """Plays a duel from the first question to the settled ratings"""
+  subscription = await layer.subscribe(duel_group(duel_id))
+  try:
+    players, questions = await database(prepare_duel)(player_ids, package_id, question_count)
+    duel = Duel(duel_id, player_ids, questions)
+    if not questions:
+      await _broadcast(layer, duel, {'type': 'cancelled', 'detail': 'the package has no vocabularies'})
+      return None
+    for player, opponent in ((players[0], players[1]), (players[1], players[0])):
+      await layer.send(user_group(player.pk), {
+          'type': 'start', 'duel': duel_id, 'questions': len(questions),
+          'opponent': {'id': str(opponent.pk), 'name': opponent.name, 'elo': opponent.elo},
+      })
+
+    forfeit = await _play(layer, subscription, duel, question_seconds)
+    score = duel.outcome(forfeit)
+    ratings = await database(settle)(players, score)
+    await _broadcast(layer, duel, {'type': 'finished', 'correct': duel.correct, 'forfeit': forfeit,
+                                   'ratings': ratings})
+    return score
+  except Exception:
+    # the consumers of the players wait for a final message, without it they would wait until they disconnect
+    logger.exception('duel %s failed', duel_id)
+    for player_id in player_ids:
+      await layer.send(user_group(player_id), {'type': 'cancelled', 'detail': 'the duel failed'})
+    raise
+  finally:
+    await layer.unsubscribe(subscription)
+
+
+###############################################################################
+#                               matchmaker                                    #
+###############################################################################
+
+
+class Matchmaker:
+  """
+  Pairs the players waiting on a package and starts their duels.
+  Players whose rating windows only overlap after waiting are paired by a task which runs while anyone waits. With a
+  shared matchmaking queue every process pairs the players of all processes, which then need a shared channel layer
+  to reach their duel.
+  """
+
+  def __init__(self, layer=None, **options):
+    self.layer = layer
+    self.options = {**duel_settings(), **options}
+    self.queues = {}
+    self.duels = set()
+    self._task = None
+
+  def queue(self, package_id):
+    if str(package_id) not in self.queues:
+      self.queues[str(package_id)] = get_matchmaking_queue(f'package:{package_id}')
+    return self.queues[str(package_id)]
+
+  def join(self, user, package_id):
+    """Queues the user, raises ValueError if the user is already waiting"""
+    queue = self.queue(package_id)
+    match = queue.enqueue(str(user.pk), user.elo)
+    if match is not None:
+      self.start(match, package_id)
+    elif self._task is None or self._task.done() or self._task.get_loop() is not asyncio.get_running_loop():
+      self._task = asyncio.ensure_future(self._match_waiting())
+
+  def leave(self, user, package_id):
+    # a shared queue may hold the user although another process queued it
+    return self.queue(package_id).cancel(str(user.pk))
+
+  def start(self, match, package_id):
+    layer = self.layer or get_channel_layer()
+    task = asyncio.ensure_future(run_duel(
+        layer, str(uuid.uuid4()), [ticket.user_id for ticket in match.players], package_id,
+        self.options['questions'], self.options['question_seconds']))
+    self.duels.add(task)
+    task.add_done_callback(self._finished)
+    return task
+
+  def _finished(self, task):
+    self.duels.discard(task)
+    if not task.cancelled():
+      task.exception()   # failed duels were logged by run_duel already
+
+  async def _match_waiting(self):
+    while any(len(queue) for queue in self.queues.values()):
+      await asyncio.sleep(self.options['match_interval'])
+      for package_id, queue in list(self.queues.items()):
+        for match in queue.match_waiting():
+          self.start(match, package_id)
+        if not len(queue):
+          del self.queues[package_id]
+
+
+_matchmaker = None
+
+
+def get_matchmaker():
+  """Returns the matchmaker of the process"""
+  global _matchmaker
+  if _matchmaker is None:
+    _matchmaker = Matchmaker()
+  return _matchmaker
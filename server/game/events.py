@@ -0,0 +1,188 @@
+"""
+Practice event log.
+Every answer is appended to game_practiceevent, so the hot learning and word rows only change when a session is
+scheduled or rolled up. rollup adds the events recorded since the last rollup to the practice counters of their
+learnings and of the foreign words of their vocabularies, it waits PRACTICE_EVENTS['ROLLUP_DELAY'] seconds for
+transactions still appending events with an earlier recorded_at.
+recorded_at is taken when the event is built, not when it is committed, and the rollup only reads the events after
+its watermark. An event committed more than ROLLUP_DELAY after its recorded_at lands behind the watermark and is
+never counted, so the delay has to be longer than any transaction appending events. The log itself keeps such
+events.
+On postgres the log is partitioned by month of recorded_at (UTC). `manage.py practice_partitions` creates the
+partitions of the coming months and drops or detaches old ones, events of months without a partition land in the
+default partition and are moved once their partition is created.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from content.models import Word
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, Q
+from django.utils import timezone as django_timezone
+from game.models import Learning, PracticeEvent, RollupWatermark, Vocabulary
+from game.scheduling import PASSING_QUALITY
+
+ROLLUP = 'practice_events'
+TABLE = PracticeEvent._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+
+def events_settings():
+  config = getattr(settings, 'PRACTICE_EVENTS', {})
+  return {
+      'rollup_delay': config.get('ROLLUP_DELAY', 60),
+      'batch_size': config.get('BATCH_SIZE', 1000),
+      'partitions_ahead': config.get('PARTITIONS_AHEAD', 3),
+  }
+
+
+###############################################################################
+#                                 rollup                                      #
+###############################################################################
+
+
+def _batches(increments, size):
+  items = list(increments.items())
+  for start in range(0, len(items), size):
+    yield dict(items[start:start + size])
+
+
+def word_increments(learning_increments):
+  """Returns the practice increments of the foreign words of the vocabularies of the learnings"""
+  vocabularies = dict(Learning.objects.filter(pk__in=list(learning_increments)).values_list('pk', 'vocabulary_id'))
+  links = Vocabulary.foreign_words.through.objects.filter(vocabulary_id__in=set(vocabularies.values()))
+  words = defaultdict(list)
+  for vocabulary_id, word_id in links.values_list('vocabulary_id', 'word_id'):
+    words[vocabulary_id].append(word_id)
+  increments = defaultdict(lambda: (0, 0))
+  for learning_id, (practices, successful_practices) in learning_increments.items():
+    for word_id in words[vocabularies.get(learning_id)]:
+      current = increments[word_id]
+      increments[word_id] = (current[0] + practices, current[1] + successful_practices)
+  return dict(increments)
+
+
+def rollup(until=None):
+  """
+  Adds the events recorded from the last rollup until `until` to the practice counters and returns their number.
+  Concurrent rollups wait for each other, so no event is counted twice. Events committed after a rollup passed their
+  recorded_at are skipped, see the module docstring.
+  """
+  config = events_settings()
+  until = until or django_timezone.now() - timedelta(seconds=config['rollup_delay'])
+  with transaction.atomic():
+    watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(name=ROLLUP)
+    if watermark.until is not None and watermark.until >= until:
+      return 0
+    events = PracticeEvent.objects.filter(recorded_at__lt=until)
+    if watermark.until is not None:
+      events = events.filter(recorded_at__gte=watermark.until)
+    rows = (events.order_by().values_list('learning_id')
+            .annotate(practices=Count('pk'), successful=Count('pk', filter=Q(quality__gte=PASSING_QUALITY))))
+    increments = {learning_id: (practices, successful) for learning_id, practices, successful in rows}
+
+    for batch in _batches(increments, config['batch_size']):
+      Learning.objects.bulk_add_practices(batch)
+    for batch in _batches(word_increments(increments), config['batch_size']):
+      Word.objects.bulk_add_practices(batch)
+    watermark.until = until
+    watermark.save(update_fields=['until', 'updated_at'])
+
+  return sum(practices for practices, _ in increments.values())
+
+
+###############################################################################
+#                               partitions                                    #
+###############################################################################
+
+
+def month_of(moment):
+  """Returns the first day of the UTC month of a datetime or date"""
+  if isinstance(moment, datetime):
+    moment = moment.astimezone(timezone.utc)
+  return datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month, months):
+  index = month.year * 12 + month.month - 1 + months
+  return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(month):
+  return f'{TABLE}_{month:%Y_%m}'
+
+
+def asure_partitioned(connection):
+  if connection.vendor != 'postgresql':
+    raise ValueError('practice events are only partitioned on postgresql')
+
+
+def partitions(using='default'):
+  """Returns the months which have a partition, in order"""
+  connection = connections[using]
+  asure_partitioned(connection)
+  with connection.cursor() as cursor:
+    cursor.execute('SELECT child.relname FROM pg_inherits '
+                   'JOIN pg_class parent ON pg_inherits.inhparent = parent.oid '
+                   'JOIN pg_class child ON pg_inherits.inhrelid = child.oid '
+                   'WHERE parent.relname = %s', [TABLE])
+    names = {name for name, in cursor.fetchall()}
+  months = []
+  for name in names - {DEFAULT_PARTITION}:
+    year, month = name[len(TABLE) + 1:].split('_')
+    months.append(datetime(int(year), int(month), 1, tzinfo=timezone.utc))
+  return sorted(months)
+
+
+def create_partition(month, using='default'):
+  """
+  Creates the partition of a month unless it exists and returns whether it was created.
+  Events of the month in the default partition are moved into it first, as postgres refuses to attach a partition
+  whose rows are still in the default partition.
+  """
+  connection = connections[using]
+  asure_partitioned(connection)
+  if month in partitions(using):
+    return False
+  name = connection.ops.quote_name(partition_name(month))
+  table = connection.ops.quote_name(TABLE)
+  default = connection.ops.quote_name(DEFAULT_PARTITION)
+  bounds = [month, add_months(month, 1)]
+  with transaction.atomic(using=using), connection.cursor() as cursor:
+    cursor.execute(f'CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    cursor.execute(f'WITH moved AS (DELETE FROM {default} WHERE recorded_at >= %s AND recorded_at < %s RETURNING *) '
+                   f'INSERT INTO {name} SELECT * FROM moved', bounds)
+    cursor.execute(f'ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)', bounds)
+  return True
+
+
+def create_partitions(ahead=None, now=None, using='default'):
+  """Creates the partitions of the current and the coming months, returns the months created"""
+  ahead = events_settings()['partitions_ahead'] if ahead is None else ahead
+  current = month_of(now or django_timezone.now())
+  return [month for month in (add_months(current, offset) for offset in range(ahead + 1))
+          if create_partition(month, using)]
+
+
+def remove_partitions(before, detach=False, using='default'):
+  """
+  Drops the partitions of the months before `before`, or only detaches them so they can be archived as tables of
+  their own. Partitions which are not rolled up completely are kept. Returns the months removed.
+  """
+  connection = connections[using]
+  asure_partitioned(connection)
+  watermark = RollupWatermark.objects.using(using).filter(name=ROLLUP).values_list('until', flat=True).first()
+  removed = []
+  for month in partitions(using):
+    end = add_months(month, 1)
+    if end > month_of(before) or watermark is None or end > watermark:
+      continue
+    name = connection.ops.quote_name(partition_name(month))
+    with connection.cursor() as cursor:
+      if detach:
+        cursor.execute(f'ALTER TABLE {connection.ops.quote_name(TABLE)} DETACH PARTITION {name}')
+      else:
+        cursor.execute(f'DROP TABLE {name}')
+    removed.append(month)
+  return removed
@@ -0,0 +1,223 @@
+"""
+Streaming export of packages and folders in a compact binary format.
+
+An export starts with MAGIC and a version byte followed by records. Every record is a kind byte, the payload length
+as unsigned 32 bit big endian integer and the payload. Payload fields are written in the order of RECORDS:
+uuids as 16 raw bytes, texts as utf-8 prefixed with their length (u32) and uuid lists prefixed with their count (u32).
+Clients must treat records as upserts by id, words and languages may be sent more than once.
+The last record is END, an export without it was cut off.
+"""
+import hashlib
+import struct
+import uuid
+from itertools import islice
+
+from content.models import Language, Word
+from django.db.models import Max, Prefetch, Q
+from game.models import Folder, Package, Vocabulary
+
+MAGIC = b'WRDX'
+VERSION = 1
+CONTENT_TYPE = 'application/vnd.wurding.export'
+
+UUID = 'uuid'
+TEXT = 'text'
+UUIDS = 'uuids'
+
+END = 0
+FOLDER = 1
+PACKAGE = 2
+VOCABULARY = 3
+WORD = 4
+LANGUAGE = 5
+
+RECORDS = {
+    END: ('end', []),
+    FOLDER: ('folder', [('id', UUID), ('name', TEXT), ('description', TEXT)]),
+    PACKAGE: ('package', [('id', UUID), ('name', TEXT), ('description', TEXT)]),
+    VOCABULARY: ('vocabulary', [('id', UUID), ('domestic_language', UUID), ('foreign_language', UUID),
+                                ('domestic_words', UUIDS), ('foreign_words', UUIDS)]),
+    WORD: ('word', [('id', UUID), ('language', UUID), ('name', TEXT), ('description', TEXT), ('type', TEXT),
+                    ('gender', TEXT)]),
+    LANGUAGE: ('language', [('id', UUID), ('name', TEXT)]),
+}
+
+_HEADER = struct.Struct('>BI')
+_COUNT = struct.Struct('>I')
+
+###############################################################################
+#                               encoding                                      #
+###############################################################################
+
+
+def encode_record(kind, *values):
+  """Returns the bytes of one record"""
+  fields = RECORDS[kind][1]
+  if len(values) != len(fields):
+    raise ValueError(f'{RECORDS[kind][0]} records have {len(fields)} fields')
+  parts = []
+  for (_, field_type), value in zip(fields, values):
+    if field_type == UUID:
+      parts.append(value.bytes)
+    elif field_type == TEXT:
+      text = (value or '').encode('utf-8')
+      parts.append(_COUNT.pack(len(text)))
+      parts.append(text)
+    else:
+      parts.append(_COUNT.pack(len(value)))
+      parts.extend(item.bytes for item in value)
+  payload = b''.join(parts)
+
+  return _HEADER.pack(kind, len(payload)) + payload
+
+
+def _read(stream, size):
+  data = stream.read(size)
+  if len(data) != size:
+    raise ValueError('export is truncated')
+  return data
+
+
+def read_records(stream):
+  """Yields (name, fields) for every record of an export read from a binary stream"""
+  if _read(stream, len(MAGIC)) != MAGIC:
+    raise ValueError('stream is not an export')
+  version = _read(stream, 1)[0]
+  if version != VERSION:
+    raise ValueError(f'export version {version} is not supported')
+
+  while True:
+    kind, length = _HEADER.unpack(_read(stream, _HEADER.size))
+    if kind not in RECORDS:
+      raise ValueError(f'unknown record kind {kind}')
+    payload = memoryview(_read(stream, length))
+    name, fields = RECORDS[kind]
+    values = {}
+    offset = 0
+    for field, field_type in fields:
+      if field_type == UUID:
+        values[field] = uuid.UUID(bytes=bytes(payload[offset:offset + 16]))
+        offset += 16
+        continue
+      (count,), offset = _COUNT.unpack_from(payload, offset), offset + _COUNT.size
+      if field_type == TEXT:
+        values[field] = bytes(payload[offset:offset + count]).decode('utf-8')
+        offset += count
+      else:
+        values[field] = [uuid.UUID(bytes=bytes(payload[start:start + 16]))
+                         for start in range(offset, offset + count * 16, 16)]
+        offset += count * 16
+    yield name, values
+    if kind == END:
+      return
+
+
+###############################################################################
+#                               export                                        #
+###############################################################################
+
+
+def _chunks(iterable, size):
+  iterator = iter(iterable)
+  while True:
+    chunk = list(islice(iterator, size))
+    if not chunk:
+      return
+    yield chunk
+
+
+class Exporter:
+  """
+  Streams the records of folders and packages.
+  Vocabularies are loaded chunk by chunk with their words prefetched, so the memory used is bounded by the chunk size
+  and not by the size of the package.
+  """
+
+  def __init__(self, chunk_size=500):
+    self.chunk_size = chunk_size
+    self.languages = set()
+
+  def folder(self, folder):
+    yield MAGIC + bytes([VERSION])
+    yield encode_record(FOLDER, folder.pk, folder.name, folder.describtion)
+    for package in folder.packages.alive().order_by('pk').iterator(chunk_size=self.chunk_size):
+      yield from self._package(package)
+    yield encode_record(END)
+
+  def package(self, package):
+    yield MAGIC + bytes([VERSION])
+    yield from self._package(package)
+    yield encode_record(END)
+
+  def _package(self, package):
+    yield encode_record(PACKAGE, package.pk, package.name, package.describtion)
+    ids = package.vocabularies.alive().order_by('pk').values_list('pk', flat=True)
+    for chunk in _chunks(ids.iterator(chunk_size=self.chunk_size), self.chunk_size):
+      yield from self._vocabularies(chunk)
+
+  def _vocabularies(self, ids):
+    vocabularies = list(Vocabulary.objects.filter(pk__in=ids).order_by('pk')
+                        .prefetch_related(Prefetch('domestic_words', queryset=Word.objects.alive()),
+                                          Prefetch('foreign_words', queryset=Word.objects.alive())))
+    words = {}
+    for vocabulary in vocabularies:
+      for word in (*vocabulary.domestic_words.all(), *vocabulary.foreign_words.all()):
+        words[word.pk] = word
+
+    new_languages = {word.language_id for word in words.values()} - self.languages
+    for language in Language.objects.filter(pk__in=new_languages).order_by('pk'):
+      self.languages.add(language.pk)
+      yield encode_record(LANGUAGE, language.pk, language.name)
+    for word in words.values():
+      yield encode_record(WORD, word.pk, word.language_id, word.name, word.description, word.type, word.gender)
+    for vocabulary in vocabularies:
+      yield encode_record(VOCABULARY, vocabulary.pk, vocabulary.domestic_language_id, vocabulary.foreign_language_id,
+                          [word.pk for word in vocabulary.domestic_words.all()],
+                          [word.pk for word in vocabulary.foreign_words.all()])
+
+
+###############################################################################
+#                               etags                                         #
+###############################################################################
+
+
+def _members(queryset, *fields):
+  """returns a digest of the ids, a count and the latest change can stay the same when members are swapped"""
+  digest = hashlib.sha256()
+  for values in queryset.order_by(*fields).values_list(*fields):
+    digest.update(repr(values).encode('utf-8'))
+  return digest.hexdigest()
+
+
+def _fingerprint(packages):
+  """returns values which change whenever the export of the given packages would change"""
+  vocabularies = Vocabulary.objects.alive().filter(pk__in=Package.vocabularies.through.objects.filter(
+      package__in=packages).values('vocabulary'))
+  languages = Language.objects.filter(Q(pk__in=vocabularies.values('domestic_language')) |
+                                      Q(pk__in=vocabularies.values('foreign_language')))
+  values = [
+      _members(packages, 'pk'), packages.aggregate(updated=Max('updated_at')),
+      _members(vocabularies, 'pk'), vocabularies.aggregate(updated=Max('updated_at')),
+      languages.aggregate(updated=Max('updated_at')),
+  ]
+  for through in (Vocabulary.domestic_words.through, Vocabulary.foreign_words.through):
+    links = through.objects.filter(vocabulary__in=vocabularies, word__active=True)
+    values.append(_members(links, 'vocabulary_id', 'word_id'))
+    values.append(links.aggregate(updated=Max('word__updated_at')))
+
+  return values
+
+
+def etag(*parts):
+  return '"%s"' % hashlib.sha256(repr((VERSION,) + parts).encode('utf-8')).hexdigest()[:32]
+
+
+def package_etag(package):
+  """Returns an ETag which changes whenever the export of the package changes, without building the export"""
+  return etag(package.pk, _fingerprint(Package.objects.filter(pk=package.pk)))
+
+
+def folder_etag(folder):
+  """Returns an ETag which changes whenever the export of the folder changes, without building the export"""
+  packages = Package.objects.filter(pk__in=Folder.packages.through.objects.filter(folder=folder).values('package'))
+  return etag(folder.pk, folder.updated_at, _fingerprint(packages.alive()))
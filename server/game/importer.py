@@ -0,0 +1,202 @@
+import csv
+import json
+import time
+from itertools import islice
+
+from content.models import Language, Word
+from django.db import transaction
+from game.models import Vocabulary
+
+###############################################################################
+#                               readers                                       #
+###############################################################################
+
+CSV_SIDES = ('domestic', 'foreign')
+
+
+def _split(value):
+  """splits a pipe separated csv cell into a list of names"""
+  if not value:
+    return []
+  return [name.strip() for name in value.split('|') if name.strip()]
+
+
+def read_csv(stream):
+  """
+  Yields one record per csv row.
+  Expected columns: domestic_language, foreign_language, domestic_word, domestic_description, foreign_word,
+  foreign_description and optionally <side>_type, <side>_gender and <side>_synonyms (pipe separated).
+  """
+  for row in csv.DictReader(stream):
+    record = {
+        'domestic_language': row.get('domestic_language'),
+        'foreign_language': row.get('foreign_language'),
+    }
+    for side in CSV_SIDES:
+      record[f'{side}_words'] = [{
+          'name': row.get(f'{side}_word'),
+          'description': row.get(f'{side}_description'),
+          'type': row.get(f'{side}_type') or '',
+          'gender': row.get(f'{side}_gender') or '',
+          'synonyms': _split(row.get(f'{side}_synonyms')),
+      }]
+    yield record
+
+
+def read_jsonl(stream):
+  """
+  Yields one record per json line.
+  Words can either be given as names of existing words or as objects with name, description, type, gender and
+  synonyms.
+  """
+  for line in stream:
+    line = line.strip()
+    if not line:
+      continue
+    record = json.loads(line)
+    for side in CSV_SIDES:
+      record[f'{side}_words'] = [word if isinstance(word, dict) else {'name': word}
+                                 for word in record.get(f'{side}_words') or []]
+    yield record
+
+
+READERS = {
+    'csv': read_csv,
+    'jsonl': read_jsonl,
+}
+
+SPEC_FIELDS = ('description', 'type', 'gender')
+
+
+def merge_spec(specs, language, spec):
+  """
+  Adds the spec of a word to the {name: (language, spec)} of a batch. A word given more than once gets the first
+  description, type and gender any of its specs has and the synonyms of all of them.
+  """
+  name = spec.get('name')
+  if name not in specs:
+    specs[name] = (language, {**spec, 'synonyms': list(spec.get('synonyms') or [])})
+    return
+  known_language, known = specs[name]
+  if known_language != language:
+    raise ValueError(f'word {name} is given in {known_language.name} and in {language.name}')
+  for field in SPEC_FIELDS:
+    if not known.get(field) and spec.get(field):
+      known[field] = spec[field]
+  known['synonyms'].extend(synonym for synonym in spec.get('synonyms') or [] if synonym not in known['synonyms'])
+
+
+###############################################################################
+#                               importer                                      #
+###############################################################################
+
+
+class ImportStats:
+  """Counters collected while importing"""
+
+  def __init__(self):
+    self.rows = 0
+    self.words = 0
+    self.synonyms = 0
+    self.skipped_synonyms = 0
+    self.vocabularies = 0
+    self.started = time.monotonic()
+
+  @property
+  def elapsed(self):
+    return time.monotonic() - self.started
+
+  @property
+  def rows_per_second(self):
+    elapsed = self.elapsed
+    return self.rows / elapsed if elapsed > 0 else 0.0
+
+  def __str__(self):
+    return (f"{self.rows} rows ({self.rows_per_second:.0f} rows/s), {self.words} new words, "
+            f"{self.vocabularies} vocabularies, {self.synonyms} synonyms ({self.skipped_synonyms} unresolved)")
+
+
+class VocabularyImporter:
+  """
+  Imports a stream of vocabulary records batch by batch.
+  Only one batch is held in memory at a time, so arbitrarily large files can be imported.
+  """
+
+  def __init__(self, author=None, official=None, batch_size=1000):
+    self.author = author
+    self.official = official
+    self.batch_size = batch_size
+    self.languages = {}
+    self.stats = ImportStats()
+
+  def run(self, records, callback=None):
+    """Imports all records, calling callback with the stats after every batch"""
+    records = iter(records)
+    while True:
+      batch = list(islice(records, self.batch_size))
+      if not batch:
+        break
+      self.import_batch(batch)
+      if callback is not None:
+        callback(self.stats)
+
+    return self.stats
+
+  def language(self, name):
+    """returns the language with the given name, languages are few so they are cached for the whole import"""
+    if name not in self.languages:
+      try:
+        self.languages[name] = Language.objects.get(name=name)
+      except Language.DoesNotExist:
+        raise ValueError(f'language {name} does not exist')
+    return self.languages[name]
+
+  @transaction.atomic
+  def import_batch(self, batch):
+    """Imports one batch of records with a constant number of queries"""
+    specs = {}
+    for record in batch:
+      for side in CSV_SIDES:
+        language = self.language(record.get(f'{side}_language'))
+        for spec in record[f'{side}_words']:
+          merge_spec(specs, language, spec)
+
+    words = {word.name: word for word in Word.objects.filter(name__in=list(specs)).select_related('language')}
+    new_words = [
+        Word(name=name, language=language, description=spec.get('description'), type=spec.get('type') or '',
+             gender=spec.get('gender') or '', author=self.author, official=self.official)
+        for name, (language, spec) in specs.items() if name not in words
+    ]
+    Word.objects.bulk_create_words(new_words, batch_size=self.batch_size)
+    words.update((word.name, word) for word in new_words)
+
+    self.link_synonyms(specs, words)
+
+    entries = [(
+        self.language(record.get('domestic_language')),
+        self.language(record.get('foreign_language')),
+        [words[spec.get('name')] for spec in record['domestic_words']],
+        [words[spec.get('name')] for spec in record['foreign_words']],
+    ) for record in batch]
+    vocabularies = Vocabulary.objects.bulk_create_vocabularies_with_words(
+        entries, author=self.author, official=self.official, batch_size=self.batch_size)
+
+    self.stats.rows += len(batch)
+    self.stats.words += len(new_words)
+    self.stats.vocabularies += len(vocabularies)
+
+  def link_synonyms(self, specs, words):
+    """Links the synonyms of the batch, synonyms which do not exist yet or are in another language are skipped"""
+    wanted = {synonym for _, spec in specs.values() for synonym in spec.get('synonyms') or []}
+    missing = [name for name in wanted if name not in words]
+    if missing:
+      words = {**words, **{word.name: word for word in Word.objects.filter(name__in=missing)}}
+
+    pairs = []
+    for name, (_, spec) in specs.items():
+      for synonym in spec.get('synonyms') or []:
+        if synonym in words and words[synonym].language_id == words[name].language_id:
+          pairs.append((words[name], words[synonym]))
+        else:
+          self.stats.skipped_synonyms += 1
+    self.stats.synonyms += Word.objects.bulk_add_synonyms(pairs, batch_size=self.batch_size)
@@ -0,0 +1,21 @@
+"""
+Language leaderboards rank the learners of a language by their elo.
+A user joins the board of a language with the first learning in it (see game.stats) and moves on every rating change.
+"""
+from core.leaderboard import Leaderboard, language_board
+from django.db import transaction
+from game.models import LearningStats
+
+
+def join_language_board(sender, instance, created, **kwargs):
+  """post_save of LearningStats, a user learning a new language joins its board once the stats are committed"""
+  if created:
+    board = Leaderboard(language_board(instance.language_id))
+    scores = {instance.user_id: instance.user.elo}
+    transaction.on_commit(lambda: board.set(scores), using=kwargs.get('using'))
+
+
+def record_language_ratings(sender, user, delta, **kwargs):
+  """rating_changed handler, moves the user on the boards of all languages the user learns"""
+  for language_id in LearningStats.objects.filter(user=user).values_list('language_id', flat=True):
+    Leaderboard(language_board(language_id)).set({user.pk: user.elo})
@@ -0,0 +1,74 @@
+import json
+import platform
+import subprocess
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from game.benchmarks import CASES, compare, run, seed
+
+
+def _commit():
+  try:
+    return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+
+class Command(BaseCommand):
+  """Django command to benchmark the model managers and hot paths"""
+
+  help = ('Seeds synthetic content in a transaction which is rolled back afterwards, runs the benchmark cases and '
+          'reports their timings, optionally as json and compared to an earlier run')
+
+  def add_arguments(self, parser):
+    parser.add_argument('cases', nargs='*', help=f"cases to run, all if omitted: {', '.join(CASES)}")
+    parser.add_argument('--words', type=int, default=1000, help='words seeded per language')
+    parser.add_argument('--vocabularies', type=int, default=500)
+    parser.add_argument('--learnings', type=int, default=200)
+    parser.add_argument('--package-size', type=int, default=100, help='vocabularies of the exported package')
+    parser.add_argument('--rounds', type=int, default=20, help='runs per case')
+    parser.add_argument('--output', help='file the results are written to as json')
+    parser.add_argument('--compare', help='json file of an earlier run to compare the medians with')
+
+  def handle(self, *args, **options):
+    unknown = set(options['cases']) - set(CASES)
+    if unknown:
+      raise CommandError(f"unknown cases: {', '.join(sorted(unknown))}")
+    if min(options['words'], options['vocabularies'], options['rounds']) < 1:
+      raise CommandError('words, vocabularies and rounds must be positive')
+    if options['words'] < 3:
+      raise CommandError('at least 3 words per language are needed')
+    baseline = None
+    if options['compare']:
+      with open(options['compare'], encoding='utf-8') as stream:
+        baseline = json.load(stream)['results']
+
+    results = {}
+    with transaction.atomic():
+      fixture = seed(words=options['words'], vocabularies=options['vocabularies'], learnings=options['learnings'],
+                     package_size=options['package_size'])
+      for name in options['cases'] or CASES:
+        results[name] = run(CASES[name], fixture, options['rounds'])
+        self.stdout.write(f"{name}: median {results[name]['median_ms']:.2f} ms, "
+                          f"{results[name]['queries']:.1f} queries")
+      transaction.set_rollback(True)
+
+    if baseline is not None:
+      for name, ratio in compare(results, baseline).items():
+        self.stdout.write(f'{name}: {ratio:.2f}x the baseline median')
+    if options['output']:
+      report = {
+          'commit': _commit(),
+          'created_at': timezone.now().isoformat(),
+          'database': connection.vendor,
+          'python': platform.python_version(),
+          'django': django.get_version(),
+          'scale': {key: options[key] for key in ('words', 'vocabularies', 'learnings', 'package_size', 'rounds')},
+          'results': results,
+      }
+      with open(options['output'], 'w', encoding='utf-8') as stream:
+        json.dump(report, stream, indent=2)
+
+    self.stdout.write(self.style.SUCCESS('Benchmark finished!'))
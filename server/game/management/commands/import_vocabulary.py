@@ -0,0 +1,35 @@
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from game.importer import READERS, VocabularyImporter
+
+
+class Command(BaseCommand):
+  """Django command to bulk import vocabularies from a csv or jsonl file"""
+
+  help = 'Bulk imports vocabularies and their words from a csv or jsonl file, imported content is official'
+
+  def add_arguments(self, parser):
+    parser.add_argument('path', help='csv or jsonl file to import')
+    parser.add_argument('--author', required=True, help='name of the user the imported content is composed by')
+    parser.add_argument('--format', choices=sorted(READERS), help='file format, guessed from the extension if omitted')
+    parser.add_argument('--batch-size', type=int, default=1000, help='rows validated and written per batch')
+
+  def handle(self, *args, **options):
+    file_format = options['format'] or os.path.splitext(options['path'])[1].lstrip('.').lower()
+    if file_format not in READERS:
+      raise CommandError(f'unknown format {file_format}, use --format')
+    try:
+      author = get_user_model().objects.get(name=options['author'])
+    except get_user_model().DoesNotExist:
+      raise CommandError(f"user {options['author']} does not exist")
+
+    importer = VocabularyImporter(author=author, official=True, batch_size=options['batch_size'])
+    with open(options['path'], newline='', encoding='utf-8') as stream:
+      try:
+        stats = importer.run(READERS[file_format](stream), callback=lambda stats: self.stdout.write(str(stats)))
+      except ValueError as error:
+        raise CommandError(f'import failed after {importer.stats.rows} rows: {error}')
+
+    self.stdout.write(self.style.SUCCESS(f'Imported {stats}'))
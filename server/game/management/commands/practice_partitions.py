@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+from game.events import add_months, create_partitions, month_of, remove_partitions
+
+
+class Command(BaseCommand):
+  """Django command to maintain the monthly partitions of the practice event log, meant to run daily"""
+
+  help = ('Creates the partitions of the practice event log for the current and the coming months and optionally '
+          'drops or detaches the partitions of months which are rolled up and older than --keep months')
+
+  def add_arguments(self, parser):
+    parser.add_argument('--ahead', type=int, help='months to create partitions for in advance, '
+                                                  "PRACTICE_EVENTS['PARTITIONS_AHEAD'] if omitted")
+    parser.add_argument('--keep', type=int, help='months of history to keep, older partitions are removed')
+    parser.add_argument('--detach', action='store_true',
+                        help='detach old partitions instead of dropping them, so they can be archived')
+    parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+  def handle(self, *args, **options):
+    if options['ahead'] is not None and options['ahead'] < 0:
+      raise CommandError('ahead must not be negative')
+    if options['keep'] is not None and options['keep'] < 1:
+      raise CommandError('keep must be positive')
+    try:
+      created = create_partitions(options['ahead'], using=options['database'])
+      removed = []
+      if options['keep'] is not None:
+        before = add_months(month_of(timezone.now()), 1 - options['keep'])
+        removed = remove_partitions(before, detach=options['detach'], using=options['database'])
+    except ValueError as error:
+      raise CommandError(str(error))
+
+    for month in created:
+      self.stdout.write(f'created the partition of {month:%Y-%m}')
+    for month in removed:
+      self.stdout.write(f"{'detached' if options['detach'] else 'dropped'} the partition of {month:%Y-%m}")
+    self.stdout.write(self.style.SUCCESS('Practice event partitions maintained!'))
@@ -0,0 +1,42 @@
+from core.leaderboard import GLOBAL, Leaderboard, language_board
+from core.pagination import iterate
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from game.models import LearningStats
+
+
+class Command(BaseCommand):
+  """Django command to refill the global and language leaderboards from the database"""
+
+  help = ('Refills the global leaderboard with the elo of the users who played and the language leaderboards with the '
+          'elo of their learners, weekly leaderboards are not stored in the database and stay as they are')
+
+  def add_arguments(self, parser):
+    parser.add_argument('--batch-size', type=int, default=1000, help='users written per sorted set command')
+
+  def handle(self, *args, **options):
+    if options['batch_size'] < 1:
+      raise CommandError('batch size must be positive')
+    board = Leaderboard(GLOBAL)
+    board.clear()
+    scores = {}
+    # like rating_changed, which puts users on the board with their first rated game
+    players = get_user_model().objects.filter(games__gt=0).only('id', 'created_at', 'elo')
+    for user in iterate(players, chunk_size=options['batch_size']):
+      scores[user.pk] = user.elo
+      if len(scores) == options['batch_size']:
+        board.set(scores)
+        scores = {}
+    board.set(scores)
+    self.stdout.write(f'{GLOBAL}: {len(board)} users')
+
+    boards = {}
+    stats = LearningStats.objects.select_related('user').only('id', 'created_at', 'language', 'user', 'user__elo')
+    for row in iterate(stats, chunk_size=options['batch_size']):
+      if row.language_id not in boards:
+        boards[row.language_id] = Leaderboard(language_board(row.language_id))
+        boards[row.language_id].clear()
+      boards[row.language_id].set({row.user_id: row.user.elo})
+    self.stdout.write(f'{len(boards)} language leaderboards')
+
+    self.stdout.write(self.style.SUCCESS('Leaderboards rebuilt!'))
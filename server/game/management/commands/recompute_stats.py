@@ -0,0 +1,37 @@
+from core.pagination import iterate
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from game.stats import recompute
+
+
+class Command(BaseCommand):
+  """Django command to recompute the learning statistics, meant to run nightly"""
+
+  help = ('Recomputes learnings and mastered of the learning statistics from the learnings and ends missed streaks, '
+          'of all users or the given ones')
+
+  def add_arguments(self, parser):
+    parser.add_argument('users', nargs='*', help='names of the users to recompute, all if omitted')
+    parser.add_argument('--batch-size', type=int, default=500, help='users recomputed per transaction')
+
+  def handle(self, *args, **options):
+    if options['batch_size'] < 1:
+      raise CommandError('batch size must be positive')
+    users = get_user_model().objects.only('id', 'created_at')
+    if options['users']:
+      users = users.filter(name__in=options['users'])
+      missing = set(options['users']) - set(users.values_list('name', flat=True))
+      if missing:
+        raise CommandError(f"unknown users: {', '.join(sorted(missing))}")
+
+    changed = 0
+    batch = []
+    for user in iterate(users, chunk_size=options['batch_size']):
+      batch.append(user.pk)
+      if len(batch) == options['batch_size']:
+        changed += recompute(batch)
+        batch = []
+    if batch:
+      changed += recompute(batch)
+
+    self.stdout.write(self.style.SUCCESS(f'Learning statistics recomputed, {changed} rows changed!'))
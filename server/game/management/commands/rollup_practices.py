@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from game.events import rollup
+
+
+class Command(BaseCommand):
+  """Django command to roll up the practice event log into the practice counters, meant to run every few minutes"""
+
+  help = ('Adds the practice events recorded since the last rollup to the practice counters of their learnings and '
+          'of the foreign words of their vocabularies')
+
+  def handle(self, *args, **options):
+    events = rollup()
+    self.stdout.write(self.style.SUCCESS(f'Practice events rolled up, {events} events counted!'))
@@ -0,0 +1,38 @@
+# Generated by Django 4.0.2 on 2026-10-18 07:08
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0002_rename_wordcontext_vocabularycontext'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='learning',
+            name='due_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='learning',
+            name='ease',
+            field=models.FloatField(default=2.5),
+        ),
+        migrations.AddField(
+            model_name='learning',
+            name='interval',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='learning',
+            name='repetitions',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='learning',
+            index=models.Index(fields=['user', 'active', 'due_at'], name='game_learning_due_idx'),
+        ),
+    ]
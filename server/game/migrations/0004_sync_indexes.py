@@ -0,0 +1,25 @@
+# Generated by Django 4.0.2 on 2026-10-18 07:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0003_learning_schedule'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='folder',
+            index=models.Index(fields=['updated_at', 'id'], name='game_folder_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='package',
+            index=models.Index(fields=['updated_at', 'id'], name='game_package_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vocabulary',
+            index=models.Index(fields=['updated_at', 'id'], name='game_vocabulary_sync_idx'),
+        ),
+    ]
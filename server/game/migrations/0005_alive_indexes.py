@@ -0,0 +1,25 @@
+# Generated by Django 4.0.2 on 2026-10-18 07:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0004_sync_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='learning',
+            name='game_learning_due_idx',
+        ),
+        migrations.AddIndex(
+            model_name='learning',
+            index=models.Index(condition=models.Q(('active', True)), fields=['user', 'due_at'], name='game_learning_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vocabulary',
+            index=models.Index(condition=models.Q(('active', True)), fields=['domestic_language', 'foreign_language'], name='game_vocabulary_alive_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.0.2 on 2026-10-18 07:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0005_alive_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='folder',
+            index=models.Index(fields=['created_at', 'id'], name='game_folder_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='package',
+            index=models.Index(fields=['created_at', 'id'], name='game_package_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vocabulary',
+            index=models.Index(fields=['created_at', 'id'], name='game_vocabulary_page_idx'),
+        ),
+    ]
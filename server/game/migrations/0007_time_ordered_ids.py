@@ -0,0 +1,39 @@
+# Generated by Django 4.0.2 on 2026-10-18 07:25
+
+import core.uuids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0006_page_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='folder',
+            name='id',
+            field=models.UUIDField(default=core.uuids.generate_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='learning',
+            name='id',
+            field=models.UUIDField(default=core.uuids.generate_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='package',
+            name='id',
+            field=models.UUIDField(default=core.uuids.generate_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='vocabulary',
+            name='id',
+            field=models.UUIDField(default=core.uuids.generate_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='vocabularycontext',
+            name='id',
+            field=models.UUIDField(default=core.uuids.generate_id, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.0.2 on 2026-10-18 07:29
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count(queryset, field):
+    return Coalesce(Subquery(queryset.filter(**{field: OuterRef('pk')}).order_by().values(field)
+                             .annotate(count=Count('pk')).values('count')), 0)
+
+
+def fill_counters(apps, schema_editor):
+    Package = apps.get_model('game', 'Package')
+    Folder = apps.get_model('game', 'Folder')
+    Package.objects.update(vocabulary_count=count(Package.vocabularies.through.objects.all(), 'package'))
+    Folder.objects.update(package_count=count(Folder.packages.through.objects.all(), 'folder'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0007_time_ordered_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='folder',
+            name='package_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='package',
+            name='vocabulary_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.0.2 on 2026-10-18 07:32
+
+import core.uuids
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Q
+
+MASTERED_INTERVAL = 21
+
+
+def fill_stats(apps, schema_editor):
+    Learning = apps.get_model('game', 'Learning')
+    LearningStats = apps.get_model('game', 'LearningStats')
+    counts = (Learning.objects.filter(active=True).order_by()
+              .values_list('user_id', 'vocabulary__foreign_language_id')
+              .annotate(learnings=Count('pk'), mastered=Count('pk', filter=Q(interval__gte=MASTERED_INTERVAL))))
+    LearningStats.objects.bulk_create([
+        LearningStats(id=core.uuids.generate_id(), user_id=user_id, language_id=language_id, learnings=learnings,
+                      mastered=mastered)
+        for user_id, language_id, learnings, mastered in counts
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('content', '0013_counters'),
+        ('game', '0008_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LearningStats',
+            fields=[
+                ('id', models.UUIDField(default=core.uuids.generate_id, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('active', models.BooleanField(default=True)),
+                ('learnings', models.PositiveIntegerField(default=0)),
+                ('mastered', models.PositiveIntegerField(default=0)),
+                ('reviews', models.PositiveIntegerField(default=0)),
+                ('successful_reviews', models.PositiveIntegerField(default=0)),
+                ('current_streak', models.PositiveIntegerField(default=0)),
+                ('longest_streak', models.PositiveIntegerField(default=0)),
+                ('last_review_on', models.DateField(blank=True, null=True)),
+                ('language', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='learning_stats', to='content.language')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='learning_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='learningstats',
+            constraint=models.UniqueConstraint(fields=('user', 'language'), name='game_learningstats_user_language_unique'),
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
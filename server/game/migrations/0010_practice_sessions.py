@@ -0,0 +1,34 @@
+# Generated by Django 4.0.2 on 2026-10-18 07:37
+
+import core.uuids
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('game', '0009_learning_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PracticeSession',
+            fields=[
+                ('id', models.UUIDField(default=core.uuids.generate_id, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('active', models.BooleanField(default=True)),
+                ('client_id', models.UUIDField()),
+                ('answers', models.PositiveIntegerField()),
+                ('successful_answers', models.PositiveIntegerField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='practice_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='practicesession',
+            constraint=models.UniqueConstraint(fields=('user', 'client_id'), name='game_practicesession_client_unique'),
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 4.0.2 on 2026-10-18 07:52
+
+import core.uuids
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+# On PostgreSQL the plain table is replaced by one partitioned by month of recorded_at, see game/events.py. Its
+# primary key has to contain the partition key. The indexes of CreateModel are deferred to the end of the migration,
+# so they are created on the partitioned table and inherited by every partition. Events land in the default partition
+# until `manage.py practice_partitions` created the partitions of their months.
+PARTITIONED = [
+    'DROP TABLE game_practiceevent',
+    '''CREATE TABLE game_practiceevent (
+        id uuid NOT NULL,
+        recorded_at timestamp with time zone NOT NULL,
+        quality smallint NOT NULL CHECK (quality >= 0),
+        learning_id uuid NOT NULL,
+        user_id uuid NOT NULL,
+        PRIMARY KEY (id, recorded_at)
+    ) PARTITION BY RANGE (recorded_at)''',
+    'CREATE TABLE game_practiceevent_default PARTITION OF game_practiceevent DEFAULT',
+]
+
+
+def partition_events(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in PARTITIONED:
+        schema_editor.execute(statement)
+
+
+def unpartition_events(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    # dropping the partitioned table drops its partitions and indexes, the reversed CreateModel drops the stand-in
+    schema_editor.execute('DROP TABLE game_practiceevent')
+    schema_editor.execute('CREATE TABLE game_practiceevent (id uuid PRIMARY KEY)')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('game', '0010_practice_sessions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.UUIDField(default=core.uuids.generate_id, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('active', models.BooleanField(default=True)),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('until', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='learning',
+            name='practices',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='learning',
+            name='successful_practices',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='PracticeEvent',
+            fields=[
+                ('id', models.UUIDField(default=core.uuids.generate_id, editable=False, primary_key=True, serialize=False)),
+                ('recorded_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('quality', models.PositiveSmallIntegerField()),
+                ('learning', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='game.learning')),
+                ('user', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['recorded_at'], name='game_practiceevent_time_idx'),
+                    models.Index(fields=['user', 'recorded_at'], name='game_practiceevent_user_idx'),
+                ],
+            },
+        ),
+        migrations.RunPython(partition_events, unpartition_events),
+    ]
@@ -1,7 +1,14 @@
+import uuid
+from datetime import timedelta
+
 from content.models import Language, Word, asure_languages, asure_words
 from core.models import (BaseEntity, BaseEntityManager, User, asure_boolean,
                          asure_string, asure_user)
-from django.db import models
+from core.uuids import generate_id
+from django.db import IntegrityError, models, transaction
+from django.db.models import Q
+from django.utils import timezone
+from game.scheduling import PASSING_QUALITY, QUALITY_RANGE, schedule
 
 ###############################################################################
 #                               validators                                    #
@@ -27,6 +34,32 @@ def asure_vocabulary(vocabulary):
     raise ValueError('Vocabulary must be a Vocabulary object')
 
 
+def asure_answers(answers):
+  """check answers are (learning pk, quality) pairs and return them with uuid pks"""
+  if not isinstance(answers, list) or not answers:
+    raise ValueError('Answers must be a non empty list')
+  parsed = []
+  for answer in answers:
+    if not isinstance(answer, tuple) or len(answer) != 2:
+      raise ValueError('Answers must be (learning, quality) pairs')
+    try:
+      learning_id = uuid.UUID(str(answer[0]))
+    except ValueError:
+      raise ValueError('Learning must be a uuid')
+    asure_quality(answer[1])
+    parsed.append((learning_id, answer[1]))
+  return parsed
+
+
+def asure_quality(quality):
+  if quality is None:
+    raise ValueError('Quality is required')
+  if not isinstance(quality, int) or isinstance(quality, bool):
+    raise ValueError('Quality must be an integer')
+  if quality not in QUALITY_RANGE:
+    raise ValueError(f'Quality must be between {QUALITY_RANGE.start} and {QUALITY_RANGE.stop - 1}')
+
+
 def asure_packages(packages):
   if packages is None:
     raise ValueError('Package is required')
@@ -79,6 +112,39 @@ class VocabularyManager(BaseEntityManager):
 
     return vocabulary
 
+  def bulk_create_vocabularies_with_words(self, entries=None, author=None, official=None, batch_size=1000,
+                                          **kwargs):
+    """
+    Creates and saves many vocabularies at once.
+    entries is a list of (domestic_language, foreign_language, domestic_words, foreign_words) tuples.
+    """
+    if not isinstance(entries, list):
+      raise ValueError('entries is not a list')
+    asure_user(author, "user")
+    asure_boolean(official)
+
+    vocabularies = []
+    domestic_rows = []
+    foreign_rows = []
+    domestic_through = self.model.domestic_words.through
+    foreign_through = self.model.foreign_words.through
+    for domestic_language, foreign_language, domestic_words, foreign_words in entries:
+      asure_languages([domestic_language, foreign_language])
+      asure_words(domestic_words, domestic_language)
+      asure_words(foreign_words, foreign_language)
+
+      vocabulary = self.model(domestic_language=domestic_language, foreign_language=foreign_language,
+                              author=author, official=official, **kwargs)
+      vocabularies.append(vocabulary)
+      domestic_rows.extend(domestic_through(vocabulary_id=vocabulary.pk, word_id=word.pk) for word in domestic_words)
+      foreign_rows.extend(foreign_through(vocabulary_id=vocabulary.pk, word_id=word.pk) for word in foreign_words)
+
+    self.bulk_create(vocabularies, batch_size=batch_size)
+    domestic_through.objects.using(self._db).bulk_create(domestic_rows, batch_size=batch_size)
+    foreign_through.objects.using(self._db).bulk_create(foreign_rows, batch_size=batch_size)
+
+    return vocabularies
+
 
 class PackageManager(BaseEntityManager):
   """Package manager"""
@@ -92,8 +158,9 @@ class PackageManager(BaseEntityManager):
     asure_string(description)
     asure_vocabularies(vocabulary)
 
-    package = self.model(name=name, author=author, official=official, **kwargs)
+    package = self.model(name=name, author=author, official=official, describtion=description, **kwargs)
     package.save(using=self._db)
+    package.vocabularies.set(vocabulary)
 
     return package
 
@@ -110,8 +177,9 @@ class FolderManager(BaseEntityManager):
     asure_string(description)
     asure_packages(package)
 
-    folder = self.model(name=name, author=author, official=official, **kwargs)
+    folder = self.model(name=name, author=author, official=official, describtion=description, **kwargs)
     folder.save(using=self._db)
+    folder.packages.set(package)
 
     return folder
 
@@ -125,11 +193,90 @@ class LearningManager(BaseEntityManager):
     asure_user(user, "user")
     asure_vocabulary(vocabulary)
 
-    learning = self.model(user=user, vocabulary=vocabulary, **kwargs)
-    learning.save(using=self._db)
+    from game.stats import record_learning
+    with transaction.atomic(using=self.db):
+      learning = self.model(user=user, vocabulary=vocabulary, **kwargs)
+      learning.save(using=self._db)
+      record_learning(learning, vocabulary.foreign_language_id)
 
     return learning
 
+  def bulk_add_practices(self, increments=None):
+    """Increments the practice counters of many learnings, {pk: (practices, successful_practices)}, with one update"""
+    return self.bulk_increment(('practices', 'successful_practices'), increments)
+
+  def next_due(self, user=None, limit=20, now=None):
+    """Returns the learnings the user should review next, served by the partial (user, due_at) index"""
+    asure_user(user, "user")
+
+    return self.alive().filter(user=user, due_at__lte=now or timezone.now()).order_by('due_at')[:limit]
+
+  def review(self, reviews=None, now=None):
+    """
+    Schedules the next review of every reviewed learning.
+    reviews is a list of (learning, quality) pairs, all learnings are written with a single update and every review is
+    appended to the practice event log.
+    """
+    from game.stats import record_reviews
+    if not isinstance(reviews, list):
+      raise ValueError('Reviews must be a list')
+    now = now or timezone.now()
+    learnings = []
+    intervals = []
+    for learning, quality in reviews:
+      if not isinstance(learning, Learning):
+        raise ValueError('Reviews must contain Learning objects')
+      asure_quality(quality)
+      intervals.append(learning.interval)
+      learning.schedule(quality, now)
+      learnings.append(learning)
+    if learnings:
+      with transaction.atomic(using=self.db):
+        self.bulk_update(learnings, Learning.SCHEDULE_FIELDS, batch_size=None)
+        PracticeEvent.objects.bulk_create([PracticeEvent(user_id=learning.user_id, learning=learning, quality=quality)
+                                           for learning, quality in reviews])
+        record_reviews([(learning, quality, interval) for (learning, quality), interval in zip(reviews, intervals)],
+                       now)
+
+    return learnings
+
+
+class PracticeSessionManager(BaseEntityManager):
+  """Practice session manager"""
+
+  MAX_ANSWERS = 500
+
+  def submit(self, user=None, client_id=None, answers=None, now=None):
+    """
+    Applies all answers of a practice session in one transaction and returns (session, created).
+    answers is a list of (learning pk, quality) pairs. The learnings are written with one CASE update and the answers
+    appended to the practice event log, whose rollup counts the practices of the foreign words, see game/events.py.
+    A session is applied once per client_id, retries return the stored session with created False.
+    """
+    asure_user(user, "user")
+    if not isinstance(client_id, uuid.UUID):
+      raise ValueError('Client id must be a uuid')
+    if isinstance(answers, list) and len(answers) > self.MAX_ANSWERS:
+      raise ValueError(f'A session has at most {self.MAX_ANSWERS} answers')
+    answers = asure_answers(answers)
+
+    with transaction.atomic(using=self.db):
+      try:
+        # the unique (user, client_id) index makes a concurrent retry wait here until this session committed
+        with transaction.atomic(using=self.db):
+          session = self.create(user=user, client_id=client_id, answers=len(answers),
+                                successful_answers=sum(quality >= PASSING_QUALITY for _, quality in answers))
+      except IntegrityError:
+        return self.get(user=user, client_id=client_id), False
+
+      learnings = Learning.objects.alive().filter(user=user, pk__in={pk for pk, _ in answers}).in_bulk()
+      missing = {pk for pk, _ in answers} - set(learnings)
+      if missing:
+        raise Learning.DoesNotExist(f'learnings {", ".join(sorted(map(str, missing)))} do not exist')
+      Learning.objects.review([(learnings[pk], quality) for pk, quality in answers], now=now)
+
+    return session, True
+
 
 ###############################################################################
 #                           Models                                            #
@@ -164,6 +311,14 @@ class Vocabulary(BaseEntity):
 
   objects = VocabularyManager()
 
+  class Meta:
+    indexes = [
+        models.Index(fields=['updated_at', 'id'], name='game_vocabulary_sync_idx'),
+        models.Index(fields=['created_at', 'id'], name='game_vocabulary_page_idx'),
+        models.Index(fields=['domestic_language', 'foreign_language'], name='game_vocabulary_alive_idx',
+                     condition=Q(active=True)),
+    ]
+
   def __eq__(self, other):
     return (self.id == other.id and self.active == other.active and self.domestic_language == other.domestic_language
             and self.foreign_language == other.foreign_language and self.domestic_words == other.domestic_words and
@@ -181,9 +336,18 @@ class Package(BaseEntity):
   vocabularies = models.ManyToManyField(Vocabulary, related_name='packages')
   describtion = models.TextField(blank=True, null=True)
   subscribers = models.ManyToManyField(User, related_name='subscribed_packages')
+  vocabulary_count = models.PositiveIntegerField(default=0)   # see game.counters
 
   objects = PackageManager()
 
+  COUNTER_FIELDS = ('vocabulary_count',)
+
+  class Meta:
+    indexes = [
+        models.Index(fields=['updated_at', 'id'], name='game_package_sync_idx'),
+        models.Index(fields=['created_at', 'id'], name='game_package_page_idx'),
+    ]
+
   def __eq__(self, other):
     return (self.id == other.id and self.active == other.active and self.name == other.name and
             self.author == other.author)
@@ -200,9 +364,18 @@ class Folder(BaseEntity):
   packages = models.ManyToManyField(Package, related_name='packages')
   describtion = models.TextField(blank=True, null=True)
   subscribers = models.ManyToManyField(User, related_name='subscribed_folders')
+  package_count = models.PositiveIntegerField(default=0)   # see game.counters
 
   objects = FolderManager()
 
+  COUNTER_FIELDS = ('package_count',)
+
+  class Meta:
+    indexes = [
+        models.Index(fields=['updated_at', 'id'], name='game_folder_sync_idx'),
+        models.Index(fields=['created_at', 'id'], name='game_folder_page_idx'),
+    ]
+
   def __eq__(self, other):
     return (self.id == other.id and self.active == other.active and self.name == other.name and
             self.author == other.author)
@@ -217,6 +390,116 @@ class Learning(BaseEntity):
   vocabulary = models.ForeignKey(Vocabulary, on_delete=models.CASCADE, related_name="learnings")
   score = models.IntegerField(default=1)
   prev_score = models.IntegerField(default=1)
+  repetitions = models.IntegerField(default=0)
+  interval = models.IntegerField(default=0)   # days until the next review
+  ease = models.FloatField(default=2.5)
+  due_at = models.DateTimeField(default=timezone.now)
+  practices = models.IntegerField(default=0)   # rolled up from the practice events, see game/events.py
+  successful_practices = models.IntegerField(default=0)
+
+  objects = LearningManager()
+
+  SCHEDULE_FIELDS = ['score', 'prev_score', 'repetitions', 'interval', 'ease', 'due_at', 'updated_at']
+  COUNTER_FIELDS = ('practices', 'successful_practices')
+
+  class Meta:
+    indexes = [
+        models.Index(fields=['user', 'due_at'], name='game_learning_due_idx', condition=Q(active=True)),
+    ]
+
+  def schedule(self, quality, now=None):
+    """Applies a review with the given quality and moves due_at to the next review, does not save"""
+    asure_quality(quality)
+    now = now or timezone.now()
+    self.repetitions, self.interval, self.ease = schedule(quality, self.repetitions, self.interval, self.ease)
+    self.prev_score = self.score
+    self.score = quality
+    self.due_at = now + timedelta(days=self.interval)
+    self.updated_at = now
+
+    return self
 
   def __eq__(self, other):
     return self.id == other.id and self.active == other.active and self.user == other.user
+
+
+class LearningStats(BaseEntity):
+  """Rollup of the learnings and reviews of a user in one foreign language, maintained by game.stats"""
+  user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='learning_stats')
+  language = models.ForeignKey(Language, on_delete=models.CASCADE, related_name='learning_stats')
+  learnings = models.PositiveIntegerField(default=0)   # active learnings
+  mastered = models.PositiveIntegerField(default=0)   # active learnings reviewed at long intervals
+  reviews = models.PositiveIntegerField(default=0)
+  successful_reviews = models.PositiveIntegerField(default=0)
+  current_streak = models.PositiveIntegerField(default=0)   # days in a row with reviews
+  longest_streak = models.PositiveIntegerField(default=0)
+  last_review_on = models.DateField(blank=True, null=True)
+
+  objects = BaseEntityManager()
+
+  COUNTER_FIELDS = ('learnings', 'mastered', 'reviews', 'successful_reviews', 'current_streak', 'longest_streak',
+                    'last_review_on')
+
+  class Meta:
+    constraints = [
+        models.UniqueConstraint(fields=['user', 'language'], name='game_learningstats_user_language_unique'),
+    ]
+
+  def accuracy(self):
+    """Returns the ration of successful reviews to all reviews"""
+    return self.successful_reviews / self.reviews * 100 if self.reviews else 0
+
+  def __str__(self):
+    return f"learning stats object {self.user_id} language: {self.language_id}"
+
+
+class PracticeSession(BaseEntity):
+  """A submitted practice session, stored so retries of the submission are not applied twice"""
+  user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='practice_sessions')
+  client_id = models.UUIDField()   # generated by the client, retries send the same id
+  answers = models.PositiveIntegerField()
+  successful_answers = models.PositiveIntegerField()
+
+  objects = PracticeSessionManager()
+
+  class Meta:
+    constraints = [
+        models.UniqueConstraint(fields=['user', 'client_id'], name='game_practicesession_client_unique'),
+    ]
+
+  def __str__(self):
+    return f"practice session object {self.client_id} answers: {self.answers}"
+
+
+class PracticeEvent(models.Model):
+  """
+  One answer of a user, appended by LearningManager.review and never changed.
+  On postgres the table is partitioned by month of recorded_at, see game/events.py. The foreign keys have no database
+  constraints, so old partitions can be detached and archived on their own.
+  """
+  id = models.UUIDField(primary_key=True, default=generate_id, editable=False)
+  recorded_at = models.DateTimeField(default=timezone.now)
+  user = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='+')
+  learning = models.ForeignKey(Learning, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False,
+                               related_name='+')
+  quality = models.PositiveSmallIntegerField()
+
+  class Meta:
+    indexes = [
+        models.Index(fields=['recorded_at'], name='game_practiceevent_time_idx'),
+        models.Index(fields=['user', 'recorded_at'], name='game_practiceevent_user_idx'),
+    ]
+
+  def __str__(self):
+    return f"practice event object {self.learning_id} quality: {self.quality}"
+
+
+class RollupWatermark(BaseEntity):
+  """The time up to which a rollup job has processed an append-only log"""
+  name = models.CharField(max_length=255, unique=True)
+  until = models.DateTimeField(blank=True, null=True)
+
+  objects = BaseEntityManager()
+
+  def __str__(self):
+    return f"rollup watermark object {self.name} until: {self.until}"
@@ -0,0 +1,180 @@
+"""
+Multiple choice questions.
+Wrong choices (distractors) are words of the foreign language with the type and gender of the answer. Instead of
+ORDER BY random() over the words for every question, the words of a language are loaded once into pools per
+(type, gender), (type) and the whole language, kept as arrays of indices, and a distractor is drawn by picking random
+indices, O(k) for k distractors. Synonyms of the answer are never offered as wrong choices.
+Pools are rebuilt after QUIZ['POOL_TTL'] seconds or when words of the language are saved or deleted.
+"""
+import random
+import threading
+import time
+from array import array
+
+from content.models import Word
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+from game.models import Vocabulary
+
+NO_GROUP = -1
+
+
+def quiz_settings():
+  config = getattr(settings, 'QUIZ', {})
+  return {
+      'choices': config.get('CHOICES', 4),
+      'pool_ttl': config.get('POOL_TTL', 300),
+  }
+
+
+class LanguagePool:
+  """The active words of a language as parallel arrays and the pools of indices distractors are drawn from"""
+
+  def __init__(self, rows):
+    self.names = []
+    self.groups = array('q')
+    self.pools = {}
+    for index, (word_type, gender, name, group) in enumerate(rows):
+      self.names.append(name)
+      self.groups.append(NO_GROUP if group is None else group)
+      # from the closest to the widest pool, used when the closer ones run out of words
+      for key in ((word_type, gender), (word_type, None), (None, None)):
+        self.pools.setdefault(key, array('l')).append(index)
+
+  @classmethod
+  def load(cls, language_id):
+    rows = (Word.objects.alive().filter(language_id=language_id).order_by('pk')
+            .values_list('type', 'gender', 'name', 'synonym_group'))
+    return cls(list(rows))
+
+  def sample(self, word_type, gender, count, exclude_names=(), exclude_groups=(), rng=random):
+    """Returns up to count distinct names which are neither excluded by name nor by synonym group"""
+    chosen = []
+    seen = {name.lower() for name in exclude_names}
+    groups = set(exclude_groups) - {None}
+    for key in ((word_type, gender), (word_type, None), (None, None)):
+      pool = self.pools.get(key)
+      if pool:
+        self._draw(pool, count - len(chosen), chosen, seen, groups, rng)
+      if len(chosen) == count:
+        break
+    return chosen
+
+  def _acceptable(self, index, seen, groups):
+    return self.names[index].lower() not in seen and self.groups[index] not in groups
+
+  def _draw(self, pool, count, chosen, seen, groups, rng):
+    attempts = 4 * count + 8
+    while count > 0 and attempts > 0:
+      attempts -= 1
+      index = pool[rng.randrange(len(pool))]
+      if self._acceptable(index, seen, groups):
+        seen.add(self.names[index].lower())
+        chosen.append(self.names[index])
+        count -= 1
+    if count > 0:
+      # most of a small pool is excluded, only then the pool is scanned
+      candidates = [index for index in pool if self._acceptable(index, seen, groups)]
+      for index in rng.sample(candidates, min(count, len(candidates))):
+        seen.add(self.names[index].lower())
+        chosen.append(self.names[index])
+
+
+class DistractorPools:
+  """The pools of the languages used so far, per process"""
+
+  def __init__(self, ttl=300):
+    self.ttl = ttl
+    self._pools = {}
+    self._lock = threading.Lock()
+
+  def get(self, language_id):
+    with self._lock:
+      entry = self._pools.get(language_id)
+    if entry is not None and entry[0] > time.monotonic():
+      return entry[1]
+    pool = LanguagePool.load(language_id)
+    with self._lock:
+      self._pools[language_id] = (time.monotonic() + self.ttl, pool)
+    return pool
+
+  def invalidate(self, language_id=None):
+    """Drops the pool of a language, of all languages without one"""
+    with self._lock:
+      if language_id is None:
+        self._pools.clear()
+      else:
+        self._pools.pop(language_id, None)
+
+
+_pools = None
+_pools_lock = threading.Lock()
+
+
+def get_pools():
+  global _pools
+  with _pools_lock:
+    if _pools is None:
+      _pools = DistractorPools(ttl=quiz_settings()['pool_ttl'])
+    return _pools
+
+
+def invalidate_word_pools(sender, instance=None, **kwargs):
+  """post_save, post_delete and entities_soft_deleted of words, the pool is dropped once the change is committed"""
+  language_id = None if instance is None else instance.language_id
+  transaction.on_commit(lambda: get_pools().invalidate(language_id), using=kwargs.get('using'))
+
+
+class QuizQuestion:
+  """Asks for the foreign word of a vocabulary among choices, answer is the index of the correct choice"""
+
+  def __init__(self, vocabulary_id, prompt, choices, answer):
+    self.vocabulary_id = vocabulary_id
+    self.prompt = prompt
+    self.choices = choices
+    self.answer = answer
+
+  def as_dict(self):
+    return {'vocabulary': str(self.vocabulary_id), 'prompt': self.prompt, 'choices': self.choices,
+            'answer': self.answer}
+
+
+def generate_questions(vocabulary_ids, choices=None, rng=random):
+  """
+  Returns a multiple choice question for each active vocabulary in vocabulary_ids, in their order.
+  The vocabularies and their words are loaded with one batch of queries and each foreign language pool once.
+  """
+  choices = choices or quiz_settings()['choices']
+  if choices < 2:
+    raise ValueError('a question needs at least two choices')
+  order = {pk: index for index, pk in enumerate(vocabulary_ids)}
+  vocabularies = sorted(Vocabulary.objects.alive().filter(pk__in=order)
+                        .prefetch_related(Prefetch('domestic_words', queryset=Word.objects.alive()),
+                                          Prefetch('foreign_words', queryset=Word.objects.alive())),
+                        key=lambda vocabulary: order[vocabulary.pk])
+
+  pools = {}
+  questions = []
+  for vocabulary in vocabularies:
+    foreign = list(vocabulary.foreign_words.all())
+    if not foreign:
+      continue
+    answer = rng.choice(foreign)
+    if vocabulary.foreign_language_id not in pools:
+      pools[vocabulary.foreign_language_id] = get_pools().get(vocabulary.foreign_language_id)
+    distractors = pools[vocabulary.foreign_language_id].sample(
+        answer.type, answer.gender, choices - 1, exclude_names=[word.name for word in foreign],
+        exclude_groups=[word.synonym_group for word in foreign], rng=rng)
+    options = distractors + [answer.name]
+    rng.shuffle(options)
+    questions.append(QuizQuestion(vocabulary.pk, [word.name for word in vocabulary.domestic_words.all()], options,
+                                  options.index(answer.name)))
+
+  return questions
+
+
+def package_questions(package_id, count, choices=None, rng=random):
+  """Returns multiple choice questions for up to count random active vocabularies of a package"""
+  ids = list(Vocabulary.objects.alive().filter(packages=package_id).values_list('pk', flat=True))
+  return generate_questions(rng.sample(ids, min(count, len(ids))), choices, rng)
@@ -0,0 +1,5 @@
+from game import consumers
+
+websocket_routes = {
+    '/ws/duel/': consumers.duel,
+}
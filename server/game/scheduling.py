@@ -0,0 +1,28 @@
+"""
+Spaced repetition scheduling following the SM-2 algorithm.
+A review is graded with a quality from 0 (complete blackout) to 5 (perfect response).
+"""
+
+QUALITY_RANGE = range(0, 6)
+PASSING_QUALITY = 3
+MIN_EASE = 1.3
+
+
+def schedule(quality, repetitions, interval, ease):
+  """Returns the (repetitions, interval in days, ease) after a review with the given quality"""
+  if quality < PASSING_QUALITY:
+    # failed reviews start over but keep the lowered ease
+    repetitions = 0
+    interval = 1
+  else:
+    if repetitions == 0:
+      interval = 1
+    elif repetitions == 1:
+      interval = 6
+    else:
+      interval = round(interval * ease)
+    repetitions += 1
+
+  ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+
+  return repetitions, interval, ease
@@ -0,0 +1,61 @@
+from game.models import Folder, Learning, LearningStats, Package, PracticeSession, Vocabulary
+from rest_framework import serializers
+
+
+class VocabularySerializer(serializers.ModelSerializer):
+  """Serializes a vocabulary with the ids of its words"""
+
+  class Meta:
+    model = Vocabulary
+    fields = ['id', 'domestic_language', 'foreign_language', 'domestic_words', 'foreign_words', 'author', 'official',
+              'context', 'active', 'created_at', 'updated_at']
+
+
+class PackageSerializer(serializers.ModelSerializer):
+  """Serializes a package with the ids of its vocabularies"""
+  description = serializers.CharField(source='describtion', allow_null=True, required=False)
+
+  class Meta:
+    model = Package
+    fields = ['id', 'name', 'author', 'official', 'description', 'vocabularies', 'vocabulary_count', 'active',
+              'created_at', 'updated_at']
+    read_only_fields = ['vocabulary_count']
+
+
+class FolderSerializer(serializers.ModelSerializer):
+  """Serializes a folder with the ids of its packages"""
+  description = serializers.CharField(source='describtion', allow_null=True, required=False)
+
+  class Meta:
+    model = Folder
+    fields = ['id', 'name', 'author', 'official', 'description', 'packages', 'package_count', 'active', 'created_at',
+              'updated_at']
+    read_only_fields = ['package_count']
+
+
+class LearningSerializer(serializers.ModelSerializer):
+  """Serializes the progress of a user on a vocabulary"""
+
+  class Meta:
+    model = Learning
+    fields = ['id', 'vocabulary', 'score', 'repetitions', 'interval', 'ease', 'due_at', 'practices',
+              'successful_practices', 'active', 'created_at', 'updated_at']
+    read_only_fields = ['practices', 'successful_practices']
+
+
+class LearningStatsSerializer(serializers.ModelSerializer):
+  """Serializes the statistics of a user in a language"""
+  accuracy = serializers.FloatField(read_only=True)
+
+  class Meta:
+    model = LearningStats
+    fields = ['language', 'learnings', 'mastered', 'reviews', 'successful_reviews', 'accuracy', 'current_streak',
+              'longest_streak', 'last_review_on', 'updated_at']
+
+
+class PracticeSessionSerializer(serializers.ModelSerializer):
+  """Serializes a submitted practice session"""
+
+  class Meta:
+    model = PracticeSession
+    fields = ['id', 'client_id', 'answers', 'successful_answers', 'created_at']
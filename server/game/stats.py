@@ -0,0 +1,106 @@
+"""
+Learning statistics.
+Accuracy, streaks and progress of a user are kept in one LearningStats row per (user, foreign language), so profile
+and dashboard reads fetch a few rows by the unique index instead of aggregating learnings. Rows are locked and changed
+in the transaction of every created learning and every review. recompute, run nightly by `manage.py recompute_stats`,
+rebuilds what can be derived from the learnings and ends the streaks of users who missed a day.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from game.models import Learning, LearningStats, Vocabulary
+from game.scheduling import PASSING_QUALITY
+
+MASTERED_INTERVAL = 21   # days, learnings scheduled this far ahead are considered known
+
+
+def is_mastered(interval):
+  return interval >= MASTERED_INTERVAL
+
+
+def _locked(user_id, language_id):
+  """returns the stats row of a user and language locked until the end of the transaction, created if missing"""
+  return LearningStats.objects.select_for_update().get_or_create(user_id=user_id, language_id=language_id)[0]
+
+
+def streak(stats, today):
+  """Returns (current, longest) streak of the stats after a review today"""
+  if stats.last_review_on == today:
+    current = stats.current_streak
+  elif stats.last_review_on == today - timedelta(days=1):
+    current = stats.current_streak + 1
+  else:
+    current = 1
+  return current, max(current, stats.longest_streak)
+
+
+def record_learning(learning, language_id):
+  """Counts a created learning, call it in the transaction which created it"""
+  stats = _locked(learning.user_id, language_id)
+  LearningStats.objects.filter(pk=stats.pk).update(learnings=stats.learnings + 1)
+
+
+def record_reviews(reviews, now=None):
+  """
+  Counts saved reviews, call it in the transaction which saved them.
+  reviews is a list of (learning, quality, interval before the review), one row update per user and language.
+  """
+  today = timezone.localdate(now or timezone.now())
+  languages = dict(Vocabulary.objects.filter(pk__in={learning.vocabulary_id for learning, _, _ in reviews})
+                   .values_list('pk', 'foreign_language_id'))
+  changes = defaultdict(lambda: {'reviews': 0, 'successful_reviews': 0, 'mastered': 0})
+  for learning, quality, interval in reviews:
+    change = changes[(learning.user_id, languages[learning.vocabulary_id])]
+    change['reviews'] += 1
+    change['successful_reviews'] += 1 if quality >= PASSING_QUALITY else 0
+    change['mastered'] += is_mastered(learning.interval) - is_mastered(interval)
+
+  # locked in a fixed order, so concurrent reviews of the same users can not deadlock
+  for (user_id, language_id), change in sorted(changes.items()):
+    stats = _locked(user_id, language_id)
+    current, longest = streak(stats, today)
+    # the row is locked, so the new values can be computed here, never below zero if the row drifted
+    LearningStats.objects.filter(pk=stats.pk).update(
+        current_streak=current, longest_streak=longest, last_review_on=today,
+        **{field: max(0, getattr(stats, field) + delta) for field, delta in change.items()})
+
+
+def get_stats(user):
+  """Returns the stats of a user in all languages, ordered by language name"""
+  return LearningStats.objects.alive().filter(user=user).select_related('language').order_by('language__name')
+
+
+def recompute(user_ids, today=None):
+  """
+  Recomputes learnings and mastered of the given users from their active learnings and ends streaks of the users
+  who did not review yesterday or today. Returns the number of rows which changed.
+  Reviews and streaks are not derived from learnings, they are only counted as they happen.
+  """
+  today = today or timezone.localdate()
+  counts = (Learning.objects.alive().filter(user_id__in=user_ids).order_by()
+            .values_list('user_id', 'vocabulary__foreign_language_id')
+            .annotate(learnings=Count('pk'), mastered=Count('pk', filter=Q(interval__gte=MASTERED_INTERVAL))))
+  counts = {(user_id, language_id): (learnings, mastered) for user_id, language_id, learnings, mastered in counts}
+
+  with transaction.atomic():
+    rows = LearningStats.objects.select_for_update().filter(user_id__in=user_ids)
+    existing = set()
+    wrong = []
+    for stats in rows:
+      existing.add((stats.user_id, stats.language_id))
+      learnings, mastered = counts.get((stats.user_id, stats.language_id), (0, 0))
+      expired = bool(stats.current_streak) and stats.last_review_on < today - timedelta(days=1)
+      if (stats.learnings, stats.mastered) != (learnings, mastered) or expired:
+        stats.learnings, stats.mastered = learnings, mastered
+        stats.current_streak = 0 if expired else stats.current_streak
+        wrong.append(stats)
+    LearningStats.objects.bulk_update(wrong, ['learnings', 'mastered', 'current_streak'])
+    missing = [LearningStats(user_id=user_id, language_id=language_id, learnings=learnings, mastered=mastered)
+               for (user_id, language_id), (learnings, mastered) in counts.items()
+               if (user_id, language_id) not in existing]
+    LearningStats.objects.bulk_create(missing, ignore_conflicts=True)
+
+  return len(wrong) + len(missing)
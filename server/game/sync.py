@@ -0,0 +1,174 @@
+"""
+Delta sync for offline clients.
+Every entity type is read in (updated_at, id) order starting after the position stored in the cursor, so a client
+only receives rows which changed since its last sync, including soft deleted ones (active is false).
+Which rows a user sees depends on its subscriptions and on the links between folders, packages and vocabularies, which
+do not change the updated_at of the rows they make visible. So the cursor also stores a fingerprint of the rows visible
+per entity type. When it differs, because the user subscribed, unsubscribed or content was relinked, the entity type
+is reset: the sync lists it in `reset`, the client drops its rows of that type and receives all visible ones again.
+Changing a link also bumps updated_at of the rows listing it, see touch_links, so their id lists are sent again.
+"""
+import base64
+import binascii
+import hashlib
+import json
+import uuid
+from datetime import datetime, timedelta
+
+from content.models import Language, Word
+from core.models import asure_user
+from core.pagination import after
+from django.db.models import Q
+from django.utils import timezone
+from game.models import Folder, Package, Vocabulary
+
+# rows updated within the lag are held back, a transaction which commits late could otherwise write an updated_at
+# which lies before a cursor that was already handed out
+SYNC_LAG = timedelta(seconds=2)
+SYNC_KEY = ('updated_at', 'id')
+
+
+def _languages(user):
+  return Language.objects.filter(subscribers=user)
+
+
+def _words(user):
+  return Word.objects.filter(language__in=_languages(user))
+
+
+def _folders(user):
+  return Folder.objects.filter(subscribers=user)
+
+
+def _packages(user):
+  return Package.objects.filter(Q(subscribers=user) | Q(packages__in=_folders(user))).distinct()
+
+
+def _vocabularies(user):
+  return Vocabulary.objects.filter(packages__in=_packages(user)).distinct()
+
+
+def _uuids(values):
+  return [str(value) for value in values]
+
+
+# name: (rows visible to a user, fields sent to the client)
+ENTITIES = {
+    'languages': (_languages, ['name', 'official']),
+    'words': (_words, ['name', 'language_id', 'description', 'official', 'type', 'gender', 'synonym_group']),
+    'folders': (_folders, ['name', 'official', 'describtion']),
+    'packages': (_packages, ['name', 'official', 'describtion']),
+    'vocabularies': (_vocabularies, ['domestic_language_id', 'foreign_language_id', 'official', 'context_id']),
+}
+# name: many to many relations sent as lists of ids
+M2M = {
+    'folders': ['packages'],
+    'packages': ['vocabularies'],
+    'vocabularies': ['domestic_words', 'foreign_words'],
+}
+# name: entity whose visible rows decide which rows are visible, words are visible with their language
+SCOPES = {'words': 'languages'}
+
+
+def fingerprint(user, name):
+  """Returns a digest of the ids of the rows of an entity type visible to the user"""
+  scope, _ = ENTITIES[SCOPES.get(name, name)]
+  digest = hashlib.sha256()
+  for pk in scope(user).order_by('pk').values_list('pk', flat=True):
+    digest.update(pk.bytes)
+  return digest.hexdigest()[:16]
+
+
+def encode_cursor(positions):
+  """Returns an opaque cursor for the given {entity: (updated_at, id, fingerprint)} positions"""
+  data = {name: [updated_at.isoformat() if updated_at else None, str(pk) if pk else None, scope]
+          for name, (updated_at, pk, scope) in positions.items()}
+  return base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+
+def _position(position):
+  if not isinstance(position, list) or len(position) != 3 or not isinstance(position[2], str):
+    raise ValueError('position is not an [updated_at, id, fingerprint] list')
+  updated_at, pk, scope = position
+  if updated_at is None and pk is None:
+    return None, None, scope
+  if not isinstance(updated_at, str) or not isinstance(pk, str):
+    raise ValueError('position is not an [updated_at, id, fingerprint] list')
+  return datetime.fromisoformat(updated_at), uuid.UUID(pk), scope
+
+
+def decode_cursor(cursor):
+  """Returns the positions stored in a cursor, an empty cursor starts from the beginning"""
+  if not cursor:
+    return {}
+  try:
+    data = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    if not isinstance(data, dict):
+      raise ValueError('cursor is not an object')
+    positions = {name: _position(position) for name, position in data.items()}
+    return {name: position for name, position in positions.items() if name in ENTITIES}
+  except (ValueError, TypeError, binascii.Error):
+    raise ValueError('cursor is invalid')
+
+
+def serialize(name, row):
+  """Returns the json representation of a changed row"""
+  _, fields = ENTITIES[name]
+  data = {'id': str(row.pk), 'active': row.active, 'updated_at': row.updated_at.isoformat()}
+  for field in fields:
+    value = getattr(row, field)
+    data[field] = str(value) if field.endswith('_id') and value is not None else value
+  for relation in M2M.get(name, []):
+    data[relation] = _uuids(related.pk for related in getattr(row, relation).all())
+  return data
+
+
+def changes_since(user, cursor=None, limit=500, now=None):
+  """
+  Returns the rows visible to the user which changed after the cursor, at most limit per entity type.
+  The result contains the changes per entity, the entity types the client has to drop its rows of before applying the
+  changes, the cursor for the next call and whether more changes are waiting.
+  """
+  asure_user(user, "user")
+  if limit < 1:
+    raise ValueError('limit must be positive')
+  positions = decode_cursor(cursor)
+  until = (now or timezone.now()) - SYNC_LAG
+
+  changes = {}
+  reset = []
+  has_more = False
+  for name, (scope, _) in ENTITIES.items():
+    current = fingerprint(user, name)
+    updated_at, pk, visible = positions.get(name, (None, None, current))
+    if visible != current:
+      reset.append(name)
+      updated_at, pk = None, None
+    queryset = scope(user).filter(updated_at__lte=until).order_by(*SYNC_KEY)
+    if updated_at is not None:
+      queryset = queryset.filter(after(SYNC_KEY, (updated_at, pk)))
+    rows = list(queryset.prefetch_related(*M2M.get(name, []))[:limit + 1])
+    if len(rows) > limit:
+      has_more = True
+      rows = rows[:limit]
+    if rows:
+      updated_at, pk = rows[-1].updated_at, rows[-1].pk
+    positions[name] = (updated_at, pk, current)
+    changes[name] = [serialize(name, row) for row in rows]
+
+  return {'changes': changes, 'reset': reset, 'cursor': encode_cursor(positions), 'has_more': has_more}
+
+
+def touch_links(sender, instance, action, reverse, model, pk_set, **kwargs):
+  """
+  m2m_changed handler bumping updated_at of the rows whose id lists changed, so the next sync sends them again.
+  From the reverse side these are the rows of pk_set, which a clear does not fill, so clears are handled before.
+  """
+  if action not in ('post_add', 'post_remove', 'pre_clear'):
+    return
+  if not reverse:
+    owners = type(instance).objects.filter(pk=instance.pk)
+  else:
+    field = next(field.name for field in model._meta.many_to_many if field.remote_field.through is sender)
+    owners = model.objects.filter(pk__in=pk_set) if pk_set is not None else model.objects.filter(**{field: instance})
+  owners.update(updated_at=timezone.now())
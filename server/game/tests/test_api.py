@@ -0,0 +1,189 @@
+import uuid
+
+from asgiref.sync import sync_to_async
+from content.models import Language, Word
+from core.cache import get_cache
+from core.leaderboard import GLOBAL, Leaderboard, weekly_board
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from game.models import Learning, Package, Vocabulary
+
+
+@override_settings(API_THREAD_SENSITIVE=True)
+class ApiTests(TestCase):
+
+  def setUp(self):
+    get_cache().backend.clear()
+    Leaderboard(GLOBAL).clear()
+    Leaderboard(weekly_board()).clear()
+    self.user = get_user_model().objects.create_user(
+        name='testuser',
+        password='testpassword',
+    )
+    self.english = Language.objects.create_language(name='English', author=self.user, official=True)
+    self.spanish = Language.objects.create_language(name='Spanish', author=self.user, official=True)
+    self.house = Word.objects.create_word(name='house', language=self.english, description='a building',
+                                          author=self.user, official=True)
+    self.casa = Word.objects.create_word(name='casa', language=self.spanish, description='un edificio',
+                                         author=self.user, official=True)
+    self.vocabulary = Vocabulary.objects.create_vocabulary_with_words(
+        author=self.user,
+        official=True,
+        domestic_language=self.english,
+        foreign_language=self.spanish,
+        domestic_words=[self.house],
+        foreign_words=[self.casa],
+    )
+    self.package = Package.objects.create_package_with_vocabularies(
+        name='houses',
+        author=self.user,
+        official=True,
+        description='test package',
+        vocabulary=[self.vocabulary],
+    )
+    self.async_client.force_login(self.user)
+
+  async def test_login_required(self):
+    """Test anonymous requests are rejected"""
+    response = await AsyncClient().get(reverse('game:packages'))
+    self.assertEqual(response.status_code, 401)
+
+  async def test_method_not_allowed(self):
+    """Test other methods are answered with 405"""
+    response = await self.async_client.delete(reverse('game:packages'))
+    self.assertEqual(response.status_code, 405)
+
+  async def test_list_and_get_words(self):
+    """Test words are listed per language and returned by id"""
+    response = await self.async_client.get(reverse('content:words'), {'language': str(self.english.pk)})
+    self.assertEqual([word['name'] for word in response.json()['results']], ['house'])
+
+    response = await self.async_client.get(reverse('content:word', args=[self.casa.pk]))
+    self.assertEqual(response.json()['name'], 'casa')
+
+  async def test_words_are_paged(self):
+    """Test following the cursor lists all words of a language"""
+    await sync_to_async(Word.objects.create_word)(name='tree', language=self.english, description='a plant',
+                                                  author=self.user, official=True)
+    names, cursor = [], ''
+    while cursor is not None:
+      response = await self.async_client.get(reverse('content:words'), {'language': str(self.english.pk),
+                                                                        'limit': 1, 'cursor': cursor})
+      names.extend(word['name'] for word in response.json()['results'])
+      cursor = response.json()['next']
+    self.assertEqual(names, ['house', 'tree'])
+
+  async def test_invalid_input(self):
+    """Test invalid input is answered with 400 and missing objects with 404"""
+    response = await self.async_client.get(reverse('content:words'), {'language': 'english'})
+    self.assertEqual(response.status_code, 400)
+    response = await self.async_client.get(reverse('content:words'), {'language': str(self.package.pk)})
+    self.assertEqual(response.status_code, 404)
+    response = await self.async_client.get(reverse('content:word', args=[self.package.pk]))
+    self.assertEqual(response.status_code, 404)
+
+  async def test_create_word(self):
+    """Test users create unofficial words and only staff members official ones"""
+    data = {'name': 'tree', 'language': str(self.english.pk), 'description': 'a plant'}
+    response = await self.async_client.post(reverse('content:words'), data, content_type='application/json')
+    self.assertEqual(response.status_code, 201)
+    self.assertFalse(response.json()['official'])
+
+    data = {'name': 'car', 'language': str(self.english.pk), 'description': 'a vehicle', 'official': True}
+    response = await self.async_client.post(reverse('content:words'), data, content_type='application/json')
+    self.assertEqual(response.status_code, 400)
+
+  async def test_create_duplicate_word(self):
+    """Test a word with the name of an existing word is answered with 409"""
+    data = {'name': 'house', 'language': str(self.english.pk), 'description': 'another building'}
+    response = await self.async_client.post(reverse('content:words'), data, content_type='application/json')
+    self.assertEqual(response.status_code, 409)
+    self.assertEqual(response.json()['detail'], 'conflicts with an existing object')
+    self.assertEqual(await sync_to_async(Word.objects.filter(name='house').count)(), 1)
+
+  async def test_packages_and_vocabularies(self):
+    """Test packages and vocabularies are returned with the ids of their content"""
+    response = await self.async_client.get(reverse('game:packages'))
+    self.assertEqual([package['name'] for package in response.json()['results']], ['houses'])
+
+    response = await self.async_client.get(reverse('game:package', args=[self.package.pk]))
+    self.assertEqual(response.json()['vocabularies'], [str(self.vocabulary.pk)])
+
+    response = await self.async_client.get(reverse('game:package-vocabularies', args=[self.package.pk]))
+    self.assertEqual([vocabulary['id'] for vocabulary in response.json()['results']], [str(self.vocabulary.pk)])
+    self.assertIsNone(response.json()['next'])
+
+    response = await self.async_client.get(reverse('game:vocabulary', args=[self.vocabulary.pk]))
+    self.assertEqual(response.json()['foreign_words'], [str(self.casa.pk)])
+
+  async def test_package_quiz(self):
+    """Test a quiz of a package offers the answer among the choices"""
+    response = await self.async_client.get(reverse('game:package-quiz', args=[self.package.pk]), {'limit': 5})
+    question = response.json()['results'][0]
+    self.assertEqual(question['prompt'], ['house'])
+    self.assertEqual(question['choices'][question['answer']], 'casa')
+
+    response = await self.async_client.get(reverse('game:package-quiz', args=[self.vocabulary.pk]))
+    self.assertEqual(response.status_code, 404)
+
+  async def test_learn_and_review(self):
+    """Test starting to learn a vocabulary and reviewing it moves it out of the due learnings"""
+    response = await self.async_client.post(reverse('game:learnings'), {'vocabulary': str(self.vocabulary.pk)},
+                                            content_type='application/json')
+    self.assertEqual(response.status_code, 201)
+    pk = response.json()['id']
+
+    response = await self.async_client.get(reverse('game:learnings'))
+    self.assertEqual([learning['id'] for learning in response.json()['results']], [pk])
+
+    response = await self.async_client.post(reverse('game:review', args=[pk]), {'quality': 5},
+                                            content_type='application/json')
+    self.assertEqual(response.json()['interval'], 1)
+    response = await self.async_client.get(reverse('game:learnings'))
+    self.assertEqual(response.json()['results'], [])
+
+    response = await self.async_client.get(reverse('game:stats'))
+    stats = response.json()['results']
+    self.assertEqual([(row['language'], row['learnings'], row['reviews'], row['accuracy'], row['current_streak'])
+                      for row in stats], [(str(self.spanish.pk), 1, 1, 100.0, 1)])
+
+  async def test_submit_session(self):
+    """Test a session is applied once, retries are answered with the stored session"""
+    create = sync_to_async(Learning.objects.create_learning_with_vocabulary)
+    learning = await create(user=self.user, vocabulary=self.vocabulary)
+    data = {'session': str(uuid.uuid4()), 'answers': [{'learning': str(learning.pk), 'quality': 5}]}
+    response = await self.async_client.post(reverse('game:sessions'), data, content_type='application/json')
+    self.assertEqual(response.status_code, 201)
+    response = await self.async_client.post(reverse('game:sessions'), data, content_type='application/json')
+    self.assertEqual(response.status_code, 200)
+    self.assertEqual(response.json()['successful_answers'], 1)
+
+    data['session'] = 'retry'
+    response = await self.async_client.post(reverse('game:sessions'), data, content_type='application/json')
+    self.assertEqual(response.status_code, 400)
+
+  async def test_leaderboard(self):
+    """Test the leaderboard lists the top users and the rank of the user"""
+    await sync_to_async(Leaderboard(GLOBAL).set)({self.user.pk: 1100})
+    response = await self.async_client.get(reverse('game:leaderboard'))
+    self.assertEqual(response.json()['rank'], 1)
+    self.assertEqual([(entry['name'], entry['score']) for entry in response.json()['results']], [('testuser', 1100)])
+
+    response = await self.async_client.get(reverse('game:leaderboard'), {'board': 'language', 'language': 'x'})
+    self.assertEqual(response.status_code, 400)
+    response = await self.async_client.get(reverse('game:leaderboard'), {'board': 'weekly'})
+    self.assertIsNone(response.json()['rank'])
+
+  async def test_review_of_other_users(self):
+    """Test users can not review the learnings of others"""
+    other = await self.create_other_learning()
+    response = await self.async_client.post(reverse('game:review', args=[other.pk]), {'quality': 5},
+                                            content_type='application/json')
+    self.assertEqual(response.status_code, 404)
+
+  async def create_other_learning(self):
+    def create():
+      user = get_user_model().objects.create_user(name='otheruser', password='testpassword')
+      return Learning.objects.create_learning_with_vocabulary(user=user, vocabulary=self.vocabulary)
+    return await sync_to_async(create)()
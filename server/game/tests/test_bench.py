@@ -0,0 +1,34 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from content.models import Word
+from django.core.management import call_command
+from django.test import TestCase
+from game.benchmarks import CASES, compare
+
+
+class BenchTests(TestCase):
+
+  def test_bench_writes_results(self):
+    """Test all cases run on a small scale, the seeded content is rolled back and the results are stored as json"""
+    with tempfile.TemporaryDirectory() as directory:
+      output = os.path.join(directory, 'bench.json')
+      call_command('bench', words=10, vocabularies=5, learnings=3, package_size=5, rounds=2, output=output,
+                   stdout=StringIO())
+      with open(output, encoding='utf-8') as stream:
+        report = json.load(stream)
+
+      out = StringIO()
+      call_command('bench', 'next_due', words=10, vocabularies=5, rounds=2, compare=output, stdout=out)
+
+    self.assertEqual(set(report['results']), set(CASES))
+    self.assertEqual(report['scale']['words'], 10)
+    self.assertEqual(report['results']['next_due']['rounds'], 2)
+    self.assertIn('next_due: ', out.getvalue())
+    self.assertEqual(Word.objects.count(), 0)
+
+  def test_compare(self):
+    """Test results are compared by their medians"""
+    self.assertEqual(compare({'a': {'median_ms': 2}, 'b': {'median_ms': 1}}, {'a': {'median_ms': 4}}), {'a': 0.5})
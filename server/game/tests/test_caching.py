@@ -0,0 +1,129 @@
+from unittest import mock
+
+from content.caching import get_language, get_word
+from content.models import Language, Word
+from core.cache import get_cache
+from core.routers import ReplicaRouter
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import TestCase, override_settings
+from game.caching import get_folder, get_package
+from game.models import Folder, Package, Vocabulary
+
+
+class ContentCacheTests(TestCase):
+
+  def setUp(self):
+    get_cache().backend.clear()
+    self.user = get_user_model().objects.create_superuser(
+        name='testuser',
+        password='testpassword',
+    )
+    self.english = Language.objects.create_language(name='English', author=self.user, official=True)
+    self.spanish = Language.objects.create_language(name='Spanish', author=self.user, official=True)
+    self.house = Word.objects.create_word(name='house', language=self.english, description='a building',
+                                          author=self.user, official=True)
+    self.casa = Word.objects.create_word(name='casa', language=self.spanish, description='un edificio',
+                                         author=self.user, official=True)
+    self.vocabulary = self.create_vocabulary()
+    self.package = Package.objects.create_package_with_vocabularies(
+        name='houses',
+        author=self.user,
+        official=True,
+        description='test package',
+        vocabulary=[self.vocabulary],
+    )
+    self.folder = Folder.objects.create_folder_with_packages(
+        name='beginners',
+        author=self.user,
+        official=True,
+        description='test folder',
+        package=[self.package],
+    )
+
+  def create_vocabulary(self):
+    return Vocabulary.objects.create_vocabulary_with_words(
+        author=self.user,
+        official=True,
+        domestic_language=self.english,
+        foreign_language=self.spanish,
+        domestic_words=[self.house],
+        foreign_words=[self.casa],
+    )
+
+  def test_reads_are_served_from_the_cache(self):
+    """Test a second read does not query the database"""
+    self.assertEqual(get_word(self.house.pk)['name'], 'house')
+    self.assertEqual(get_package(self.package.pk)['name'], 'houses')
+    with self.assertNumQueries(0):
+      self.assertEqual(get_word(self.house.pk)['name'], 'house')
+      self.assertEqual(get_package(self.package.pk)['vocabularies'], [self.vocabulary.pk])
+    metrics = get_cache().metrics()
+    self.assertGreaterEqual(metrics['hits'], 2)
+
+  def test_saving_invalidates(self):
+    """Test saved languages and words are read fresh"""
+    get_language(self.english.pk)
+    get_word(self.house.pk)
+    with self.captureOnCommitCallbacks(execute=True):
+      self.english.name = 'British English'
+      self.english.save()
+      self.house.add_practice(True)
+      self.house.description = 'where people live'
+      self.house.save()
+
+    self.assertEqual(get_language(self.english.pk)['name'], 'British English')
+    self.assertEqual(get_word(self.house.pk)['description'], 'where people live')
+
+  def test_soft_deleted_objects_are_not_returned(self):
+    """Test soft deleted objects disappear from the cache"""
+    get_folder(self.folder.pk)
+    with self.captureOnCommitCallbacks(execute=True):
+      self.folder.soft_delete()
+    self.assertIsNone(get_folder(self.folder.pk))
+
+  def test_changing_relations_invalidates(self):
+    """Test adding vocabularies and packages from either side invalidates the cached objects"""
+    get_package(self.package.pk)
+    get_folder(self.folder.pk)
+    with self.captureOnCommitCallbacks(execute=True):
+      vocabulary = self.create_vocabulary()
+      self.package.vocabularies.add(vocabulary)
+      other = Package.objects.create_package_with_vocabularies(
+          name='more houses',
+          author=self.user,
+          official=True,
+          description='test package',
+          vocabulary=[vocabulary],
+      )
+      other.packages.add(self.folder)
+
+    self.assertEqual(len(get_package(self.package.pk)['vocabularies']), 2)
+    self.assertEqual(len(get_folder(self.folder.pk)['packages']), 2)
+
+  def test_invalidation_waits_for_the_commit(self):
+    """Test a miss before the commit does not put the old value back for good"""
+    get_language(self.english.pk)
+    with self.captureOnCommitCallbacks(execute=True):
+      self.english.name = 'British English'
+      self.english.save()
+      # another request reading before the commit sees the committed name
+      get_cache().backend.set(get_cache().key('language', self.english.pk), {'name': 'English'}, 300)
+    self.assertEqual(get_language(self.english.pk)['name'], 'British English')
+
+  @override_settings(REPLICAS={'REPLICAS': ['replica'], 'MODELS': ['content.word', 'game.package']})
+  def test_caches_are_filled_from_the_primary(self):
+    """Test cache misses read from the primary, a lagging replica would cache a value the writer already changed"""
+    route = ReplicaRouter.db_for_read
+    reads = []
+
+    def db_for_read(router, model, **hints):
+      reads.append(route(router, model, **hints))
+      return None   # the tests have no replica
+
+    with mock.patch.object(ReplicaRouter, 'db_for_read', db_for_read), \
+         mock.patch.object(connections['default'], 'in_atomic_block', False):
+      get_word(self.house.pk)
+      get_package(self.package.pk)
+    self.assertIn('default', reads)
+    self.assertNotIn('replica', reads)
@@ -0,0 +1,78 @@
+from content.models import Language, Word
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from game.models import Folder, Package, Vocabulary
+
+
+class GameCounterTests(TestCase):
+
+  def setUp(self):
+    self.user = get_user_model().objects.create_superuser(
+        name='testuser',
+        password='testpassword',
+    )
+    self.english = Language.objects.create_language(name='English', author=self.user, official=True)
+    self.spanish = Language.objects.create_language(name='Spanish', author=self.user, official=True)
+    self.house = Word.objects.create_word(name='house', language=self.english, description='a building',
+                                          author=self.user, official=True)
+    self.casa = Word.objects.create_word(name='casa', language=self.spanish, description='un edificio',
+                                         author=self.user, official=True)
+    self.vocabularies = [self.create_vocabulary() for _ in range(3)]
+    self.package = Package.objects.create_package_with_vocabularies(
+        name='houses',
+        author=self.user,
+        official=True,
+        description='test package',
+        vocabulary=self.vocabularies[:2],
+    )
+
+  def create_vocabulary(self):
+    return Vocabulary.objects.create_vocabulary_with_words(
+        author=self.user,
+        official=True,
+        domestic_language=self.english,
+        foreign_language=self.spanish,
+        domestic_words=[self.house],
+        foreign_words=[self.casa],
+    )
+
+  def vocabulary_count(self):
+    return Package.objects.filter(pk=self.package.pk).values_list('vocabulary_count', flat=True).get()
+
+  def test_vocabulary_count(self):
+    """Test vocabulary counts follow links changed from both sides"""
+    self.assertEqual(self.package.vocabulary_count, 2)
+    self.assertEqual(self.vocabulary_count(), 2)
+
+    self.package.vocabularies.add(self.vocabularies[2], self.vocabularies[0])
+    self.assertEqual(self.vocabulary_count(), 3)
+    self.package.vocabularies.remove(self.vocabularies[0])
+    self.assertEqual((self.package.vocabulary_count, self.vocabulary_count()), (2, 2))
+
+    self.vocabularies[0].packages.add(self.package)
+    self.assertEqual(self.vocabulary_count(), 3)
+    self.vocabularies[1].packages.clear()
+    self.vocabularies[2].packages.remove(self.package)
+    self.assertEqual(self.vocabulary_count(), 1)
+
+  def test_package_count(self):
+    """Test package counts count the links of a folder"""
+    other = Package.objects.create_package_with_vocabularies(
+        name='cars',
+        author=self.user,
+        official=True,
+        description='test package',
+        vocabulary=self.vocabularies[:1],
+    )
+    folder = Folder.objects.create_folder_with_packages(
+        name='beginners',
+        author=self.user,
+        official=True,
+        description='test folder',
+        package=[self.package, other],
+    )
+    self.assertEqual(Folder.objects.get(pk=folder.pk).package_count, 2)
+
+    folder.packages.clear()
+    self.assertEqual(Folder.objects.get(pk=folder.pk).package_count, 0)
+    self.assertEqual(folder.package_count, 0)
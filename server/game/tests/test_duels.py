@@ -0,0 +1,231 @@
+import asyncio
+import json
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from content.models import Language, Word
+from core.rating import DRAW, LOSS, WIN
+from core.tokens import access_token
+from core.websocket import websocket_router
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from game import duels
+from game.duels import Duel, Question, draw_questions
+from game.models import Package, Vocabulary
+from game.routing import websocket_routes
+
+
+class DuelTests(SimpleTestCase):
+
+  def setUp(self):
+    self.question = Question('vocabulary', ['house'], ['casa'], ['casa', 'hogar'])
+    self.duel = Duel('duel', ['first', 'second'], [self.question])
+
+  def test_synonyms_are_accepted(self):
+    """Test answers are compared case insensitive and synonyms count"""
+    self.assertTrue(self.question.is_correct(' Casa'))
+    self.assertTrue(self.question.is_correct('hogar'))
+    self.assertFalse(self.question.is_correct('coche'))
+
+  def test_more_correct_answers_win(self):
+    """Test the player with more correct answers wins regardless of time"""
+    self.duel.answer('first', self.question, 'casa', 9)
+    self.duel.answer('second', self.question, 'coche', 1)
+    self.assertEqual(self.duel.outcome(), WIN)
+
+  def test_faster_player_wins_ties(self):
+    """Test equal counts go to the faster player and no correct answers are a draw"""
+    self.assertEqual(self.duel.outcome(), DRAW)
+    self.duel.answer('first', self.question, 'casa', 3)
+    self.duel.answer('second', self.question, 'casa', 2)
+    self.assertEqual(self.duel.outcome(), LOSS)
+
+  def test_leaving_loses(self):
+    """Test a player who left loses"""
+    self.duel.answer('first', self.question, 'casa', 1)
+    self.assertEqual(self.duel.outcome(forfeit='first'), LOSS)
+    self.assertEqual(self.duel.outcome(forfeit='second'), WIN)
+
+
+class WebSocketClient:
+  """drives a consumer like an ASGI server would"""
+
+  def __init__(self, application, query, cookie='', headers=(), subprotocols=()):
+    self.inbox = asyncio.Queue()
+    self.outbox = asyncio.Queue()
+    scope = {'type': 'websocket', 'path': '/ws/duel/', 'query_string': query.encode(),
+             'headers': [(b'cookie', cookie.encode()), *headers], 'subprotocols': list(subprotocols)}
+    self.task = asyncio.ensure_future(application(scope, self.inbox.get, self.outbox.put))
+    self.inbox.put_nowait({'type': 'websocket.connect'})
+
+  async def receive(self):
+    message = await asyncio.wait_for(self.outbox.get(), 5)
+    if message['type'] == 'websocket.accept':
+      self.accepted = message
+      return await self.receive()
+    if message['type'] == 'websocket.send':
+      return json.loads(message['text'])
+    return message
+
+  async def receive_until(self, message_type):
+    messages = []
+    while not messages or messages[-1].get('type') != message_type:
+      messages.append(await self.receive())
+    return messages
+
+  def send(self, data):
+    self.inbox.put_nowait({'type': 'websocket.receive', 'text': json.dumps(data)})
+
+  def disconnect(self):
+    self.inbox.put_nowait({'type': 'websocket.disconnect', 'code': 1000})
+
+
+@override_settings(API_THREAD_SENSITIVE=True, DUELS={'QUESTIONS': 2, 'QUESTION_SECONDS': 5, 'MATCH_INTERVAL': 0.01})
+class DuelConsumerTests(TestCase):
+
+  def setUp(self):
+    duels._matchmaker = None
+    self.first = self.create_user('firstplayer')
+    self.second = self.create_user('secondplayer')
+    english = Language.objects.create_language(name='English', author=self.first, official=True)
+    spanish = Language.objects.create_language(name='Spanish', author=self.first, official=True)
+    vocabularies = []
+    for domestic, foreign in (('house', 'casa'), ('car', 'coche')):
+      vocabularies.append(Vocabulary.objects.create_vocabulary_with_words(
+          author=self.first,
+          official=True,
+          domestic_language=english,
+          foreign_language=spanish,
+          domestic_words=[Word.objects.create_word(name=domestic, language=english, description=domestic,
+                                                   author=self.first, official=True)],
+          foreign_words=[Word.objects.create_word(name=foreign, language=spanish, description=foreign,
+                                                  author=self.first, official=True)],
+      ))
+    self.package = Package.objects.create_package_with_vocabularies(
+        name='basics',
+        author=self.first,
+        official=True,
+        description='test package',
+        vocabulary=vocabularies,
+    )
+    self.answers = {'house': 'casa', 'car': 'coche'}
+    self.application = websocket_router(websocket_routes)
+
+  def create_user(self, name):
+    user = get_user_model().objects.create_user(name=name, password='testpassword')
+    client = Client()
+    client.force_login(user)
+    user.cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+    return user
+
+  def connect(self, user):
+    return WebSocketClient(self.application, f'package={self.package.pk}', user.cookie)
+
+  async def start(self):
+    first = self.connect(self.first)
+    self.assertEqual((await first.receive())['type'], 'waiting')
+    second = self.connect(self.second)
+    await second.receive_until('start')
+    start = (await first.receive_until('start'))[-1]
+    self.assertEqual(start['opponent']['name'], 'secondplayer')
+    return first, second
+
+  async def test_duel_settles_elo(self):
+    """Test the player answering correctly wins the duel and gains elo"""
+    first, second = await self.start()
+    for _ in range(2):
+      question = (await first.receive_until('question'))[-1]
+      await second.receive_until('question')
+      first.send({'type': 'answer', 'index': question['index'], 'answer': self.answers[question['prompt'][0]]})
+      second.send({'type': 'answer', 'index': question['index'], 'answer': 'wrong'})
+      await first.receive_until('solution')
+      await second.receive_until('solution')
+
+    finished = (await first.receive_until('finished'))[-1]
+    self.assertEqual(finished['correct'], {str(self.first.pk): 2, str(self.second.pk): 0})
+    self.assertEqual(finished['ratings'], {str(self.first.pk): 1016, str(self.second.pk): 984})
+    await second.receive_until('finished')
+    await asyncio.gather(first.task, second.task)
+    await sync_to_async(self.first.refresh_from_db)()
+    self.assertEqual(self.first.elo, 1016)
+
+  async def test_leaving_forfeits(self):
+    """Test a player who disconnects during a duel loses it"""
+    first, second = await self.start()
+    second.disconnect()
+    finished = (await first.receive_until('finished'))[-1]
+    self.assertEqual(finished['forfeit'], str(self.second.pk))
+    self.assertEqual(finished['ratings'][str(self.first.pk)], 1016)
+    await asyncio.gather(first.task, second.task)
+
+  async def test_failing_duel_is_cancelled(self):
+    """Test both players are told when a duel fails, instead of waiting for a result forever"""
+    with mock.patch.object(duels, 'settle', side_effect=RuntimeError('database gone')), \
+         self.assertLogs('game.duels', 'ERROR'):
+      first, second = await self.start()
+      first.disconnect()
+      cancelled = (await second.receive_until('cancelled'))[-1]
+      self.assertEqual(cancelled['detail'], 'the duel failed')
+      await asyncio.gather(first.task, second.task)
+
+  async def test_one_connection_per_user(self):
+    """Test a second connection of a waiting user is closed without dropping the first from the queue"""
+    first = self.connect(self.first)
+    await first.receive()
+    again = self.connect(self.first)
+    self.assertEqual((await again.receive())['type'], 'error')
+    self.assertEqual((await again.receive())['code'], 4409)
+    self.assertEqual(len(duels.get_matchmaker().queues[str(self.package.pk)]), 1)
+    first.disconnect()
+    await first.task
+
+  async def test_login_required(self):
+    """Test anonymous connections are closed"""
+    client = WebSocketClient(self.application, f'package={self.package.pk}')
+    self.assertEqual((await client.receive())['code'], 4401)
+
+  async def test_access_tokens(self):
+    """Test access tokens are accepted as subprotocol or header, invalid ones are refused"""
+    query = f'package={self.package.pk}'
+    first = WebSocketClient(self.application, query, subprotocols=['bearer', access_token(self.first)])
+    self.assertEqual((await first.receive())['type'], 'waiting')
+    self.assertEqual(first.accepted['subprotocol'], 'bearer')
+
+    authorization = (b'authorization', f'Bearer {access_token(self.second)}'.encode())
+    second = WebSocketClient(self.application, query, headers=[authorization])
+    self.assertEqual((await second.receive_until('start'))[-1]['opponent']['name'], 'firstplayer')
+    first.disconnect()
+    second.disconnect()
+    await asyncio.gather(first.task, second.task)
+
+    client = WebSocketClient(self.application, query, subprotocols=['bearer', 'invalid'])
+    self.assertEqual((await client.receive())['code'], 4401)
+
+  async def test_unknown_package(self):
+    """Test connections to unknown packages are closed"""
+    client = WebSocketClient(self.application, 'package=unknown', self.first.cookie)
+    self.assertEqual((await client.receive())['code'], 4404)
+
+
+class DrawQuestionsTests(TestCase):
+
+  def test_synonyms_of_answers_are_accepted(self):
+    """Test questions accept the synonyms of the foreign words"""
+    user = get_user_model().objects.create_user(name='testuser', password='testpassword')
+    english = Language.objects.create_language(name='English', author=user, official=True)
+    spanish = Language.objects.create_language(name='Spanish', author=user, official=True)
+    house = Word.objects.create_word(name='house', language=english, description='house', author=user, official=True)
+    casa = Word.objects.create_word(name='casa', language=spanish, description='casa', author=user, official=True)
+    hogar = Word.objects.create_word(name='hogar', language=spanish, description='hogar', author=user, official=True)
+    casa.add_synonym(hogar)
+    vocabulary = Vocabulary.objects.create_vocabulary_with_words(author=user, official=True, domestic_language=english,
+                                                                 foreign_language=spanish, domestic_words=[house],
+                                                                 foreign_words=[casa])
+    package = Package.objects.create_package_with_vocabularies(name='houses', author=user, official=True,
+                                                               description='houses', vocabulary=[vocabulary])
+
+    question, = draw_questions(package.pk, 5)
+    self.assertEqual(question.prompt, ['house'])
+    self.assertEqual(question.answers, ['casa'])
+    self.assertTrue(question.is_correct('hogar'))
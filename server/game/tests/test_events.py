@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+from content.models import Language, Word
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone as django_timezone
+from game.events import ROLLUP, add_months, create_partitions, month_of, partition_name, rollup
+from game.models import Learning, PracticeEvent, RollupWatermark, Vocabulary
+
+
+class PracticeEventTests(TestCase):
+
+  def setUp(self):
+    self.user = get_user_model().objects.create_user(name='testuser', password='testpassword')
+    self.english = Language.objects.create_language(name='English', author=self.user, official=True)
+    self.spanish = Language.objects.create_language(name='Spanish', author=self.user, official=True)
+    self.house = self.create_word('house', self.english)
+    self.casa = self.create_word('casa', self.spanish)
+    self.hogar = self.create_word('hogar', self.spanish)
+    self.perro = self.create_word('perro', self.spanish)
+    self.learnings = [
+        Learning.objects.create_learning_with_vocabulary(user=self.user,
+                                                         vocabulary=self.create_vocabulary(foreign_words))
+        for foreign_words in ([self.casa, self.hogar], [self.perro])
+    ]
+
+  def create_word(self, name, language):
+    return Word.objects.create_word(name=name, language=language, description='test description', author=self.user,
+                                    official=True)
+
+  def create_vocabulary(self, foreign_words):
+    return Vocabulary.objects.create_vocabulary_with_words(author=self.user, official=True,
+                                                           domestic_language=self.english,
+                                                           foreign_language=self.spanish, domestic_words=[self.house],
+                                                           foreign_words=foreign_words)
+
+  def counters(self, model, instance):
+    return tuple(model.objects.filter(pk=instance.pk).values_list('practices', 'successful_practices').get())
+
+  def test_reviews_are_logged(self):
+    """Test every review is appended to the event log"""
+    Learning.objects.review([(self.learnings[0], 5), (self.learnings[1], 1)])
+
+    events = PracticeEvent.objects.order_by('quality')
+    self.assertEqual([(event.learning_id, event.user_id, event.quality) for event in events],
+                     [(self.learnings[1].pk, self.user.pk, 1), (self.learnings[0].pk, self.user.pk, 5)])
+
+  @override_settings(PRACTICE_EVENTS={'BATCH_SIZE': 1})
+  def test_rollup(self):
+    """Test the events are added to the counters of the learnings and foreign words, in batches"""
+    Learning.objects.review([(self.learnings[0], 5), (self.learnings[1], 1), (self.learnings[0], 2)])
+
+    self.assertEqual(rollup(until=django_timezone.now()), 3)
+    self.assertEqual(self.counters(Learning, self.learnings[0]), (2, 1))
+    self.assertEqual(self.counters(Learning, self.learnings[1]), (1, 0))
+    self.assertEqual(self.counters(Word, self.casa), (2, 1))
+    self.assertEqual(self.counters(Word, self.hogar), (2, 1))
+    self.assertEqual(self.counters(Word, self.perro), (1, 0))
+    self.assertEqual(self.counters(Word, self.house), (0, 0))
+    self.assertIsNotNone(RollupWatermark.objects.alive().get(name=ROLLUP).until)
+
+  def test_rollup_counts_events_once(self):
+    """Test a rollup only counts the events recorded since the previous one and before its end"""
+    Learning.objects.review([(self.learnings[1], 5)])
+    until = django_timezone.now()
+    self.assertEqual(rollup(until=until), 1)
+    self.assertEqual(rollup(until=until), 0)
+    self.assertEqual(RollupWatermark.objects.get(name=ROLLUP).until, until)
+
+    PracticeEvent.objects.create(user=self.user, learning=self.learnings[1], quality=4,
+                                 recorded_at=until + timedelta(minutes=5))
+    self.assertEqual(rollup(until=until + timedelta(minutes=1)), 0)
+    self.assertEqual(rollup(until=until + timedelta(minutes=10)), 1)
+    self.assertEqual(self.counters(Learning, self.learnings[1]), (2, 2))
+
+  def test_rollup_waits_for_late_events(self):
+    """Test events of the last seconds wait for the next rollup"""
+    Learning.objects.review([(self.learnings[1], 5)])
+    self.assertEqual(rollup(), 0)
+    with override_settings(PRACTICE_EVENTS={'ROLLUP_DELAY': 0}):
+      self.assertEqual(rollup(), 1)
+
+  def test_events_committed_after_the_delay_are_not_counted(self):
+    """Test an event committed after a rollup passed its recorded_at stays in the log but is never counted"""
+    late = PracticeEvent(user=self.user, learning=self.learnings[1], quality=5)
+    self.assertEqual(rollup(until=late.recorded_at + timedelta(seconds=1)), 0)
+    late.save()
+
+    self.assertEqual(rollup(until=late.recorded_at + timedelta(minutes=10)), 0)
+    self.assertEqual(self.counters(Learning, self.learnings[1]), (0, 0))
+    self.assertTrue(PracticeEvent.objects.filter(pk=late.pk).exists())
+
+  def test_stale_learnings_keep_counters(self):
+    """Test saving a learning loaded before a rollup keeps the rolled up counters"""
+    stale = Learning.objects.get(pk=self.learnings[0].pk)
+    Learning.objects.review([(self.learnings[0], 5)])
+    rollup(until=django_timezone.now())
+    stale.save()
+    self.assertEqual(self.counters(Learning, self.learnings[0]), (1, 1))
+
+  def test_rollup_command(self):
+    """Test the command reports the events rolled up"""
+    out = StringIO()
+    with override_settings(PRACTICE_EVENTS={'ROLLUP_DELAY': 0}):
+      Learning.objects.review([(self.learnings[0], 5)])
+      call_command('rollup_practices', stdout=out)
+    self.assertIn('1 events counted', out.getvalue())
+
+
+class PartitionTests(TestCase):
+
+  def test_months(self):
+    """Test partitions cover utc months"""
+    self.assertEqual(month_of(datetime(2022, 12, 31, 23, 30, tzinfo=timezone(timedelta(hours=-2)))),
+                     datetime(2023, 1, 1, tzinfo=timezone.utc))
+    self.assertEqual(add_months(datetime(2022, 11, 1, tzinfo=timezone.utc), 3),
+                     datetime(2023, 2, 1, tzinfo=timezone.utc))
+    self.assertEqual(add_months(datetime(2022, 1, 1, tzinfo=timezone.utc), -1),
+                     datetime(2021, 12, 1, tzinfo=timezone.utc))
+    self.assertEqual(partition_name(datetime(2022, 3, 1, tzinfo=timezone.utc)), 'game_practiceevent_2022_03')
+
+  def test_partitions_need_postgresql(self):
+    """Test partitions are refused on databases without declarative partitioning"""
+    with self.assertRaises(ValueError):
+      create_partitions()
+    with self.assertRaises(CommandError):
+      call_command('practice_partitions', stdout=StringIO())
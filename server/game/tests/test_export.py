@@ -0,0 +1,201 @@
+import io
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from content.models import Language, Word
+from core.tokens import access_token
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from game.export import CONTENT_TYPE, Exporter, package_etag, read_records
+from game.models import Folder, Package, Vocabulary
+
+
+class ExportData:
+
+  def setUp(self):
+    self.user = get_user_model().objects.create_superuser(
+        name='testuser',
+        password='testpassword',
+    )
+    self.english = Language.objects.create_language(name='English', author=self.user, official=True)
+    self.spanish = Language.objects.create_language(name='Spanish', author=self.user, official=True)
+    self.vocabularies = [self.create_vocabulary(english, spanish)
+                         for english, spanish in (('house', 'casa'), ('dog', 'perro'), ('cat', 'gato'))]
+    self.package = Package.objects.create_package_with_vocabularies(
+        name='animals and houses',
+        author=self.user,
+        official=True,
+        description='test package',
+        vocabulary=self.vocabularies,
+    )
+    self.folder = Folder.objects.create_folder_with_packages(
+        name='beginners',
+        author=self.user,
+        official=True,
+        description='test folder',
+        package=[self.package],
+    )
+
+  def create_vocabulary(self, english, spanish):
+    return Vocabulary.objects.create_vocabulary_with_words(
+        author=self.user,
+        official=True,
+        domestic_language=self.english,
+        foreign_language=self.spanish,
+        domestic_words=[Word.objects.create_word(name=english, language=self.english, description=f'{english} en',
+                                                 author=self.user, official=True)],
+        foreign_words=[Word.objects.create_word(name=spanish, language=self.spanish, description=f'{spanish} es',
+                                                author=self.user, official=True)],
+    )
+
+  def records(self, chunks):
+    return list(read_records(io.BytesIO(b''.join(chunks))))
+
+
+class ExportTests(ExportData, TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.client.force_login(self.user)
+
+  def test_export_package(self):
+    """Test a package export contains the package, its vocabularies, words and languages"""
+    records = self.records(Exporter(chunk_size=2).package(self.package))
+    kinds = [name for name, _ in records]
+
+    self.assertEqual(kinds[0], 'package')
+    self.assertEqual(kinds[-1], 'end')
+    self.assertEqual(kinds.count('vocabulary'), 3)
+    self.assertEqual(kinds.count('word'), 6)
+    self.assertEqual(kinds.count('language'), 2)
+    self.assertEqual(records[0][1], {'id': self.package.pk, 'name': 'animals and houses',
+                                     'description': 'test package'})
+    vocabulary = next(fields for name, fields in records
+                      if name == 'vocabulary' and fields['id'] == self.vocabularies[1].pk)
+    words = {fields['id']: fields for name, fields in records if name == 'word'}
+    self.assertEqual(words[vocabulary['domestic_words'][0]]['name'], 'dog')
+    self.assertEqual(words[vocabulary['foreign_words'][0]]['name'], 'perro')
+
+  def test_export_package_queries_do_not_grow_with_size(self):
+    """Test vocabularies are loaded in chunks instead of one query per vocabulary"""
+    with self.assertNumQueries(5):
+      list(Exporter(chunk_size=10).package(self.package))
+
+  def test_export_folder(self):
+    """Test a folder export contains its packages"""
+    kinds = [name for name, _ in self.records(Exporter().folder(self.folder))]
+    self.assertEqual(kinds[:2], ['folder', 'package'])
+    self.assertEqual(kinds.count('vocabulary'), 3)
+
+  def test_read_truncated_export(self):
+    """Test reading an export which was cut off fails"""
+    data = b''.join(Exporter().package(self.package))
+    with self.assertRaises(ValueError):
+      list(read_records(io.BytesIO(data[:-10])))
+
+  def test_package_etag_changes_with_content(self):
+    """Test the etag changes when words of the package change"""
+    before = package_etag(self.package)
+    self.assertEqual(before, package_etag(self.package))
+
+    word = Word.objects.get(name='dog')
+    word.description = 'a loyal animal'
+    word.save()
+    self.assertNotEqual(before, package_etag(self.package))
+
+  def test_package_etag_changes_with_members(self):
+    """Test the etag changes when a vocabulary is swapped for another, even without a newer updated_at"""
+    other = self.create_vocabulary('mouse', 'raton')
+    long_ago = timezone.now() - timedelta(days=1)
+    Vocabulary.objects.filter(pk=other.pk).update(updated_at=long_ago)
+    Word.objects.filter(name__in=['mouse', 'raton']).update(updated_at=long_ago)
+    before = package_etag(self.package)
+    Package.vocabularies.through.objects.filter(vocabulary=self.vocabularies[0]).update(vocabulary=other)
+    self.assertNotEqual(before, package_etag(self.package))
+
+  def test_soft_deleted_words_are_not_exported(self):
+    """Test soft deleted words are left out of the export and change the etag"""
+    before = package_etag(self.package)
+    Word.objects.get(name='dog').soft_delete()
+
+    records = self.records(Exporter().package(self.package))
+    self.assertNotIn('dog', [fields['name'] for name, fields in records if name == 'word'])
+    self.assertNotEqual(before, package_etag(self.package))
+
+  def test_export_package_view(self):
+    """Test the export is streamed with an etag and not rebuilt for clients which have it"""
+    url = reverse('game:export-package', args=[self.package.pk])
+    response = self.client.get(url)
+
+    self.assertEqual(response.status_code, 200)
+    self.assertEqual(response['Content-Type'], CONTENT_TYPE)
+    self.assertTrue(response.streaming)
+    self.assertEqual(len(self.records(response.streaming_content)), 13)
+
+    response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+    self.assertEqual(response.status_code, 304)
+
+  def test_export_folder_view(self):
+    """Test folders can be exported"""
+    response = self.client.get(reverse('game:export-folder', args=[self.folder.pk]))
+    self.assertEqual(response.status_code, 200)
+
+  def test_export_inactive_package_view(self):
+    """Test soft deleted packages can not be exported"""
+    self.package.soft_delete()
+    response = self.client.get(reverse('game:export-package', args=[self.package.pk]))
+    self.assertEqual(response.status_code, 404)
+
+  def test_export_views_require_login(self):
+    """Test anonymous requests are answered with 401, also when they send an etag"""
+    url = reverse('game:export-package', args=[self.package.pk])
+    tag = self.client.get(url)['ETag']
+    self.client.logout()
+    response = self.client.get(url, HTTP_IF_NONE_MATCH=tag)
+    self.assertEqual(response.status_code, 401)
+    response = self.client.get(reverse('game:export-folder', args=[self.folder.pk]))
+    self.assertEqual(response.status_code, 401)
+
+
+class AsgiExportTests(ExportData, TransactionTestCase):
+  """The asgi handler has to see the data, so it is committed instead of wrapped in a transaction"""
+
+  def setUp(self):
+    # the managers link words before saving their vocabularies, which needs the constraints checked on commit
+    with transaction.atomic():
+      super().setUp()
+    self.token = access_token(self.user)
+
+  async def get(self, path):
+    """sends a GET request to the asgi application and returns the status and the body"""
+    from app.asgi import application
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(b'host', b'testserver'), (b'authorization', f'Bearer {self.token}'.encode())],
+        'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+    }
+    messages = []
+
+    async def receive():
+      return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+      messages.append(message)
+
+    await application(scope, receive, send)
+    body = b''.join(message.get('body', b'') for message in messages if message['type'] == 'http.response.body')
+    return messages[0]['status'], body
+
+  def test_export_folder_over_asgi(self):
+    """Test the export is streamed completely by the asgi handler, which must not query on the event loop"""
+    status, body = async_to_sync(self.get)(reverse('game:export-folder', args=[self.folder.pk]))
+
+    self.assertEqual(status, 200)
+    kinds = [name for name, _ in self.records([body])]
+    self.assertEqual(kinds[:2], ['folder', 'package'])
+    self.assertEqual(kinds.count('word'), 6)
+    self.assertEqual(kinds[-1], 'end')
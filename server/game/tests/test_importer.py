@@ -0,0 +1,137 @@
+import io
+import json
+import os
+import tempfile
+
+from content.models import Language, Word
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from game.importer import VocabularyImporter, read_csv, read_jsonl
+from game.models import Vocabulary
+
+CSV = """domestic_language,foreign_language,domestic_word,domestic_description,foreign_word,foreign_description,\
+foreign_synonyms
+English,Spanish,house,a building,casa,un edificio,
+English,Spanish,home,where you live,hogar,donde vives,casa
+English,Spanish,dog,an animal,perro,un animal,
+"""
+
+
+class VocabularyImporterTests(TestCase):
+
+  def setUp(self):
+    self.user = get_user_model().objects.create_superuser(
+        name='testuser',
+        password='testpassword',
+    )
+    self.english = Language.objects.create_language(
+        name='English',
+        author=self.user,
+        official=True,
+    )
+    self.spanish = Language.objects.create_language(
+        name='Spanish',
+        author=self.user,
+        official=True,
+    )
+
+  def test_import_csv_successful(self):
+    """Test importing a csv stream creates words, vocabularies and synonyms"""
+    stats = VocabularyImporter(author=self.user, official=True, batch_size=2).run(read_csv(io.StringIO(CSV)))
+
+    self.assertEqual(stats.rows, 3)
+    self.assertEqual(stats.words, 6)
+    self.assertEqual(stats.vocabularies, 3)
+    self.assertEqual(stats.synonyms, 1)
+    self.assertEqual(Vocabulary.objects.count(), 3)
+    self.assertEqual(Vocabulary.domestic_words.through.objects.count(), 3)
+    self.assertEqual(Vocabulary.foreign_words.through.objects.count(), 3)
+    hogar = Word.objects.get(name='hogar')
+    self.assertEqual(hogar.language, self.spanish)
+    self.assertTrue(Word.synonyms.through.objects.filter(from_word=hogar, to_word__name='casa').exists())
+    self.assertTrue(Word.synonyms.through.objects.filter(from_word__name='casa', to_word=hogar).exists())
+
+  def test_import_jsonl_reuses_existing_words(self):
+    """Test importing jsonl links existing words instead of creating them again"""
+    Word.objects.create_word(name='cat', language=self.english, description='an animal', author=self.user,
+                             official=True)
+    lines = [
+        {'domestic_language': 'English', 'foreign_language': 'Spanish', 'domestic_words': ['cat'],
+         'foreign_words': [{'name': 'gato', 'description': 'un animal', 'type': 'noun', 'gender': 'm'}]},
+        {'domestic_language': 'English', 'foreign_language': 'Spanish', 'domestic_words': ['cat'],
+         'foreign_words': ['gato']},
+    ]
+    stream = io.StringIO('\n'.join(json.dumps(line) for line in lines))
+
+    stats = VocabularyImporter(author=self.user, official=True).run(read_jsonl(stream))
+
+    self.assertEqual(stats.words, 1)
+    self.assertEqual(stats.vocabularies, 2)
+    self.assertEqual(Word.objects.filter(name='cat').count(), 1)
+    self.assertEqual(Word.objects.get(name='gato').gender, 'm')
+
+  def test_import_merges_specs_of_a_word(self):
+    """Test a word named before its full spec in a batch gets the spec, and the synonyms of all of its specs"""
+    Word.objects.create_word(name='felino', language=self.spanish, description='un animal', author=self.user,
+                             official=True)
+    lines = [
+        {'domestic_language': 'English', 'foreign_language': 'Spanish', 'domestic_words': ['cat'],
+         'foreign_words': [{'name': 'gato', 'synonyms': ['felino']}]},
+        {'domestic_language': 'English', 'foreign_language': 'Spanish',
+         'domestic_words': [{'name': 'cat', 'description': 'an animal'}],
+         'foreign_words': [{'name': 'gato', 'description': 'un animal', 'type': 'noun', 'gender': 'm',
+                            'synonyms': ['minino', 'felino']}]},
+        {'domestic_language': 'English', 'foreign_language': 'Spanish',
+         'domestic_words': [{'name': 'kitten', 'description': 'a young cat'}],
+         'foreign_words': [{'name': 'minino', 'description': 'un gato joven'}]},
+    ]
+    stream = io.StringIO('\n'.join(json.dumps(line) for line in lines))
+
+    stats = VocabularyImporter(author=self.user, official=True).run(read_jsonl(stream))
+
+    self.assertEqual(stats.words, 4)
+    gato = Word.objects.get(name='gato')
+    self.assertEqual((gato.description, gato.type, gato.gender), ('un animal', 'noun', 'm'))
+    self.assertEqual(stats.synonyms, 2)
+    self.assertTrue(gato.is_synonym(Word.objects.get(name='minino')))
+
+  def test_import_word_in_two_languages(self):
+    """Test a batch naming a word in two languages is rejected"""
+    stream = io.StringIO(json.dumps({'domestic_language': 'English', 'foreign_language': 'Spanish',
+                                     'domestic_words': [{'name': 'no', 'description': 'a negation'}],
+                                     'foreign_words': [{'name': 'no', 'description': 'una negacion'}]}))
+    with self.assertRaisesMessage(ValueError, 'word no is given in English and in Spanish'):
+      VocabularyImporter(author=self.user, official=True).run(read_jsonl(stream))
+
+  def test_import_skips_synonyms_in_other_languages(self):
+    """Test synonyms naming a word of another language are not linked"""
+    stream = io.StringIO(CSV.replace('hogar,donde vives,casa', 'hogar,donde vives,house'))
+    stats = VocabularyImporter(author=self.user, official=True).run(read_csv(stream))
+    self.assertEqual((stats.synonyms, stats.skipped_synonyms), (0, 1))
+
+  def test_import_with_unknown_language(self):
+    """Test importing a record with an unknown language fails"""
+    stream = io.StringIO(CSV.replace('Spanish', 'Klingon'))
+    with self.assertRaises(ValueError):
+      VocabularyImporter(author=self.user, official=True).run(read_csv(stream))
+
+  def test_import_word_without_description(self):
+    """Test importing a new word without a description fails"""
+    stream = io.StringIO(json.dumps({'domestic_language': 'English', 'foreign_language': 'Spanish',
+                                     'domestic_words': ['unknown'], 'foreign_words': ['desconocido']}))
+    with self.assertRaises(ValueError):
+      VocabularyImporter(author=self.user, official=True).run(read_jsonl(stream))
+    self.assertEqual(Word.objects.count(), 0)
+
+  def test_import_vocabulary_command(self):
+    """Test the import_vocabulary management command"""
+    with tempfile.TemporaryDirectory() as directory:
+      path = os.path.join(directory, 'words.csv')
+      with open(path, 'w', encoding='utf-8') as file:
+        file.write(CSV)
+      out = io.StringIO()
+      call_command('import_vocabulary', path, author='testuser', stdout=out)
+
+    self.assertIn('rows/s', out.getvalue())
+    self.assertEqual(Vocabulary.objects.count(), 3)
@@ -0,0 +1,56 @@
+from io import StringIO
+
+from content.models import Language, Word
+from core.leaderboard import GLOBAL, Leaderboard, language_board
+from core.rating import WIN, apply_result
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from game.models import Learning, Vocabulary
+
+
+class LanguageLeaderboardTests(TestCase):
+
+  def setUp(self):
+    self.player = get_user_model().objects.create_user(name='testplayer', password='testpassword')
+    self.opponent = get_user_model().objects.create_user(name='testopponent', password='testpassword')
+    self.english = Language.objects.create_language(name='English', author=self.player, official=True)
+    self.spanish = Language.objects.create_language(name='Spanish', author=self.player, official=True)
+    self.board = Leaderboard(language_board(self.spanish.pk))
+    self.board.clear()
+    house = Word.objects.create_word(name='house', language=self.english, description='a building',
+                                     author=self.player, official=True)
+    casa = Word.objects.create_word(name='casa', language=self.spanish, description='un edificio',
+                                    author=self.player, official=True)
+    self.vocabulary = Vocabulary.objects.create_vocabulary_with_words(
+        author=self.player,
+        official=True,
+        domestic_language=self.english,
+        foreign_language=self.spanish,
+        domestic_words=[house],
+        foreign_words=[casa],
+    )
+    with self.captureOnCommitCallbacks(execute=True):
+      Learning.objects.create_learning_with_vocabulary(user=self.player, vocabulary=self.vocabulary)
+
+  def test_learners_are_ranked(self):
+    """Test learners join the board of the language and move with their elo, others stay off"""
+    self.assertEqual(self.board.score(self.player.pk), 1000)
+    with self.captureOnCommitCallbacks(execute=True):
+      apply_result(self.player, self.opponent, WIN)
+
+    self.assertEqual(self.board.score(self.player.pk), self.player.elo)
+    self.assertIsNone(self.board.rank(self.opponent.pk))
+
+  def test_rebuild(self):
+    """Test the rebuild command refills the global board with the users who played and the language boards"""
+    get_user_model().objects.filter(pk=self.opponent.pk).update(elo=1200, games=1)
+    get_user_model().objects.filter(pk=self.player.pk).update(games=1)
+    get_user_model().objects.create_user(name='testlurker', password='testpassword')
+    self.board.clear()
+    Leaderboard(GLOBAL).clear()
+
+    call_command('rebuild_leaderboards', batch_size=1, stdout=StringIO())
+    self.assertEqual([entry.user_id for entry in Leaderboard(GLOBAL).top()],
+                     [str(self.opponent.pk), str(self.player.pk)])
+    self.assertEqual(self.board.score(self.player.pk), 1000)
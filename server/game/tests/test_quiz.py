@@ -0,0 +1,115 @@
+import random
+
+from content.models import Language, Word
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from game.models import Vocabulary
+from game.quiz import LanguagePool, generate_questions, get_pools
+
+
+class LanguagePoolTests(SimpleTestCase):
+
+  def setUp(self):
+    rows = [('noun', 'f', f'feminine {index}', None) for index in range(3)]
+    rows += [('noun', 'm', f'masculine {index}', 1 if index < 2 else None) for index in range(4)]
+    rows += [('verb', '', f'verb {index}', None) for index in range(5)]
+    self.pool = LanguagePool(rows)
+
+  def test_same_type_and_gender_first(self):
+    """Test distractors come from the pool of the type and gender of the answer"""
+    chosen = self.pool.sample('noun', 'f', 2, exclude_names=['feminine 0'], rng=random.Random(1))
+    self.assertEqual(sorted(chosen), ['feminine 1', 'feminine 2'])
+
+  def test_widening_and_exclusions(self):
+    """Test exhausted pools are widened to the type and the language, synonyms and names are never drawn"""
+    for seed in range(20):
+      chosen = self.pool.sample('noun', 'm', 3, exclude_names=['masculine 0'], exclude_groups=[1],
+                                rng=random.Random(seed))
+      self.assertEqual(len(set(chosen)), 3)
+      self.assertIn('masculine 2', chosen)
+      self.assertNotIn('masculine 1', chosen)
+      self.assertTrue(all(name.startswith(('masculine', 'feminine')) for name in chosen))
+
+    self.assertEqual(len(self.pool.sample('verb', '', 20, rng=random.Random(0))), 12)
+    self.assertEqual(len(self.pool.sample('adjective', '', 1, rng=random.Random(0))), 1)
+
+
+class QuestionTests(TestCase):
+
+  def setUp(self):
+    get_pools().invalidate()
+    self.user = get_user_model().objects.create_user(name='testuser', password='testpassword')
+    self.english = Language.objects.create_language(name='English', author=self.user, official=True)
+    self.spanish = Language.objects.create_language(name='Spanish', author=self.user, official=True)
+    self.house = self.create_word('house', self.english, 'noun', '')
+    self.casa = self.create_word('casa', self.spanish, 'noun', 'f')
+    self.hogar = self.create_word('hogar', self.spanish, 'noun', 'm')
+    self.casa.add_synonym(self.hogar)
+    self.others = [self.create_word(name, self.spanish, 'noun', 'f') for name in ('mesa', 'silla', 'puerta')]
+    self.create_word('correr', self.spanish, 'verb', '')
+    self.vocabularies = [self.create_vocabulary([self.casa]) for _ in range(3)]
+
+  def create_word(self, name, language, word_type, gender):
+    return Word.objects.create_word(name=name, language=language, description='test description', author=self.user,
+                                    official=True, type=word_type, gender=gender)
+
+  def create_vocabulary(self, foreign_words):
+    return Vocabulary.objects.create_vocabulary_with_words(
+        author=self.user,
+        official=True,
+        domestic_language=self.english,
+        foreign_language=self.spanish,
+        domestic_words=[self.house],
+        foreign_words=foreign_words,
+    )
+
+  def test_generate_questions(self):
+    """Test questions offer the answer among distractors of its type and gender, never its synonyms"""
+    questions = generate_questions([vocabulary.pk for vocabulary in self.vocabularies], choices=4,
+                                   rng=random.Random(3))
+
+    self.assertEqual([question.vocabulary_id for question in questions],
+                     [vocabulary.pk for vocabulary in self.vocabularies])
+    for question in questions:
+      self.assertEqual(question.prompt, ['house'])
+      self.assertEqual(question.choices[question.answer], 'casa')
+      self.assertEqual(sorted(question.choices), ['casa', 'mesa', 'puerta', 'silla'])
+
+  def test_deleted_words_are_left_out(self):
+    """Test soft deleted words are neither the answer nor part of the prompt"""
+    home = self.create_word('home', self.english, 'noun', '')
+    cama = self.create_word('cama', self.spanish, 'noun', 'f')
+    vocabulary = Vocabulary.objects.create_vocabulary_with_words(
+        author=self.user,
+        official=True,
+        domestic_language=self.english,
+        foreign_language=self.spanish,
+        domestic_words=[self.house, home],
+        foreign_words=[self.casa, cama],
+    )
+    home.soft_delete()
+    cama.soft_delete()
+
+    for seed in range(10):
+      question = generate_questions([vocabulary.pk], choices=4, rng=random.Random(seed))[0]
+      self.assertEqual(question.prompt, ['house'])
+      self.assertEqual(question.choices[question.answer], 'casa')
+      self.assertNotIn('cama', question.choices)
+
+  def test_questions_are_generated_in_one_batch(self):
+    """Test the queries do not grow with the number of questions"""
+    ids = [vocabulary.pk for vocabulary in self.vocabularies]
+    generate_questions(ids[:1])
+    with self.assertNumQueries(3):
+      generate_questions(ids)
+
+  def test_saved_words_rebuild_pools(self):
+    """Test a new word of the language is offered once it was saved"""
+    generate_questions([self.vocabularies[0].pk])
+    with self.captureOnCommitCallbacks(execute=True):
+      for word in self.others:
+        word.soft_delete()
+      new = self.create_word('ventana', self.spanish, 'noun', 'f')
+
+    question = generate_questions([self.vocabularies[0].pk], choices=2, rng=random.Random(0))[0]
+    self.assertEqual(sorted(question.choices), ['casa', new.name])
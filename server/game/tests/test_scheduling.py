@@ -0,0 +1,101 @@
+from datetime import timedelta
+
+from content.models import Language, Word
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from game.models import Learning, Vocabulary
+from game.scheduling import schedule
+
+
+class ScheduleTests(SimpleTestCase):
+
+  def test_passing_reviews_grow_the_interval(self):
+    """Test successive passing reviews follow the SM-2 intervals"""
+    repetitions, interval, ease = schedule(5, 0, 0, 2.5)
+    self.assertEqual((repetitions, interval), (1, 1))
+    repetitions, interval, ease = schedule(5, repetitions, interval, ease)
+    self.assertEqual((repetitions, interval), (2, 6))
+    previous_ease = ease
+    repetitions, interval, ease = schedule(5, repetitions, interval, ease)
+    self.assertEqual(repetitions, 3)
+    self.assertEqual(interval, round(6 * previous_ease))
+
+  def test_failed_review_starts_over(self):
+    """Test a failed review resets repetitions and lowers the ease"""
+    repetitions, interval, ease = schedule(1, 4, 30, 2.5)
+    self.assertEqual((repetitions, interval), (0, 1))
+    self.assertLess(ease, 2.5)
+
+  def test_ease_has_a_lower_bound(self):
+    """Test the ease never drops below 1.3"""
+    self.assertEqual(schedule(0, 0, 0, 1.3)[2], 1.3)
+
+
+class LearningSchedulingTests(TestCase):
+
+  def setUp(self):
+    self.user = get_user_model().objects.create_user(
+        name='testuser',
+        password='testpassword',
+    )
+    english = Language.objects.create_language(name='English', author=self.user, official=True)
+    spanish = Language.objects.create_language(name='Spanish', author=self.user, official=True)
+    self.vocabulary = Vocabulary.objects.create_vocabulary_with_words(
+        author=self.user,
+        official=True,
+        domestic_language=english,
+        foreign_language=spanish,
+        domestic_words=[Word.objects.create_word(name='house', language=english, description='a building',
+                                                 author=self.user, official=True)],
+        foreign_words=[Word.objects.create_word(name='casa', language=spanish, description='un edificio',
+                                                author=self.user, official=True)],
+    )
+    self.now = timezone.now()
+    self.learnings = [
+        Learning.objects.create_learning_with_vocabulary(user=self.user, vocabulary=self.vocabulary,
+                                                         due_at=self.now - timedelta(hours=hours))
+        for hours in (1, 3, 2)
+    ]
+
+  def test_next_due_orders_by_due_at(self):
+    """Test next_due returns the most overdue learnings first"""
+    due = list(Learning.objects.next_due(self.user, limit=2, now=self.now))
+    self.assertEqual([learning.pk for learning in due], [self.learnings[1].pk, self.learnings[2].pk])
+
+  def test_next_due_skips_future_and_inactive_learnings(self):
+    """Test next_due only returns active learnings which are due"""
+    self.learnings[0].due_at = self.now + timedelta(days=1)
+    self.learnings[0].save()
+    self.learnings[1].soft_delete()
+
+    due = list(Learning.objects.next_due(self.user, now=self.now))
+    self.assertEqual([learning.pk for learning in due], [self.learnings[2].pk])
+
+  def test_next_due_without_user(self):
+    """Test next_due requires a user"""
+    with self.assertRaises(ValueError):
+      Learning.objects.next_due(None)
+
+  def test_review_updates_all_learnings_in_one_query(self):
+    """Test reviewing a session writes all learnings with a single query"""
+    with CaptureQueriesContext(connection) as queries:
+      Learning.objects.review([(self.learnings[0], 5), (self.learnings[1], 1)], now=self.now)
+    updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE "game_learning"')]
+    self.assertEqual(len(updates), 1)
+
+    passed = Learning.objects.get(pk=self.learnings[0].pk)
+    self.assertEqual(passed.score, 5)
+    self.assertEqual(passed.prev_score, 1)
+    self.assertEqual(passed.repetitions, 1)
+    self.assertEqual(passed.due_at, self.now + timedelta(days=1))
+    failed = Learning.objects.get(pk=self.learnings[1].pk)
+    self.assertEqual(failed.score, 1)
+    self.assertEqual(failed.repetitions, 0)
+
+  def test_review_with_invalid_quality(self):
+    """Test reviewing with a quality outside 0 to 5 fails"""
+    with self.assertRaises(ValueError):
+      Learning.objects.review([(self.learnings[0], 6)])
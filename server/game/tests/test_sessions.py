@@ -0,0 +1,98 @@
+import uuid
+from datetime import datetime, timezone
+
+from content.models import Language, Word
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone as django_timezone
+from game.events import rollup
+from game.models import Learning, LearningStats, PracticeSession, Vocabulary
+
+
+class PracticeSessionTests(TestCase):
+
+  def setUp(self):
+    self.user = get_user_model().objects.create_user(
+        name='testuser',
+        password='testpassword',
+    )
+    self.english = Language.objects.create_language(name='English', author=self.user, official=True)
+    self.spanish = Language.objects.create_language(name='Spanish', author=self.user, official=True)
+    self.house = self.create_word('house', self.english)
+    self.casa = self.create_word('casa', self.spanish)
+    self.hogar = self.create_word('hogar', self.spanish)
+    self.perro = self.create_word('perro', self.spanish)
+    self.learnings = [
+        Learning.objects.create_learning_with_vocabulary(user=self.user,
+                                                         vocabulary=self.create_vocabulary(foreign_words))
+        for foreign_words in ([self.casa, self.hogar], [self.perro])
+    ]
+    self.now = datetime(2022, 3, 1, 12, tzinfo=timezone.utc)
+
+  def create_word(self, name, language):
+    return Word.objects.create_word(name=name, language=language, description='test description', author=self.user,
+                                    official=True)
+
+  def create_vocabulary(self, foreign_words):
+    return Vocabulary.objects.create_vocabulary_with_words(
+        author=self.user,
+        official=True,
+        domestic_language=self.english,
+        foreign_language=self.spanish,
+        domestic_words=[self.house],
+        foreign_words=foreign_words,
+    )
+
+  def practices(self, word):
+    rollup(until=django_timezone.now())
+    return tuple(Word.objects.filter(pk=word.pk).values_list('practices', 'successful_practices').get())
+
+  def test_submit(self):
+    """Test a session reviews the learnings with one update and logs the answers word practices are rolled up from"""
+    answers = [(self.learnings[0].pk, 5), (self.learnings[1].pk, 1), (self.learnings[0].pk, 4)]
+    with CaptureQueriesContext(connection) as queries:
+      session, created = PracticeSession.objects.submit(user=self.user, client_id=uuid.uuid4(), answers=answers,
+                                                        now=self.now)
+    writes = [query['sql'].split('"')[1] for query in queries.captured_queries
+              if query['sql'].startswith(('UPDATE', 'INSERT'))]
+
+    self.assertTrue(created)
+    self.assertEqual((session.answers, session.successful_answers), (3, 2))
+    self.assertEqual(writes.count('game_learning'), 1)
+    self.assertEqual(writes.count('game_practiceevent'), 1)
+    self.assertEqual(writes.count('content_word'), 0)
+    self.assertEqual(self.practices(self.casa), (2, 2))
+    self.assertEqual(self.practices(self.hogar), (2, 2))
+    self.assertEqual(self.practices(self.perro), (1, 0))
+    self.assertEqual(self.practices(self.house), (0, 0))
+    learning = Learning.objects.get(pk=self.learnings[0].pk)
+    self.assertEqual((learning.repetitions, learning.score, learning.prev_score), (2, 4, 5))
+    self.assertEqual(LearningStats.objects.get(user=self.user).reviews, 3)
+
+  def test_retry_is_applied_once(self):
+    """Test submitting the same session again returns the stored session without applying it"""
+    client_id = uuid.uuid4()
+    first, _ = PracticeSession.objects.submit(user=self.user, client_id=client_id,
+                                              answers=[(self.learnings[1].pk, 5)])
+    again, created = PracticeSession.objects.submit(user=self.user, client_id=client_id,
+                                                    answers=[(self.learnings[1].pk, 5)])
+
+    self.assertFalse(created)
+    self.assertEqual(again.pk, first.pk)
+    self.assertEqual(self.practices(self.perro), (1, 1))
+    self.assertEqual(PracticeSession.objects.count(), 1)
+
+  def test_invalid_sessions(self):
+    """Test invalid answers and learnings of other users apply nothing"""
+    other = get_user_model().objects.create_user(name='otheruser', password='testpassword')
+    with self.assertRaises(ValueError):
+      PracticeSession.objects.submit(user=self.user, client_id=uuid.uuid4(), answers=[])
+    with self.assertRaises(ValueError):
+      PracticeSession.objects.submit(user=self.user, client_id=uuid.uuid4(), answers=[(self.learnings[0].pk, 6)])
+    with self.assertRaises(Learning.DoesNotExist):
+      PracticeSession.objects.submit(user=other, client_id=uuid.uuid4(), answers=[(self.learnings[0].pk, 5)])
+
+    self.assertEqual(PracticeSession.objects.count(), 0)
+    self.assertEqual(self.practices(self.casa), (0, 0))
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+from content.models import Language, Word
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from game.models import Learning, LearningStats, Vocabulary
+from game.stats import MASTERED_INTERVAL, get_stats, recompute
+
+
+class LearningStatsTests(TestCase):
+
+  def setUp(self):
+    self.user = get_user_model().objects.create_user(
+        name='testuser',
+        password='testpassword',
+    )
+    self.english = Language.objects.create_language(name='English', author=self.user, official=True)
+    self.spanish = Language.objects.create_language(name='Spanish', author=self.user, official=True)
+    self.house = Word.objects.create_word(name='house', language=self.english, description='a building',
+                                          author=self.user, official=True)
+    self.casa = Word.objects.create_word(name='casa', language=self.spanish, description='un edificio',
+                                         author=self.user, official=True)
+    self.learnings = [Learning.objects.create_learning_with_vocabulary(user=self.user,
+                                                                       vocabulary=self.create_vocabulary())
+                      for _ in range(2)]
+    self.now = datetime(2022, 3, 1, 12, tzinfo=timezone.utc)
+
+  def create_vocabulary(self):
+    return Vocabulary.objects.create_vocabulary_with_words(
+        author=self.user,
+        official=True,
+        domestic_language=self.english,
+        foreign_language=self.spanish,
+        domestic_words=[self.house],
+        foreign_words=[self.casa],
+    )
+
+  def stats(self):
+    return LearningStats.objects.get(user=self.user, language=self.spanish)
+
+  def test_learnings_are_counted(self):
+    """Test created learnings are counted in the language of their vocabularies"""
+    self.assertEqual(self.stats().learnings, 2)
+    self.assertEqual([stats.language for stats in get_stats(self.user)], [self.spanish])
+
+  def test_soft_deleted_stats_are_not_returned(self):
+    """Test get_stats leaves out soft deleted stats"""
+    self.stats().soft_delete()
+    self.assertEqual(list(get_stats(self.user)), [])
+    self.assertEqual(LearningStats.objects.alive().count(), 0)
+
+  def test_reviews_are_counted(self):
+    """Test a batch of reviews updates reviews, accuracy and mastered"""
+    self.learnings[0].interval = MASTERED_INTERVAL - 1
+    self.learnings[0].repetitions = 3
+    Learning.objects.review([(self.learnings[0], 5), (self.learnings[1], 5)], now=self.now)
+    self.assertEqual(self.stats().mastered, 1)
+
+    Learning.objects.review([(self.learnings[0], 1), (self.learnings[1], 5)], now=self.now)
+    stats = self.stats()
+    self.assertEqual((stats.reviews, stats.successful_reviews, stats.accuracy()), (4, 3, 75))
+    self.assertEqual(stats.mastered, 0)
+
+  def test_streaks(self):
+    """Test reviews on following days extend the streak and a missed day starts over"""
+    for days in (0, 0, 1, 2, 5):
+      Learning.objects.review([(self.learnings[0], 4)], now=self.now + timedelta(days=days))
+      if days == 2:
+        self.assertEqual(self.stats().current_streak, 3)
+
+    stats = self.stats()
+    self.assertEqual((stats.current_streak, stats.longest_streak), (1, 3))
+    self.assertEqual(stats.last_review_on, (self.now + timedelta(days=5)).date())
+
+  def test_recompute(self):
+    """Test recompute repairs drift and ends missed streaks"""
+    Learning.objects.review([(self.learnings[0], 4)], now=self.now)
+    LearningStats.objects.update(learnings=7)
+    self.learnings[1].soft_delete()
+
+    self.assertEqual(recompute([self.user.pk], today=self.now.date() + timedelta(days=1)), 1)
+    stats = self.stats()
+    self.assertEqual((stats.learnings, stats.current_streak, stats.reviews), (1, 1, 1))
+    self.assertEqual(recompute([self.user.pk], today=self.now.date() + timedelta(days=2)), 1)
+    self.assertEqual(self.stats().current_streak, 0)
+
+    LearningStats.objects.all().delete()
+    call_command('recompute_stats', batch_size=1, stdout=StringIO())
+    self.assertEqual(self.stats().learnings, 1)
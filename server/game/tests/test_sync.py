@@ -0,0 +1,173 @@
+import base64
+import json
+from datetime import timedelta
+
+from content.models import Language, Word
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from game.models import Folder, Package, Vocabulary
+from game.sync import changes_since, decode_cursor
+
+
+class SyncTests(TestCase):
+
+  def setUp(self):
+    self.user = get_user_model().objects.create_user(
+        name='testuser',
+        password='testpassword',
+    )
+    self.english = Language.objects.create_language(name='English', author=self.user, official=True)
+    self.spanish = Language.objects.create_language(name='Spanish', author=self.user, official=True)
+    self.german = Language.objects.create_language(name='German', author=self.user, official=True)
+    self.english.add_subscriber(self.user)
+    self.spanish.add_subscriber(self.user)
+    self.house = self.create_word('house', self.english)
+    self.casa = self.create_word('casa', self.spanish)
+    self.haus = self.create_word('haus', self.german)
+    self.vocabulary = Vocabulary.objects.create_vocabulary_with_words(
+        author=self.user,
+        official=True,
+        domestic_language=self.english,
+        foreign_language=self.spanish,
+        domestic_words=[self.house],
+        foreign_words=[self.casa],
+    )
+    self.package = Package.objects.create_package_with_vocabularies(
+        name='houses',
+        author=self.user,
+        official=True,
+        description='test package',
+        vocabulary=[self.vocabulary],
+    )
+    self.folder = Folder.objects.create_folder_with_packages(
+        name='beginners',
+        author=self.user,
+        official=True,
+        description='test folder',
+        package=[self.package],
+    )
+    self.folder.subscribers.add(self.user)
+
+  def create_word(self, name, language):
+    return Word.objects.create_word(name=name, language=language, description=f'{name} description',
+                                    author=self.user, official=True)
+
+  def later(self, minutes=1):
+    return timezone.now() + timedelta(minutes=minutes)
+
+  def names(self, rows):
+    return sorted(row['name'] for row in rows)
+
+  def test_first_sync_returns_everything_subscribed(self):
+    """Test a sync without cursor returns all rows visible to the user"""
+    result = changes_since(self.user, now=self.later())
+    changes = result['changes']
+
+    self.assertEqual(self.names(changes['languages']), ['English', 'Spanish'])
+    self.assertEqual(self.names(changes['words']), ['casa', 'house'])
+    self.assertEqual(self.names(changes['folders']), ['beginners'])
+    self.assertEqual(self.names(changes['packages']), ['houses'])
+    self.assertEqual(changes['vocabularies'][0]['domestic_words'], [str(self.house.pk)])
+    self.assertFalse(result['has_more'])
+
+  def test_sync_with_cursor_returns_only_changes(self):
+    """Test a sync with the cursor of the last sync only returns changed and soft deleted rows"""
+    cursor = changes_since(self.user, now=self.later())['cursor']
+    self.house.description = 'a building'
+    self.house.save()
+    self.package.soft_delete()
+
+    changes = changes_since(self.user, cursor, now=self.later(2))['changes']
+    self.assertEqual(self.names(changes['words']), ['house'])
+    self.assertEqual(changes['words'][0]['description'], 'a building')
+    self.assertEqual(changes['packages'][0]['active'], False)
+    self.assertEqual(changes['languages'], [])
+
+  def test_subscribing_after_a_sync_resets(self):
+    """Test rows which become visible through a new subscription are sent although they did not change"""
+    cursor = changes_since(self.user, now=self.later())['cursor']
+    self.german.add_subscriber(self.user)
+
+    result = changes_since(self.user, cursor, now=self.later(2))
+    self.assertEqual(result['reset'], ['languages', 'words'])
+    self.assertEqual(self.names(result['changes']['languages']), ['English', 'German', 'Spanish'])
+    self.assertEqual(self.names(result['changes']['words']), ['casa', 'haus', 'house'])
+
+    result = changes_since(self.user, result['cursor'], now=self.later(3))
+    self.assertEqual(result['reset'], [])
+    self.assertEqual(result['changes']['words'], [])
+
+  def test_unsubscribing_after_a_sync_resets(self):
+    """Test rows which are no longer visible are retracted by resetting their entity type"""
+    cursor = changes_since(self.user, now=self.later())['cursor']
+    self.spanish.subscribers.remove(self.user)
+
+    result = changes_since(self.user, cursor, now=self.later(2))
+    self.assertEqual(result['reset'], ['languages', 'words'])
+    self.assertEqual(self.names(result['changes']['words']), ['house'])
+
+  def test_relinking_after_a_sync(self):
+    """Test vocabularies linked into a subscribed package are sent with the package listing them"""
+    cursor = changes_since(self.user, now=self.later())['cursor']
+    vocabulary = Vocabulary.objects.create_vocabulary_with_words(
+        author=self.user,
+        official=True,
+        domestic_language=self.english,
+        foreign_language=self.german,
+        domestic_words=[self.house],
+        foreign_words=[self.haus],
+    )
+    self.package.vocabularies.add(vocabulary)
+
+    result = changes_since(self.user, cursor, now=self.later(2))
+    self.assertEqual(result['reset'], ['vocabularies'])
+    self.assertEqual({row['id'] for row in result['changes']['vocabularies']},
+                     {str(self.vocabulary.pk), str(vocabulary.pk)})
+    self.assertEqual(set(result['changes']['packages'][0]['vocabularies']),
+                     {str(self.vocabulary.pk), str(vocabulary.pk)})
+
+  def test_sync_pages_with_limit(self):
+    """Test syncing with a limit pages through the changes without repeating rows"""
+    first = changes_since(self.user, limit=1, now=self.later())
+    self.assertTrue(first['has_more'])
+    second = changes_since(self.user, first['cursor'], limit=1, now=self.later())
+
+    self.assertEqual(len(first['changes']['words']), 1)
+    self.assertEqual(len(second['changes']['words']), 1)
+    self.assertNotEqual(first['changes']['words'][0]['id'], second['changes']['words'][0]['id'])
+    self.assertFalse(second['has_more'])
+
+  def test_sync_holds_back_recent_changes(self):
+    """Test rows changed within the sync lag are not returned yet"""
+    changes = changes_since(self.user, now=timezone.now())['changes']
+    self.assertEqual(changes['words'], [])
+
+  def test_invalid_cursor(self):
+    """Test an invalid cursor is rejected"""
+    with self.assertRaises(ValueError):
+      decode_cursor('not a cursor')
+
+  def test_malformed_cursors(self):
+    """Test cursors which decode but are not {entity: [updated_at, id]} are rejected"""
+    now = timezone.now().isoformat()
+    for data in ([], {'words': [now, 'not a uuid', 'scope']}, {'words': 'a string'}, {'words': [now, None, 'scope']},
+                 {'words': [now, str(self.house.pk)]}, {'words': [1, 2, 'scope']}):
+      cursor = base64.urlsafe_b64encode(json.dumps(data).encode('utf-8')).decode('ascii')
+      with self.assertRaises(ValueError):
+        decode_cursor(cursor)
+      self.client.force_login(self.user)
+      self.assertEqual(self.client.get(reverse('game:sync'), {'cursor': cursor}).status_code, 400)
+
+  def test_sync_view(self):
+    """Test the sync view requires a login and returns the changes"""
+    url = reverse('game:sync')
+    self.assertEqual(self.client.get(url).status_code, 401)
+
+    self.client.force_login(self.user)
+    response = self.client.get(url, {'cursor': 'not a cursor'})
+    self.assertEqual(response.status_code, 400)
+    response = self.client.get(url)
+    self.assertEqual(response.status_code, 200)
+    self.assertIn('cursor', response.json())
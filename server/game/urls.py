@@ -0,0 +1,20 @@
+from django.urls import path
+from game import views
+
+app_name = 'game'
+
+urlpatterns = [
+    path('packages/', views.packages, name='packages'),
+    path('packages/<uuid:pk>/', views.package, name='package'),
+    path('packages/<uuid:pk>/vocabularies/', views.package_vocabularies, name='package-vocabularies'),
+    path('packages/<uuid:pk>/quiz/', views.package_quiz, name='package-quiz'),
+    path('vocabularies/<uuid:pk>/', views.vocabulary, name='vocabulary'),
+    path('learnings/', views.learnings, name='learnings'),
+    path('learnings/<uuid:pk>/review/', views.review, name='review'),
+    path('sessions/', views.sessions, name='sessions'),
+    path('stats/', views.stats, name='stats'),
+    path('leaderboard/', views.leaderboard, name='leaderboard'),
+    path('packages/<uuid:pk>/export/', views.export_package, name='export-package'),
+    path('folders/<uuid:pk>/export/', views.export_folder, name='export-folder'),
+    path('sync/', views.sync, name='sync'),
+]
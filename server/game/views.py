@@ -0,0 +1,236 @@
+import uuid
+from functools import wraps
+
+from core.api import api_view, database, get_limit, read_json
+from core.asgi import ThreadedStreamingHttpResponse
+from core.leaderboard import GLOBAL, Leaderboard, language_board, weekly_board
+from core.models import User
+from core.pagination import KeysetPaginator
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import etag, require_GET
+from game.caching import get_package
+from game.export import CONTENT_TYPE, Exporter, folder_etag, package_etag
+from game.models import Folder, Learning, Package, PracticeSession, Vocabulary
+from game.quiz import package_questions
+from game.serializers import (LearningSerializer, LearningStatsSerializer, PackageSerializer,
+                              PracticeSessionSerializer, VocabularySerializer)
+from game.stats import get_stats
+from game.sync import changes_since
+
+
+def _authenticated(view):
+  """Answers anonymous requests with 401 before the view and its conditions run"""
+  @wraps(view)
+  def wrapper(request, *args, **kwargs):
+    if not request.user.is_authenticated:
+      return JsonResponse({'detail': 'authentication required'}, status=401)
+    return view(request, *args, **kwargs)
+  return wrapper
+
+
+def _package_etag(request, pk):
+  package = Package.objects.alive().filter(pk=pk).first()
+  return package_etag(package) if package else None
+
+
+def _folder_etag(request, pk):
+  folder = Folder.objects.alive().filter(pk=pk).first()
+  return folder_etag(folder) if folder else None
+
+
+def _stream(records, name):
+  # the records load vocabularies while they are streamed
+  response = ThreadedStreamingHttpResponse(records, content_type=CONTENT_TYPE)
+  response['Content-Disposition'] = f'attachment; filename="{name}.wrdx"'
+  return response
+
+
+@require_GET
+@_authenticated
+@etag(_package_etag)
+def export_package(request, pk):
+  """Streams a package with its vocabularies and words, unchanged packages are answered with 304"""
+  package = get_object_or_404(Package.objects.alive(), pk=pk)
+  return _stream(Exporter().package(package), package.pk)
+
+
+@require_GET
+@_authenticated
+@etag(_folder_etag)
+def export_folder(request, pk):
+  """Streams a folder with its packages, vocabularies and words, unchanged folders are answered with 304"""
+  folder = get_object_or_404(Folder.objects.alive(), pk=pk)
+  return _stream(Exporter().folder(folder), folder.pk)
+
+
+@require_GET
+@_authenticated
+def sync(request):
+  """Returns what changed for the user since the cursor of the last sync"""
+  try:
+    limit = int(request.GET.get('limit', 500))
+    return JsonResponse(changes_since(request.user, request.GET.get('cursor'), min(limit, 1000)))
+  except ValueError as error:
+    return JsonResponse({'detail': str(error)}, status=400)
+  except ValidationError as error:
+    return JsonResponse({'detail': ' '.join(error.messages)}, status=400)
+
+
+###############################################################################
+#                               api                                           #
+###############################################################################
+
+
+def _list_packages(limit, cursor):
+  page = KeysetPaginator(Package.objects.alive().prefetch_related('vocabularies'), limit=limit).page(cursor)
+  return {'results': PackageSerializer(page.rows, many=True).data, 'next': page.next_cursor}
+
+
+def _list_vocabularies(package_id, limit, cursor):
+  package = Package.objects.alive().get(pk=package_id)
+  vocabularies = package.vocabularies.alive().prefetch_related('domestic_words', 'foreign_words')
+  page = KeysetPaginator(vocabularies, limit=limit).page(cursor)
+  return {'results': VocabularySerializer(page.rows, many=True).data, 'next': page.next_cursor}
+
+
+def _quiz(package_id, count):
+  Package.objects.alive().get(pk=package_id)
+  return [question.as_dict() for question in package_questions(package_id, count)]
+
+
+def _get_vocabulary(pk):
+  return VocabularySerializer(Vocabulary.objects.alive().prefetch_related('domestic_words', 'foreign_words')
+                              .get(pk=pk)).data
+
+
+def _due_learnings(user, limit):
+  return LearningSerializer(Learning.objects.next_due(user, limit), many=True).data
+
+
+def _create_learning(user, data):
+  vocabulary = Vocabulary.objects.alive().get(pk=data.get('vocabulary'))
+  return LearningSerializer(Learning.objects.create_learning_with_vocabulary(user=user, vocabulary=vocabulary)).data
+
+
+def _review_learning(user, pk, data):
+  learning = Learning.objects.alive().get(pk=pk, user=user)
+  Learning.objects.review([(learning, data.get('quality'))])
+  return LearningSerializer(learning).data
+
+
+def _submit_session(user, data):
+  answers = data.get('answers')
+  if not isinstance(answers, list) or not all(isinstance(answer, dict) for answer in answers):
+    raise ValueError('answers must be a list of objects')
+  try:
+    client_id = uuid.UUID(str(data.get('session')))
+  except ValueError:
+    raise ValueError('session must be a uuid')
+  session, created = PracticeSession.objects.submit(
+      user=user, client_id=client_id,
+      answers=[(answer.get('learning'), answer.get('quality')) for answer in answers])
+  return PracticeSessionSerializer(session).data, created
+
+
+def _stats(user):
+  return LearningStatsSerializer(get_stats(user), many=True).data
+
+
+def _board(request):
+  board = request.GET.get('board', GLOBAL)
+  if board == GLOBAL:
+    return GLOBAL
+  if board == 'weekly':
+    return weekly_board()
+  if board == 'language':
+    try:
+      return language_board(uuid.UUID(request.GET.get('language', '')))
+    except ValueError:
+      raise ValueError('language is not a valid id')
+  raise ValueError('board must be global, weekly or language')
+
+
+def _leaderboard(board, user, limit):
+  leaderboard = Leaderboard(board)
+  top, around = leaderboard.top(limit), leaderboard.around(user.pk)
+  names = dict(User.objects.filter(pk__in={entry.user_id for entry in top + around}).values_list('pk', 'name'))
+
+  def serialize(entries):
+    return [{'rank': entry.rank, 'user': entry.user_id, 'name': names.get(uuid.UUID(entry.user_id)),
+             'score': entry.score} for entry in entries]
+  return {'results': serialize(top), 'around': serialize(around), 'rank': leaderboard.rank(user.pk)}
+
+
+@api_view(['GET'], login_required=True)
+async def packages(request):
+  """Lists the packages in the order they were created"""
+  return JsonResponse(await database(_list_packages)(get_limit(request), request.GET.get('cursor')))
+
+
+@api_view(['GET'], login_required=True)
+async def package(request, pk):
+  """Returns a package, served from the read-through cache"""
+  data = await database(get_package)(pk)
+  if data is None:
+    raise Package.DoesNotExist
+  return JsonResponse(data)
+
+
+@api_view(['GET'], login_required=True)
+async def package_vocabularies(request, pk):
+  """Lists the vocabularies of a package in the order they were created"""
+  return JsonResponse(await database(_list_vocabularies)(pk, get_limit(request), request.GET.get('cursor')))
+
+
+@api_view(['GET'], login_required=True)
+async def package_quiz(request, pk):
+  """Returns multiple choice questions for random vocabularies of a package"""
+  count = get_limit(request, default=10, maximum=50)
+  return JsonResponse({'results': await database(_quiz)(pk, count)})
+
+
+@api_view(['GET'], login_required=True)
+async def vocabulary(request, pk):
+  """Returns a vocabulary with the ids of its words"""
+  return JsonResponse(await database(_get_vocabulary)(pk))
+
+
+@api_view(['GET', 'POST'], login_required=True)
+async def learnings(request):
+  """Lists the learnings the user should review next or starts learning a vocabulary"""
+  if request.method == 'POST':
+    data = await database(_create_learning)(request.user, read_json(request))
+    return JsonResponse(data, status=201)
+  data = await database(_due_learnings)(request.user, get_limit(request, default=20, maximum=100))
+  return JsonResponse({'results': data})
+
+
+@api_view(['POST'], login_required=True)
+async def review(request, pk):
+  """Schedules the next review of a learning of the user"""
+  return JsonResponse(await database(_review_learning)(request.user, pk, read_json(request)))
+
+
+@api_view(['GET'], login_required=True)
+async def stats(request):
+  """Returns the learning statistics of the user per language"""
+  return JsonResponse({'results': await database(_stats)(request.user)})
+
+
+@api_view(['GET'], login_required=True)
+async def leaderboard(request):
+  """Returns the top of a global, weekly or language leaderboard and the entries around the user"""
+  board = _board(request)
+  return JsonResponse(await database(_leaderboard)(board, request.user, get_limit(request, default=10, maximum=100)))
+
+
+@api_view(['POST'], login_required=True)
+async def sessions(request):
+  """
+  Applies the answers of a practice session at once.
+  Retries with the same session id are answered with the stored session and 200 instead of 201.
+  """
+  data, created = await database(_submit_session)(request.user, read_json(request))
+  return JsonResponse(data, status=201 if created else 200)